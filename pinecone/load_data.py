@@ -1,12 +1,24 @@
 import asyncio
+import importlib.util
 import json
 import os
+import re
+from pathlib import Path
 from typing import Dict, List
 
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from pinecone import Pinecone
 
+# The server's sanitizer, loaded from its file so stored text matches what the
+# server would speak without putting the whole server on the path
+_spec = importlib.util.spec_from_file_location(
+    "markdown_stream", Path(__file__).resolve().parent.parent / "server" / "markdown_stream.py"
+)
+_markdown_stream = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_markdown_stream)
+clean_markdown = _markdown_stream.clean_markdown
+
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
@@ -19,6 +31,11 @@ INDEX_NAME = "portfolio"
 EMBEDDING_MODEL = "text-embedding-3-large"
 EMBEDDING_DIMENSIONS = 3072
 
+# Upper bound for the generated short summary used in search results
+VOICE_SUMMARY_CHARS = 280
+
+_SENTENCE = re.compile(r"[^.!?]+[.!?]+[\"')]*\s*")
+
 
 async def get_embedding(text: str) -> List[float]:
     """Generate embedding for text using OpenAI's text-embedding-3-large model."""
@@ -34,6 +51,42 @@ async def get_embeddings(texts: List[str]) -> List[List[float]]:
     return [d.embedding for d in response.data]
 
 
+def brief(text: str, max_chars: int = VOICE_SUMMARY_CHARS) -> str:
+    """Leading whole sentences of `text` that fit in max_chars (at least one, cut at a word)."""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+
+    result = ""
+    for match in _SENTENCE.finditer(text):
+        if len(result) + len(match.group()) > max_chars:
+            break
+        result += match.group()
+    if result:
+        return result.strip()
+
+    cut = text.rfind(" ", 0, max_chars)
+    return text[: cut if cut > 0 else max_chars].rstrip(",;: ") + "..."
+
+
+def voice_fields(item: Dict) -> Dict[str, str]:
+    """
+    Plain-text copies of a project's fields for the server's tools.
+
+    plain_* are the markdown-free name, summary and details; voice_summary is
+    a short summary for search results, taken from the item if rewrite.py
+    produced one and otherwise cut from the plain summary.
+    """
+    plain_summary = clean_markdown(item["summary"]).strip()
+    voice_summary = item.get("voice_summary")
+    return {
+        "plain_name": clean_markdown(item["name"]).strip(),
+        "plain_summary": plain_summary,
+        "plain_details": clean_markdown(item["details"]).strip(),
+        "voice_summary": brief(clean_markdown(voice_summary) if voice_summary else plain_summary),
+    }
+
+
 async def prepare_vectors(data: List[Dict]) -> List[tuple]:
     """Prepare vectors for Pinecone upsert."""
     texts_to_embed = []
@@ -62,6 +115,7 @@ async def prepare_vectors(data: List[Dict]) -> List[tuple]:
             "name": item["name"],
             "summary": item["summary"],
             "details": item["details"],
+            **voice_fields(item),
         }
 
         if item.get("github"):
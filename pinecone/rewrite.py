@@ -1,5 +1,6 @@
 import json
 import asyncio
+import sys
 from openai import AsyncOpenAI
 import dotenv
 
@@ -49,6 +50,56 @@ Keep it professional, concise, and engaging.
     return proj
 
 
+async def write_voice_summary(proj, idx):
+    """Add a short spoken-style summary used by search results on voice calls."""
+    name = proj.get("name", "Untitled Project")
+    summary = proj.get("summary", "")
+
+    prompt = f"""
+You are writing a one-breath spoken description of a project.
+
+Project Name: {name}
+Summary: {summary}
+
+Write one or two plain sentences (under 40 words) saying what the project does
+and its most notable tech or award. No markdown, lists, URLs or emoji.
+"""
+
+    try:
+        response = await client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a helpful assistant for summarizing projects for speech.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.3,
+        )
+        proj["voice_summary"] = response.choices[0].message.content.strip()
+        print(f"[{idx+1}] ✅ Voice summary: {name}")
+    except Exception as e:
+        print(f"[{idx+1}] ❌ Error summarizing {name}: {e}")
+    return proj
+
+
+async def voice_main():
+    # Adds voice_summary to data.json in place; load_data.py stores it
+    with open("data.json", "r", encoding="utf-8") as f:
+        projects = json.load(f)
+
+    print(f"🚀 Writing voice summaries for {len(projects)} projects...")
+
+    tasks = [write_voice_summary(proj, i) for i, proj in enumerate(projects)]
+    updated_projects = await asyncio.gather(*tasks)
+
+    with open("data.json", "w", encoding="utf-8") as f:
+        json.dump(updated_projects, f, ensure_ascii=False, indent=2)
+
+    print("🎉 Voice summaries written to data.json")
+
+
 async def main():
     # Load parsed JSON objects
     with open("parsed_json_list.json", "r", encoding="utf-8") as f:
@@ -68,4 +119,7 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if sys.argv[1:] == ["voice"]:
+        asyncio.run(voice_main())
+    else:
+        asyncio.run(main())
@@ -72,5 +72,31 @@ class TestLoadData(unittest.TestCase):
             mock_get_embeddings.assert_called_once_with(["test text"])
             self.assertEqual(result, dummy_embedding)
 
+    def test_voice_fields_are_plain_text(self):
+        item = {
+            "id": "project1",
+            "name": "**Project One**",
+            "summary": "A *voice* app. It won a prize. It uses [Retell](https://retellai.com).",
+            "details": "## How we built it\n- Python",
+        }
+
+        fields = load_data.voice_fields(item)
+
+        self.assertEqual(fields["plain_name"], "Project One")
+        self.assertEqual(fields["plain_summary"], "A voice app. It won a prize. It uses Retell.")
+        self.assertEqual(fields["plain_details"], "How we built it\nPython")
+        self.assertEqual(fields["voice_summary"], fields["plain_summary"])
+
+    def test_voice_summary_is_short(self):
+        long_summary = "This sentence is about forty characters. " * 20
+        item = {"id": "p", "name": "P", "summary": long_summary, "details": "D"}
+
+        fields = load_data.voice_fields(item)
+        self.assertLessEqual(len(fields["voice_summary"]), load_data.VOICE_SUMMARY_CHARS)
+        self.assertTrue(fields["voice_summary"].endswith("characters."))
+
+        item["voice_summary"] = "A *short* one."
+        self.assertEqual(load_data.voice_fields(item)["voice_summary"], "A short one.")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,162 @@
+"""
+Admission control for LLM work, shared by voice, text chat and summaries.
+
+AdmissionScheduler is one process-wide gate: at most LLM_MAX_CONCURRENCY runs
+at once and at most LLM_CLASS_LIMITS per class. Freed slots go to waiters in
+priority order (voice, text, summary; FIFO within a class), and a waiter not
+admitted within its class timeout (LLM_QUEUE_TIMEOUTS_MS) gets
+AdmissionRejected. try_acquire() never queues, for best-effort work.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+from metrics import metrics
+
+# Highest priority first
+PRIORITY = ("voice", "text", "summary")
+
+DEFAULT_LIMIT = 24
+DEFAULT_CLASS_LIMITS = {"voice": 24, "text": 12, "summary": 4}
+DEFAULT_TIMEOUTS_MS = {"voice": 1500.0, "text": 10000.0, "summary": 15000.0}
+
+# What a rejected request gets instead of a reply
+BUSY_VOICE_LINE = "Sorry, give me one second. Could you say that again?"
+BUSY_TEXT_MESSAGE = "The assistant is busy right now. Please try again in a moment."
+
+
+class AdmissionRejected(Exception):
+    """No slot for a request of this class opened up within its queue timeout."""
+
+    def __init__(self, kind: str, waited_ms: float):
+        super().__init__(f"{kind} request not admitted after {waited_ms:.0f} ms")
+        self.kind = kind
+        self.waited_ms = waited_ms
+
+
+def parse_class_values(value: Optional[str], defaults: Dict[str, float]) -> Dict[str, float]:
+    """Parse "voice=24,text=12" into a dict, keeping defaults for unnamed classes."""
+    parsed = dict(defaults)
+    for part in (value or "").split(","):
+        name, _, number = part.partition("=")
+        name = name.strip()
+        if name in parsed and number.strip():
+            parsed[name] = float(number)
+    return parsed
+
+
+class AdmissionScheduler:
+    def __init__(
+        self,
+        limit: int = DEFAULT_LIMIT,
+        class_limits: Optional[Dict[str, float]] = None,
+        timeouts_ms: Optional[Dict[str, float]] = None,
+    ):
+        self.limit = max(1, int(limit))
+        self.class_limits = {
+            kind: max(1, int(n)) for kind, n in (class_limits or DEFAULT_CLASS_LIMITS).items()
+        }
+        self.timeouts_ms = dict(timeouts_ms or DEFAULT_TIMEOUTS_MS)
+        self.in_flight = 0
+        self._active: Dict[str, int] = {kind: 0 for kind in PRIORITY}
+        self._queues: Dict[str, Deque[asyncio.Future]] = {kind: deque() for kind in PRIORITY}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionScheduler":
+        return cls(
+            limit=int(os.getenv("LLM_MAX_CONCURRENCY", str(DEFAULT_LIMIT))),
+            class_limits=parse_class_values(os.getenv("LLM_CLASS_LIMITS"), DEFAULT_CLASS_LIMITS),
+            timeouts_ms=parse_class_values(os.getenv("LLM_QUEUE_TIMEOUTS_MS"), DEFAULT_TIMEOUTS_MS),
+        )
+
+    def queued(self, kind: str) -> int:
+        return sum(1 for waiter in self._queues[kind] if not waiter.done())
+
+    async def acquire(self, kind: str):
+        """Wait for a slot of this class, or raise AdmissionRejected on timeout."""
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues[kind].append(waiter)
+        metrics.observe(f"admission.{kind}.queue_depth", self.queued(kind))
+        self._grant()
+        try:
+            await asyncio.wait_for(waiter, self.timeouts_ms[kind] / 1000)
+        except asyncio.TimeoutError:
+            self._forget(kind, waiter)
+            waited_ms = (time.perf_counter() - started) * 1000
+            metrics.incr(f"admission.{kind}.rejected")
+            raise AdmissionRejected(kind, waited_ms) from None
+        except asyncio.CancelledError:
+            # Granted just as the caller went away: hand the slot on
+            if waiter.done() and not waiter.cancelled():
+                self.release(kind)
+            else:
+                self._forget(kind, waiter)
+            raise
+        metrics.incr(f"admission.{kind}.admitted")
+        metrics.observe(f"admission.{kind}.wait_ms", (time.perf_counter() - started) * 1000)
+
+    def try_acquire(self, kind: str) -> bool:
+        """Take a slot of this class only if one is free right now and nobody is queued."""
+        if (
+            any(self.queued(k) for k in PRIORITY)
+            or self.in_flight >= self.limit
+            or self._active[kind] >= self.class_limits[kind]
+        ):
+            return False
+        self._active[kind] += 1
+        self.in_flight += 1
+        metrics.incr(f"admission.{kind}.admitted")
+        return True
+
+    def release(self, kind: str):
+        self._active[kind] -= 1
+        self.in_flight -= 1
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, kind: str) -> AsyncIterator[None]:
+        """Hold a slot of this class for the duration of the block."""
+        await self.acquire(kind)
+        try:
+            yield
+        finally:
+            self.release(kind)
+
+    def _forget(self, kind: str, waiter: asyncio.Future):
+        try:
+            self._queues[kind].remove(waiter)
+        except ValueError:
+            pass
+
+    def _grant(self):
+        for kind in PRIORITY:
+            queue = self._queues[kind]
+            while queue and self.in_flight < self.limit and self._active[kind] < self.class_limits[kind]:
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue  # timed out or cancelled
+                self._active[kind] += 1
+                self.in_flight += 1
+                waiter.set_result(None)
+            if self.in_flight >= self.limit:
+                return
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "classes": {
+                kind: {
+                    "limit": self.class_limits[kind],
+                    "in_flight": self._active[kind],
+                    "queued": self.queued(kind),
+                    "timeout_ms": self.timeouts_ms[kind],
+                }
+                for kind in PRIORITY
+            },
+        }
@@ -0,0 +1,798 @@
+#!/usr/bin/env python3
+"""
+Offline micro-benchmarks for the server hot paths.
+
+Nothing here talks to OpenAI, Pinecone or Retell - each benchmark replays
+synthetic traffic through the local code paths so numbers are comparable
+between runs and machines.
+
+Usage:
+    # Full transcript rebuild vs incremental TranscriptState, 500-turn call
+    python benchmark.py transcript --turns 500
+
+    # Local intent router latency on navigation and non-navigation utterances
+    python benchmark.py router
+
+    # Streaming markdown sanitizer vs the old regex clean_markdown
+    python benchmark.py markdown --iterations 200
+
+    # Replay simulated turns under the static and adaptive latency policies
+    python benchmark.py policy --turns 600
+
+    # Per-project vs concurrent vs batched project lookups for 1/3/5 projects
+    python benchmark.py projects --fetch-ms 60 --model-ms 700
+
+    # Monolithic vs sectioned system prompt over a scripted conversation
+    python benchmark.py prompt
+
+    # Outbound event encoding: json.dumps(__dict__) vs wire.py, ns per event
+    python benchmark.py encode --events 20000
+
+    # Pydantic vs slotted-dataclass events over a simulated 1,000-token response
+    python benchmark.py events --tokens 1000
+
+    # Inbound frames: decode + sync every frame vs the interaction_type dispatcher
+    python benchmark.py frames --turns 100
+
+    # Webhook ack latency under bursts: inline handling vs background ingestion
+    python benchmark.py webhook --bursts 20 --burst-size 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+from retell.lib import webhook_auth
+
+from custom_types import ResponseRequiredRequest, ResponseResponse, TextChatStreamChunk
+from inbound import FrameDispatcher, decode
+from intent_router import route
+from latency_policy import LatencyPolicy, TtftTracker, classify_complexity
+from markdown_stream import MarkdownSanitizer, clean_markdown
+from metrics import percentile
+from prompt_sections import PromptSections, select_topics
+from transcript_state import TranscriptState, utterance_to_message
+from webhooks import LOGGED_EVENTS, WebhookEvent, WebhookIngestor
+import wire
+
+
+def report(label: str, samples_us: List[float]):
+    total_ms = sum(samples_us) / 1000
+    print(
+        f"  {label:<28} total={total_ms:9.2f}ms "
+        f"p50={percentile(samples_us, 50):8.1f}us "
+        f"p95={percentile(samples_us, 95):8.1f}us "
+        f"last={samples_us[-1]:8.1f}us"
+    )
+
+
+# ── transcript ───────────────────────────────────────────────────────────────
+
+
+def synthetic_call(turns: int) -> List[List[Dict]]:
+    """Build the sequence of transcript snapshots Retell would send for a call.
+
+    Each turn produces two update_only snapshots while the user is still
+    talking (the last utterance grows) and a final response_required snapshot.
+    """
+    transcript: List[Dict] = [
+        {"role": "agent", "content": "Hey, I'm Bill. How can I help you?"}
+    ]
+    snapshots = []
+    for turn in range(turns):
+        words = f"Tell me about project number {turn} and what stack it used".split()
+        for cut in (len(words) // 3, 2 * len(words) // 3, len(words)):
+            partial = transcript + [{"role": "user", "content": " ".join(words[:cut])}]
+            snapshots.append([dict(u) for u in partial])
+        transcript = snapshots[-1] + [
+            {
+                "role": "agent",
+                "content": f"Project {turn} was a hackathon build using FastAPI, "
+                "Next.js and a vector database. It took about thirty six hours.",
+            }
+        ]
+    return snapshots
+
+
+def bench_transcript(turns: int):
+    snapshots = synthetic_call(turns)
+    # Only every third snapshot is a response_required frame
+    response_frames = set(range(2, len(snapshots), 3))
+
+    def full_rebuild(snapshot, is_response):
+        if not is_response:
+            return  # the old handler ignored update_only frames entirely
+        request = ResponseRequiredRequest(
+            interaction_type="response_required", response_id=1, transcript=snapshot
+        )
+        return [utterance_to_message(u) for u in request.transcript]
+
+    state = TranscriptState()
+
+    def incremental(snapshot, is_response):
+        return state.sync(snapshot).messages
+
+    def run(fn: Callable) -> List[float]:
+        # One sample per turn: the two update_only frames plus the response frame
+        samples = []
+        elapsed = 0.0
+        for i, snapshot in enumerate(snapshots):
+            is_response = i in response_frames
+            start = time.perf_counter()
+            fn(snapshot, is_response)
+            elapsed += time.perf_counter() - start
+            if is_response:
+                samples.append(elapsed * 1e6)
+                elapsed = 0.0
+        return samples
+
+    full = run(full_rebuild)
+    inc = run(incremental)
+
+    print(f"Transcript handling over a {turns}-turn call ({len(snapshots)} frames)")
+    report("full rebuild (per turn)", full)
+    report("incremental (per turn)", inc)
+    tail = max(1, turns // 10)
+    print(
+        f"  last {tail} turns avg: full={sum(full[-tail:]) / tail:.1f}us "
+        f"incremental={sum(inc[-tail:]) / tail:.1f}us"
+    )
+    assert state.messages == full_rebuild(snapshots[-1], True)
+
+
+# ── frames ───────────────────────────────────────────────────────────────────
+
+
+class _NullWriter:
+    # Stands in for ConnectionWriter; still pays for encoding the event
+    def send(self, event: Any) -> bool:
+        wire.encode_event(event)
+        return True
+
+
+def bench_frames(turns: int):
+    """Receive-loop cost of a call's frames: everything decoded vs the dispatcher."""
+    snapshots = synthetic_call(turns)
+    frames = []
+    for i, snapshot in enumerate(snapshots):
+        kind = "response_required" if i % 3 == 2 else "update_only"
+        frames.append(json.dumps({"interaction_type": kind, "response_id": i, "transcript": snapshot}))
+        frames.append(json.dumps({"interaction_type": "ping_pong", "timestamp": i}))
+    print(f"Inbound frames over a {turns}-turn call ({len(frames)} frames, incl. pings)")
+
+    def decode_all() -> List[float]:
+        # iter_json() + a handler per frame that syncs update_only transcripts
+        state, samples = TranscriptState(), []
+        for raw in frames:
+            start = time.perf_counter()
+            request_json = json.loads(raw)
+            if request_json["interaction_type"] != "ping_pong":
+                state.sync(request_json["transcript"])
+            samples.append((time.perf_counter() - start) * 1e6)
+        return samples
+
+    def dispatched() -> List[float]:
+        dispatcher = FrameDispatcher(_NullWriter())
+        state, samples = TranscriptState(), []
+
+        async def run():
+            for raw in frames:
+                start = time.perf_counter()
+                if await dispatcher.dispatch(raw):
+                    state.sync(decode(raw)["transcript"])
+                samples.append((time.perf_counter() - start) * 1e6)
+
+        asyncio.run(run())
+        return samples
+
+    report("decode + sync every frame", decode_all())
+    report("dispatcher", dispatched())
+
+
+# ── webhook ──────────────────────────────────────────────────────────────────
+
+WEBHOOK_KEY = "benchmark-key"
+
+
+def synthetic_webhooks(count: int) -> List[tuple]:
+    """(body, signature) pairs shaped like Retell's call lifecycle events."""
+    events = ("call_started", "call_ended", "call_analyzed")
+    transcript = "Agent: Hi, how can I help?\nUser: Tell me about your projects.\n" * 20
+    bodies = []
+    for i in range(count):
+        body = json.dumps(
+            {
+                "event": events[i % 3],
+                "data": {"call_id": f"call_{i // 3}", "transcript": transcript, "duration_ms": 61234},
+            },
+            separators=(",", ":"),
+        )
+        bodies.append((body, webhook_auth.symmetric["sign"](body, WEBHOOK_KEY)))
+    return bodies
+
+
+def bench_webhook(bursts: int, burst_size: int):
+    """Time from a burst's arrival to each request's ack, old handler vs ingestor."""
+    requests = synthetic_webhooks(burst_size)
+    print(f"Webhook acks over {bursts} bursts of {burst_size} signed events")
+
+    def inline(log_path: str):
+        # The old handler: parse, re-encode to verify, handle and log before acking
+        async def handle(body: str, signature: str):
+            post_data = json.loads(body)
+            assert webhook_auth.verify(
+                json.dumps(post_data, separators=(",", ":"), ensure_ascii=False), WEBHOOK_KEY, signature
+            )
+            print("Call event", post_data["data"]["call_id"])
+            if post_data["event"] in LOGGED_EVENTS:
+                with open(log_path, "ab") as f:
+                    f.write(WebhookEvent.parse(body.encode()).log_line())
+
+        return handle, None
+
+    def ingested(log_path: str):
+        ingestor = WebhookIngestor(
+            log_path=log_path, on_event=lambda event: print("Call event", event.call_id)
+        )
+
+        async def handle(body: str, signature: str):
+            raw = body.encode()
+            assert webhook_auth.verify(raw.decode("utf-8"), WEBHOOK_KEY, signature)
+            assert ingestor.submit(WebhookEvent.parse(raw))
+
+        return handle, ingestor
+
+    def run(make: Callable) -> List[float]:
+        samples = []
+
+        async def burst(handle):
+            arrived = time.perf_counter()
+
+            async def request(body, signature):
+                await handle(body, signature)
+                samples.append((time.perf_counter() - arrived) * 1e6)
+
+            await asyncio.gather(*(request(body, sig) for body, sig in requests))
+
+        async def main():
+            with tempfile.TemporaryDirectory() as tmp:
+                handle, ingestor = make(os.path.join(tmp, "events.jsonl"))
+                for _ in range(bursts):
+                    await burst(handle)
+                    if ingestor is not None:
+                        # Let the worker catch up between bursts, like real traffic gaps
+                        await ingestor.drain()
+                if ingestor is not None:
+                    await ingestor.close()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(main())
+        return samples
+
+    for label, make in (("inline handling", inline), ("background ingestion", ingested)):
+        samples = run(make)
+        report(label, samples)
+        print(f"  {'':<28} p99={percentile(samples, 99) / 1000:8.2f}ms")
+
+
+# ── router ───────────────────────────────────────────────────────────────────
+
+ROUTER_UTTERANCES = [
+    "show me your education",
+    "Go to the resume.",
+    "open the hackathon map",
+    "can you show me your resumay",
+    "take me home",
+    "tell me about your education",
+    "What projects have you built with voice AI?",
+    "show me your education and your projects",
+]
+
+
+def bench_router(iterations: int):
+    print(f"Intent router over {len(ROUTER_UTTERANCES)} utterances x {iterations}")
+    for text in ROUTER_UTTERANCES:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            match = route(text)
+            samples.append((time.perf_counter() - start) * 1e6)
+        verdict = match.tool if match else "-> agent"
+        print(f"  {text[:40]!r:<44} p50={percentile(samples, 50):7.1f}us  {verdict}")
+
+
+# ── markdown ─────────────────────────────────────────────────────────────────
+
+MARKDOWN_SAMPLE = """## Overview
+**SpotLight** is a _real-time_ accessibility tool built at a hackathon.
+It uses `FastAPI`, [Next.js](https://nextjs.org) and a vector database.
+
+### Highlights
+- Won **first place** overall out of 120 teams
+- Streams audio with *under 300ms* latency
+1. Capture audio
+2. Transcribe with `whisper`
+3. Answer with the agent
+"""
+
+
+def regex_clean_markdown(text: str) -> str:
+    """The regex chain clean_markdown used before the streaming sanitizer."""
+    if not text:
+        return text
+    text = re.sub(r"\*\*([^*]+)\*\*", r"\1", text)
+    text = re.sub(r"\*([^*]+)\*", r"\1", text)
+    text = re.sub(r"__([^_]+)__", r"\1", text)
+    text = re.sub(r"_([^_]+)_", r"\1", text)
+    text = re.sub(r"`([^`]+)`", r"\1", text)
+    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
+    text = re.sub(r"^#{1,6}\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^[\*\-\+]\s+", "", text, flags=re.MULTILINE)
+    text = re.sub(r"^\d+\.\s+", "", text, flags=re.MULTILINE)
+    return text
+
+
+def token_deltas(text: str) -> List[str]:
+    """Split text roughly the way the model streams it (~4 chars per delta)."""
+    return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+
+def bench_markdown(iterations: int):
+    deltas = token_deltas(MARKDOWN_SAMPLE)
+    expected = regex_clean_markdown(MARKDOWN_SAMPLE)
+
+    def timed(fn: Callable) -> List[float]:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1e6)
+        return samples
+
+    def regex_rescan():
+        # The only correct way to stream with the regex chain: re-clean the
+        # accumulated text on every delta and emit what's new
+        buffer, emitted = "", 0
+        for delta in deltas:
+            buffer += delta
+            cleaned = regex_clean_markdown(buffer)
+            emitted = len(cleaned)
+        return emitted
+
+    def sanitizer_stream():
+        sanitizer = MarkdownSanitizer()
+        parts = [sanitizer.feed(delta) for delta in deltas]
+        parts.append(sanitizer.flush())
+        return "".join(parts)
+
+    streamed = sanitizer_stream()
+    print(f"Markdown cleaning, {len(MARKDOWN_SAMPLE)} chars in {len(deltas)} deltas x {iterations}")
+    report("regex, whole text", timed(lambda: regex_clean_markdown(MARKDOWN_SAMPLE)))
+    report("sanitizer, whole text", timed(lambda: clean_markdown(MARKDOWN_SAMPLE)))
+    report("regex, rescan per delta", timed(regex_rescan))
+    report("sanitizer, per delta", timed(sanitizer_stream))
+    print(f"  streamed output matches whole-text output: {streamed == clean_markdown(MARKDOWN_SAMPLE)}")
+    print(f"  sanitizer output matches regex output:     {streamed == expected}")
+
+
+# ── policy ───────────────────────────────────────────────────────────────────
+
+POLICY_QUERIES = [
+    "hi",
+    "thanks!",
+    "what's your name",
+    "what did you study at UCSC",
+    "tell me about your internship at RingCentral",
+    "what AI projects have you built",
+    "which hackathons did you win",
+    "compare Dispatch AI and AdaptEd and explain the architecture of each",
+    "walk me through how this voice assistant works in detail",
+    "list all of your hackathon projects that used computer vision",
+]
+
+# Simulated latency model (ms): base TTFT per model, extra per reasoning
+# effort, and generation time per output token.
+SIM_BASE_TTFT = {"primary": 450.0, "fast": 250.0}
+SIM_EFFORT_MS = {"none": 0.0, "low": 350.0, "medium": 900.0}
+SIM_MS_PER_TOKEN = 6.0
+# Output tokens each complexity class wants in voice mode
+SIM_DEMAND = {"simple": 40, "standard": 140, "complex": 420}
+# Seconds between voice turns across the process
+SIM_TURN_GAP_S = 2.0
+
+
+def simulate_turn(rng: random.Random, decision, complexity: str, load: float) -> tuple:
+    """Return (ttft_ms, turn_ms) for one simulated turn."""
+    base = SIM_BASE_TTFT["fast" if decision.model == "fast" else "primary"]
+    ttft = (base + SIM_EFFORT_MS[decision.reasoning_effort]) * load * rng.lognormvariate(0, 0.25)
+    demand = SIM_DEMAND[complexity]
+    return ttft, ttft + demand * SIM_MS_PER_TOKEN
+
+
+def bench_policy(turns: int, seed: int):
+    # Normal load, then a slow API period (2.5x), then recovery
+    def load_at(turn: int) -> float:
+        return 2.5 if turns // 3 <= turn < 2 * turns // 3 else 1.0
+
+    policies = {
+        "static": dict(enabled=False),
+        "adaptive": dict(enabled=True),
+        "adaptive + fast model": dict(enabled=True, fast_model="fast"),
+    }
+    print(f"Replaying {turns} voice turns, one every {SIM_TURN_GAP_S:.0f}s (slow API for the middle third)")
+    for label, kwargs in policies.items():
+        now = [0.0]
+        tracker = TtftTracker(clock=lambda: now[0])
+        policy = LatencyPolicy("voice", slo_ms=900, model="primary", tracker=tracker, **kwargs)
+        rng = random.Random(seed)
+        ttfts, totals = [], []
+        probes = fast_after_recovery = 0
+        for turn in range(turns):
+            now[0] = turn * SIM_TURN_GAP_S
+            text = POLICY_QUERIES[turn % len(POLICY_QUERIES)]
+            decision = policy.decide(text)
+            ttft, total = simulate_turn(rng, decision, classify_complexity(text), load_at(turn))
+            tracker.observe("voice", decision.model, ttft)
+            ttfts.append(ttft)
+            totals.append(total)
+            probes += decision.reason == "probe"
+            fast_after_recovery += decision.model == "fast" and turn >= 2 * turns // 3
+        print(
+            f"  {label:<22} ttft p50={percentile(ttfts, 50):6.0f}ms p95={percentile(ttfts, 95):6.0f}ms  "
+            f"turn p50={percentile(totals, 50):6.0f}ms p95={percentile(totals, 95):6.0f}ms  "
+            f"probes={probes} fast after recovery={fast_after_recovery}"
+        )
+
+
+# ── projects ─────────────────────────────────────────────────────────────────
+
+
+class FakeIndex:
+    """Stands in for the Pinecone index: a fixed round trip plus a little per ID."""
+
+    def __init__(self, fetch_ms: float, per_id_ms: float = 1.0):
+        self.fetch_ms = fetch_ms
+        self.per_id_ms = per_id_ms
+        self.calls = 0
+
+    async def fetch(self, ids):
+        self.calls += 1
+        await asyncio.sleep((self.fetch_ms + self.per_id_ms * len(ids)) / 1000)
+
+        class Vector:
+            def __init__(self, project_id):
+                self.metadata = {"name": project_id, "summary": "s", "details": "d"}
+
+        class Result:
+            vectors = {project_id: Vector(project_id) for project_id in ids}
+
+        return Result()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+def bench_projects(fetch_ms: float, model_ms: float, iterations: int):
+    # project_search builds its clients at import; nothing below reaches them
+    os.environ.setdefault("PINECONE_API_KEY", "offline")
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+    import project_search
+
+    index = FakeIndex(fetch_ms)
+
+    class FakePinecone:
+        def IndexAsyncio(self, name):
+            return index
+
+    project_search.pc = FakePinecone()
+
+    async def one_per_step(ids):
+        # Model asks for one project per step: a model round trip and a fetch each
+        for project_id in ids:
+            await asyncio.sleep(model_ms / 1000)
+            await project_search.get_project_by_id(project_id)
+
+    async def parallel_calls(ids):
+        # One step with parallel get_project_details calls, run concurrently
+        await asyncio.sleep(model_ms / 1000)
+        await asyncio.gather(*(project_search.get_project_by_id(i) for i in ids))
+
+    async def batched(ids):
+        # One step, one get_projects_details call, one fetch
+        await asyncio.sleep(model_ms / 1000)
+        await project_search.get_projects_by_ids(ids)
+
+    async def run():
+        print(f"Project lookups, fetch={fetch_ms:.0f}ms model step={model_ms:.0f}ms x {iterations}")
+        for count in (1, 3, 5):
+            ids = [f"project-{i}" for i in range(count)]
+            for label, fn in (
+                ("one per model step", one_per_step),
+                ("parallel calls", parallel_calls),
+                ("batched fetch", batched),
+            ):
+                index.calls = 0
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await fn(ids)
+                    samples.append((time.perf_counter() - start) * 1000)
+                print(
+                    f"  {count} project(s) {label:<20} p50={percentile(samples, 50):7.1f}ms "
+                    f"fetches/turn={index.calls / iterations:.0f}"
+                )
+
+    asyncio.run(run())
+
+
+# ── prompt ───────────────────────────────────────────────────────────────────
+
+# (user message, page on screen) for a typical voice call
+PROMPT_CONVERSATION = [
+    ("hey", None),
+    ("who are you", None),
+    ("where did you study", None),
+    ("show me your education", None),
+    ("what do you do for work now", "education"),
+    ("what AI projects have you built", "education"),
+    ("tell me more about dispatch ai", "education"),
+    ("what was the tech stack", "project"),
+    ("cool, do you still play piano", "project"),
+    ("how does this website work", "project"),
+    ("thanks, that's all", "architecture"),
+]
+
+# Approximate tokens per character for English prose
+CHARS_PER_TOKEN = 4
+# OpenAI prompt caching starts at 1024 tokens and grows in 128-token steps
+CACHE_MIN_TOKENS = 1024
+CACHE_STEP_TOKENS = 128
+
+
+def cacheable_tokens(previous: str, current: str) -> int:
+    """Tokens of `current` a prefix cache could reuse after serving `previous`."""
+    common = 0
+    for a, b in zip(previous, current):
+        if a != b:
+            break
+        common += 1
+    tokens = common // CHARS_PER_TOKEN
+    if tokens < CACHE_MIN_TOKENS:
+        return 0
+    return tokens - (tokens - CACHE_MIN_TOKENS) % CACHE_STEP_TOKENS
+
+
+def bench_prompt(mode: str, iterations: int):
+    print(f"Instructions per turn over a {len(PROMPT_CONVERSATION)}-turn {mode} conversation")
+    for label, enabled in (("monolithic", False), ("sectioned", True)):
+        sections = PromptSections(mode, enabled=enabled)
+        previous, texts = "", []
+        tokens, cached = [], []
+        for message, page in PROMPT_CONVERSATION:
+            texts.append(message)
+            instructions = sections.instructions(texts, page)
+            tokens.append(len(instructions) / CHARS_PER_TOKEN)
+            cached.append(cacheable_tokens(previous, instructions))
+            previous = instructions
+        # Cached ratio from the second turn on (the first is always cold)
+        ratio = sum(cached[1:]) / sum(tokens[1:])
+        uncached = [t - c for t, c in zip(tokens[1:], cached[1:])]
+        print(
+            f"  {label:<11} ~tokens mean={sum(tokens) / len(tokens):6.0f} "
+            f"first turn={tokens[0]:6.0f} last={tokens[-1]:6.0f}  "
+            f"cacheable={ratio:5.1%}  uncached mean={sum(uncached) / len(uncached):5.0f}"
+        )
+
+    samples = []
+    for _ in range(iterations):
+        for message, page in PROMPT_CONVERSATION:
+            start = time.perf_counter()
+            select_topics(message, page)
+            samples.append((time.perf_counter() - start) * 1e6)
+    report("select_topics", samples)
+    print("  (TTFT and real cached tokens: llm.prompt.<layout>.* in the metrics summary)")
+
+
+# ── encode ───────────────────────────────────────────────────────────────────
+
+
+def bench_encode(events: int):
+    rng = random.Random(7)
+    words = MARKDOWN_SAMPLE.split() + ["café", "naïve", "“quoted”", "🎉"]
+    texts = [" ".join(rng.choices(words, k=rng.randint(1, 12))) + " " for _ in range(256)]
+    deltas = [
+        ResponseResponse(response_id=7, content=texts[i % len(texts)], content_complete=False)
+        for i in range(events)
+    ]
+    chunks = [TextChatStreamChunk(type="content", content=text) for text in texts]
+    print(f"Outbound encoding, {events} events, wire backend={wire.BACKEND}")
+
+    def per_event_ns(encode: Callable, items: List) -> float:
+        best = float("inf")
+        for _ in range(5):
+            start = time.perf_counter_ns()
+            for i in range(events):
+                encode(items[i % len(items)])
+            best = min(best, (time.perf_counter_ns() - start) / events)
+        return best
+
+    voice = {
+        "send_json(fields)": lambda e: json.dumps(
+            e.model_dump(), separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8"),
+        "wire.dumps(fields)": wire.dumps,
+        "wire.encode_event (template)": wire.encode_event,
+    }
+    chat = {
+        "json.dumps(model_dump())": lambda c: f"data: {json.dumps(c.model_dump())}\n\n".encode("utf-8"),
+        "wire.sse_line (template)": wire.sse_line,
+    }
+    for title, encoders, items in (
+        ("ResponseResponse deltas", voice, deltas),
+        ("/chat content chunks", chat, chunks),
+    ):
+        print(f" {title}")
+        baseline = None
+        for label, encode in encoders.items():
+            ns = per_event_ns(encode, items)
+            baseline = baseline or ns
+            print(f"  {label:<30} {ns:8.0f} ns/event  {baseline / ns:5.1f}x")
+
+
+# ── events ───────────────────────────────────────────────────────────────────
+
+
+class PydanticResponse(BaseModel):
+    """ResponseResponse as it was before the outbound events became dataclasses."""
+
+    response_type: Literal["response"] = "response"
+    response_id: int
+    content: str
+    content_complete: bool
+    end_call: Optional[bool] = False
+    transfer_number: Optional[str] = None
+
+
+class PydanticChunk(BaseModel):
+    """TextChatStreamChunk as it was before."""
+
+    type: Literal["content", "metadata", "done", "error", "status"]
+    content: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+
+def bench_events(tokens: int, rounds: int):
+    rng = random.Random(11)
+    words = MARKDOWN_SAMPLE.split()
+    deltas = [rng.choice(words) + " " for _ in range(tokens)]
+    print(f"Simulated {tokens}-token response, one event per token")
+
+    voice = {
+        "pydantic + send_json": (
+            lambda d: PydanticResponse(response_id=7, content=d, content_complete=False),
+            lambda e: json.dumps(e.__dict__, separators=(",", ":"), ensure_ascii=False),
+        ),
+        "dataclass + wire": (
+            lambda d: ResponseResponse(response_id=7, content=d, content_complete=False),
+            wire.encode_event,
+        ),
+    }
+    chat = {
+        "pydantic + model_dump": (
+            lambda d: PydanticChunk(type="content", content=d),
+            lambda c: f"data: {json.dumps(c.model_dump())}\n\n",
+        ),
+        "dataclass + wire": (
+            lambda d: TextChatStreamChunk(type="content", content=d),
+            wire.sse_line,
+        ),
+    }
+
+    for title, variants in (("voice ResponseResponse", voice), ("/chat TextChatStreamChunk", chat)):
+        print(f" {title}")
+        for label, (build, encode) in variants.items():
+            # Allocations: every event of the response kept alive, as a list
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            kept = [build(d) for d in deltas]
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            stats = after.compare_to(before, "filename")
+            blocks = sum(stat.count_diff for stat in stats) / tokens
+            size = sum(stat.size_diff for stat in stats) / tokens
+            del kept
+
+            build_ns, total_ns = float("inf"), float("inf")
+            for _ in range(rounds):
+                start = time.process_time_ns()
+                events = [build(d) for d in deltas]
+                built = time.process_time_ns()
+                for event in events:
+                    encode(event)
+                done = time.process_time_ns()
+                build_ns = min(build_ns, (built - start) / tokens)
+                total_ns = min(total_ns, (done - start) / tokens)
+            print(
+                f"  {label:<24} {blocks:5.1f} blocks/event {size:6.0f} B/event "
+                f"build={build_ns:6.0f} ns  build+encode={total_ns:6.0f} ns"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("transcript", help="full vs incremental transcript handling")
+    p.add_argument("--turns", type=int, default=500)
+
+    p = sub.add_parser("router", help="local intent router latency")
+    p.add_argument("--iterations", type=int, default=200)
+
+    p = sub.add_parser("markdown", help="streaming sanitizer vs regex clean_markdown")
+    p.add_argument("--iterations", type=int, default=200)
+
+    p = sub.add_parser("policy", help="replay turns under each latency policy")
+    p.add_argument("--turns", type=int, default=600)
+    p.add_argument("--seed", type=int, default=7)
+
+    p = sub.add_parser("projects", help="per-project vs batched project lookups")
+    p.add_argument("--fetch-ms", type=float, default=60)
+    p.add_argument("--model-ms", type=float, default=700)
+    p.add_argument("--iterations", type=int, default=5)
+
+    p = sub.add_parser("prompt", help="monolithic vs sectioned system prompt")
+    p.add_argument("--mode", choices=("voice", "text"), default="voice")
+    p.add_argument("--iterations", type=int, default=200)
+
+    p = sub.add_parser("encode", help="outbound event encoding, ns per event")
+    p.add_argument("--events", type=int, default=20000)
+
+    p = sub.add_parser("events", help="pydantic vs dataclass outbound events, allocations and CPU")
+    p.add_argument("--tokens", type=int, default=1000)
+    p.add_argument("--rounds", type=int, default=20)
+
+    p = sub.add_parser("frames", help="inbound frame decoding vs the interaction_type dispatcher")
+    p.add_argument("--turns", type=int, default=100)
+
+    p = sub.add_parser("webhook", help="webhook ack latency under bursts, inline vs background ingestion")
+    p.add_argument("--bursts", type=int, default=20)
+    p.add_argument("--burst-size", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.benchmark == "transcript":
+        bench_transcript(args.turns)
+    elif args.benchmark == "router":
+        bench_router(args.iterations)
+    elif args.benchmark == "markdown":
+        bench_markdown(args.iterations)
+    elif args.benchmark == "policy":
+        bench_policy(args.turns, args.seed)
+    elif args.benchmark == "projects":
+        bench_projects(args.fetch_ms, args.model_ms, args.iterations)
+    elif args.benchmark == "prompt":
+        bench_prompt(args.mode, args.iterations)
+    elif args.benchmark == "encode":
+        bench_encode(args.events)
+    elif args.benchmark == "events":
+        bench_events(args.tokens, args.rounds)
+    elif args.benchmark == "frames":
+        bench_frames(args.turns)
+    elif args.benchmark == "webhook":
+        bench_webhook(args.bursts, args.burst_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+from dataclasses import dataclass, field
 from typing import Any, List, Optional, Literal, Union, Dict
 from pydantic import BaseModel
 
@@ -42,20 +43,31 @@ CustomLlmResponse = Union[
 
 
 # Your Server -> Retell Events
-class ConfigResponse(BaseModel):
+#
+# Server-generated, so they skip validation: slotted dataclasses are several
+# times cheaper to build than pydantic models, and one is built per streamed
+# delta. wire.py encodes them. Inbound payloads above stay pydantic.
+@dataclass(slots=True, kw_only=True)
+class OutboundEvent:
+    def model_dump(self) -> Dict[str, Any]:
+        """Fields as a dict, in declaration order (like the pydantic models had)."""
+        return {name: getattr(self, name) for name in self.__dataclass_fields__}
+
+
+@dataclass(slots=True, kw_only=True)
+class ConfigResponse(OutboundEvent):
     response_type: Literal["config"] = "config"
-    config: Dict[str, bool] = {
-        "auto_reconnect": bool,
-        "call_details": bool,
-    }
+    config: Dict[str, bool] = field(default_factory=dict)
 
 
-class PingPongResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class PingPongResponse(OutboundEvent):
     response_type: Literal["ping_pong"] = "ping_pong"
     timestamp: int
 
 
-class ResponseResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ResponseResponse(OutboundEvent):
     response_type: Literal["response"] = "response"
     response_id: int
     content: str
@@ -64,7 +76,8 @@ class ResponseResponse(BaseModel):
     transfer_number: Optional[str] = None
 
 
-class AgentInterruptResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class AgentInterruptResponse(OutboundEvent):
     response_type: Literal["agent_interrupt"] = "agent_interrupt"
     interrupt_id: int
     content: str
@@ -75,20 +88,23 @@ class AgentInterruptResponse(BaseModel):
     digit_to_press: Optional[str] = None
 
 
-class ToolCallInvocationResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ToolCallInvocationResponse(OutboundEvent):
     response_type: Literal["tool_call_invocation"] = "tool_call_invocation"
     tool_call_id: str
     name: str
     arguments: str
 
 
-class ToolCallResultResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ToolCallResultResponse(OutboundEvent):
     response_type: Literal["tool_call_result"] = "tool_call_result"
     tool_call_id: str
     content: str
 
 
-class MetadataResponse(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class MetadataResponse(OutboundEvent):
     response_type: Literal["metadata"] = "metadata"
     metadata: Dict[str, Any]
 
@@ -107,7 +123,13 @@ class TextChatRequest(BaseModel):
     messages: List[TextChatMessage]
 
 
-class TextChatStreamChunk(BaseModel):
+class ChatSessionMessage(BaseModel):
+    # Only the new user message; the session holds the history
+    content: str
+
+
+@dataclass(slots=True, kw_only=True)
+class TextChatStreamChunk(OutboundEvent):
     type: Literal["content", "metadata", "done", "error", "status"]
     content: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
@@ -158,6 +158,7 @@ async def run_agent_debug(user_messages: List[str], mode: str = "text"):
     """Send messages through the full agent pipeline and log everything."""
     from agents import RawResponsesStreamEvent, RunItemStreamEvent, Runner, trace
     from llm import LlmClient
+    from prompts import text_turn_note
 
     header("Agent Debug Session")
     kv("Mode", mode)
@@ -175,19 +176,7 @@ async def run_agent_debug(user_messages: List[str], mode: str = "text"):
         conversation.append({"role": "user", "content": user_msg})
 
         # Build processed messages the same way draft_text_response does
-        processed = []
-        for i, msg in enumerate(conversation):
-            if i == len(conversation) - 1 and msg["role"] == "user":
-                processed.append({
-                    "role": "user",
-                    "content": (
-                        f"User question: {msg['content']}\n\n"
-                        "This is a TEXT chat. Use markdown formatting: "
-                        "**bold** for emphasis, `code` for tech terms, and bullet points for lists."
-                    ),
-                })
-            else:
-                processed.append(msg)
+        processed = conversation + [{"role": "developer", "content": text_turn_note}]
 
         kv("Processed messages count", len(processed))
         print()
@@ -0,0 +1,136 @@
+"""
+Filler speech while slow tools run in voice mode.
+
+search_projects and get_project_details cost an embedding, a Pinecone round
+trip and a second model call; without a lead-in the caller hears silence the
+whole time. ToolLatencyMask tracks slow tool calls in a turn and, once one
+has been running for longer than the threshold, hands out a short pre-written
+line to speak. Calls that finish within the threshold, or that the model
+already introduced itself ("Let me look that up"), get no filler.
+
+with_idle() lets draft_response wake up while it waits on the agent stream,
+so the filler can be sent without a model event to piggyback on.
+"""
+
+import asyncio
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from metrics import metrics
+
+SLOW_TOOLS = frozenset({"search_projects", "get_project_details", "get_projects_details"})
+
+FILLER_LINES: Tuple[str, ...] = (
+    "Let me pull that up. ",
+    "One sec, let me check. ",
+    "Give me a moment. ",
+    "Let me look that up. ",
+    "Okay, checking my notes. ",
+    "Hang on, grabbing that. ",
+)
+
+DEFAULT_FILLER_AFTER_MS = 600.0
+
+# Yielded by with_idle() when nothing arrived before the timeout
+IDLE = object()
+
+
+class ToolLatencyMask:
+    """Decides when a voice turn should speak a filler line during a tool call."""
+
+    def __init__(self, after_ms: Optional[float] = None):
+        if after_ms is None:
+            after_ms = float(os.getenv("VOICE_FILLER_AFTER_MS", str(DEFAULT_FILLER_AFTER_MS)))
+        self.after = after_ms / 1000
+        self.enabled = after_ms > 0
+        # call_id -> (invoked at, whether it still needs a filler)
+        self._pending: Dict[str, Tuple[float, bool]] = {}
+        self._spoke = False
+        self._last_line: Optional[str] = None
+
+    def spoke(self):
+        """The model streamed speech; a tool call right after needs no filler."""
+        self._spoke = True
+        self._settle(time.perf_counter())
+
+    def invoked(self, call_id: str, name: str):
+        if not self.enabled or name not in SLOW_TOOLS:
+            return
+        self._pending[call_id] = (time.perf_counter(), not self._spoke)
+
+    def completed(self, call_id: str):
+        started = self._pending.pop(call_id, None)
+        self._spoke = False
+        if started is None:
+            return
+        invoked_at, unmasked = started
+        now = time.perf_counter()
+        metrics.observe("voice.tool_wait_ms", (now - invoked_at) * 1000)
+        if unmasked:
+            # Finished before a filler was due: the silence was the whole wait
+            metrics.observe("voice.tool_silence_ms", (now - invoked_at) * 1000)
+            metrics.incr("voice.filler_exempt")
+
+    def timeout(self) -> Optional[float]:
+        """Seconds until a filler is due, or None if none is pending."""
+        due = [at + self.after for at, unmasked in self._pending.values() if unmasked]
+        if not due:
+            return None
+        return max(0.0, min(due) - time.perf_counter())
+
+    def due(self) -> Optional[str]:
+        """A filler line if a slow tool has outlasted the threshold, else None."""
+        now = time.perf_counter()
+        if not any(unmasked and now - at >= self.after for at, unmasked in self._pending.values()):
+            return None
+        self._settle(now)
+        lines = [line for line in FILLER_LINES if line != self._last_line]
+        self._last_line = random.choice(lines)
+        metrics.incr("voice.fillers")
+        return self._last_line
+
+    def _settle(self, now: float):
+        """Something is being said: close the silence on every pending call."""
+        for call_id, (at, unmasked) in self._pending.items():
+            if unmasked:
+                metrics.observe("voice.tool_silence_ms", (now - at) * 1000)
+                self._pending[call_id] = (at, False)
+
+
+async def with_idle(events: AsyncIterator[Any], mask: ToolLatencyMask) -> AsyncIterator[Any]:
+    """Iterate `events`, yielding IDLE whenever mask.timeout() passes first.
+
+    While no filler is pending each step is awaited directly; otherwise the
+    step runs as a task that is waited on (never cancelled) with a timeout.
+    """
+    iterator = events.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            timeout = mask.timeout()
+            if pending is None and timeout is None:
+                try:
+                    event = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                yield event
+                continue
+
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield IDLE
+                continue
+            step, pending = pending, None
+            try:
+                event = step.result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
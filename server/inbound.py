@@ -0,0 +1,61 @@
+"""
+Dispatch of inbound Retell frames by interaction_type.
+
+FrameDispatcher peeks at interaction_type without decoding the frame:
+ping_pong is answered inline, update_only is dropped undecoded unless a
+consumer wants it (speculation), and everything else, including frames the
+peek can't classify, goes to the call's CallSupervisor, whose handler decodes
+it with decode().
+"""
+
+import json
+import re
+from typing import Any, Optional
+
+from custom_types import PingPongResponse
+from metrics import metrics
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# The first unescaped "interaction_type" key; a quote inside transcript text is
+# always escaped, so it can't match there
+_INTERACTION_TYPE = re.compile(r'(?<!\\)"interaction_type"\s*:\s*"([a-z_]+)"')
+
+
+def decode(raw: str) -> Any:
+    """Decode a frame's JSON text."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def peek_interaction_type(raw: str) -> Optional[str]:
+    """interaction_type of a raw frame, or None if it can't be read without decoding."""
+    match = _INTERACTION_TYPE.search(raw)
+    return match.group(1) if match else None
+
+
+class FrameDispatcher:
+    def __init__(self, writer: Any, wants_updates: bool = False):
+        # A socket_manager.ConnectionWriter, or anything with send(event)
+        self.writer = writer
+        self.wants_updates = wants_updates
+
+    async def dispatch(self, raw: str) -> Optional[str]:
+        """Handle a frame inline if possible.
+
+        Returns the frame's interaction_type ("unknown" if the peek failed)
+        when it still needs handling, None when it was dealt with here.
+        """
+        kind = peek_interaction_type(raw) or "unknown"
+        metrics.incr(f"voice.frames.{kind}")
+        if kind == "ping_pong":
+            self.writer.send(PingPongResponse(timestamp=decode(raw)["timestamp"]))
+            return None
+        if kind == "update_only" and not self.wants_updates:
+            metrics.incr("voice.frames.skipped")
+            return None
+        return kind
@@ -0,0 +1,200 @@
+"""
+Deterministic fast path for navigation commands.
+
+"Show me your education" or "open the hackathon map" don't need a model run:
+the agent would only call one display_* tool and say a line. route() matches
+such commands with a compiled pattern set plus fuzzy token matching (to
+tolerate speech-to-text slips like "resumay" or "hackathons map") and returns
+an IntentMatch, or None when it isn't confident and the agent should handle
+the turn.
+"""
+
+import json
+import random
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+# Frontend page for each navigation tool
+NAVIGATION_PAGES: Dict[str, str] = {
+    "display_homepage": "personal",
+    "display_landing_page": "landing",
+    "display_education_page": "education",
+    "display_resume_page": "resume",
+    "display_hackathons_page": "hackathon",
+    "display_architecture_page": "architecture",
+}
+
+# What each navigation tool returns, so local routing reports the same result
+TOOL_RESULTS: Dict[str, str] = {
+    "display_homepage": "Successfully displayed the personal homepage",
+    "display_landing_page": "Successfully displayed the landing page",
+    "display_education_page": "Successfully displayed the education page",
+    "display_resume_page": "Successfully displayed the resume page",
+    "display_hackathons_page": "Successfully displayed the hackathons page",
+    "display_architecture_page": "Successfully displayed the architecture page",
+}
+
+# Phrases that name each page, longest first within a tool
+TARGETS: Dict[str, Tuple[str, ...]] = {
+    "display_education_page": ("education", "schooling", "school", "degrees"),
+    "display_resume_page": ("resume", "cv"),
+    "display_hackathons_page": ("hackathons", "hackathon"),
+    "display_homepage": ("personal page", "homepage", "home page", "home", "about page"),
+    "display_landing_page": ("landing page", "landing", "start page"),
+    "display_architecture_page": ("how it works", "architecture", "tech stack"),
+}
+
+ACKNOWLEDGEMENTS: Dict[str, Tuple[str, ...]] = {
+    "display_education_page": (
+        "Here's my education.",
+        "Sure, pulling up my education.",
+        "Okay, here's where I studied.",
+    ),
+    "display_resume_page": (
+        "Here's my resume.",
+        "Sure, pulling up my resume.",
+        "Okay, here's the resume.",
+    ),
+    "display_hackathons_page": (
+        "Here's my hackathon map.",
+        "Sure, here are all the hackathons I've been to.",
+        "Okay, pulling up the hackathon map.",
+    ),
+    "display_homepage": (
+        "Here's my homepage.",
+        "Sure, taking you to my homepage.",
+    ),
+    "display_landing_page": (
+        "Back to the start.",
+        "Sure, here's the landing page.",
+    ),
+    "display_architecture_page": (
+        "Here's how this whole thing works.",
+        "Sure, pulling up the architecture.",
+    ),
+}
+
+CONFIDENCE_THRESHOLD = 0.75
+# Fuzzy candidates must be about as long as the target they're compared with
+MAX_LENGTH_DIFF = 2
+MAX_WORDS = 10
+# Words left after the verb that may accompany a page name
+MAX_EXTRA_WORDS = 1
+
+_LEAD_IN = r"(?:(?:ok|okay|hey|so|now|and|please|can you|could you|would you|bill)\s+)*"
+_VERB = (
+    r"(?:show(?:\s+me)?|open(?:\s+up)?|go(?:\s+back)?(?:\s+to)?|take\s+me(?:\s+back)?(?:\s+to)?|"
+    r"navigate\s+to|pull\s+up|bring\s+up|display|switch\s+to|jump\s+to|head\s+to|"
+    r"let\s+me\s+see|can\s+i\s+see|i\s+want\s+to\s+see)"
+)
+COMMAND_PATTERN = re.compile(rf"^{_LEAD_IN}{_VERB}\b\s*(?P<rest>.*)$")
+# Words that carry no information about which page was asked for
+FILLER_WORDS = frozenset(
+    "me your the a to bills bill's his my page map section please again now over there up".split()
+)
+# Anything that turns a command into a question or a compound request
+DEFER_WORDS = frozenset("and about what why who when which tell explain project projects".split())
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+# (tool, word-bounded pattern, target without spaces, target word count)
+_COMPILED_TARGETS = [
+    (tool, re.compile(rf"\b{re.escape(target)}\b"), target.replace(" ", ""), len(target.split()))
+    for tool, targets in TARGETS.items()
+    for target in targets
+]
+
+
+@dataclass
+class IntentMatch:
+    tool: str
+    arguments: str
+    page: str
+    confidence: float
+    acknowledgement: str
+    tool_result: str
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+
+
+def _similarity(a: str, b: str) -> float:
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _best_target(words: List[str]) -> Tuple[Optional[str], float, int]:
+    """Find the navigation tool the words most likely name.
+
+    Returns (tool, confidence, words_used). Exact phrase matches score 1.0;
+    otherwise single words and bigrams are compared fuzzily against each
+    target phrase.
+    """
+    phrase = " ".join(words)
+    best_tool, best_score, best_used = None, 0.0, 0
+    for tool, pattern, squashed, target_len in _COMPILED_TARGETS:
+        if pattern.search(phrase):
+            if best_score < 1.0 or target_len > best_used:
+                best_tool, best_score, best_used = tool, 1.0, target_len
+            continue
+        for size in {target_len, target_len + 1}:
+            for i in range(len(words) - size + 1):
+                candidate = "".join(words[i : i + size])
+                # STT slips rarely change the opening sound or the overall length
+                if candidate[:2] != squashed[:2]:
+                    continue
+                if abs(len(candidate) - len(squashed)) > MAX_LENGTH_DIFF:
+                    continue
+                score = _similarity(candidate, squashed)
+                if score > best_score:
+                    best_tool, best_score, best_used = tool, score, size
+    return best_tool, best_score, best_used
+
+
+def route(text: str) -> Optional[IntentMatch]:
+    """Match a navigation command, or return None to defer to the agent."""
+    normalized = _normalize(text)
+    words = normalized.split()
+    if not words or len(words) > MAX_WORDS:
+        return None
+
+    command = COMMAND_PATTERN.match(normalized)
+    if command is None:
+        return None
+
+    rest = [w for w in command.group("rest").split() if w not in FILLER_WORDS]
+    if not rest or any(w in DEFER_WORDS for w in rest):
+        return None
+
+    tool, confidence, used = _best_target(rest)
+    if tool is None or confidence < CONFIDENCE_THRESHOLD:
+        return None
+    if len(rest) - used > MAX_EXTRA_WORDS:
+        return None
+
+    return IntentMatch(
+        tool=tool,
+        arguments=json.dumps({}),
+        page=NAVIGATION_PAGES[tool],
+        confidence=round(confidence, 3),
+        acknowledgement=random.choice(ACKNOWLEDGEMENTS[tool]),
+        tool_result=TOOL_RESULTS[tool],
+    )
+
+
+def navigation_metadata(name: str, args: str) -> Optional[Dict[str, str]]:
+    """Frontend navigation metadata for a tool call, or None if it isn't navigation."""
+    if name in NAVIGATION_PAGES:
+        return {"type": "navigation", "page": NAVIGATION_PAGES[name]}
+    if name == "display_project":
+        try:
+            args_dict = json.loads(args) if args else {}
+            return {
+                "type": "navigation",
+                "page": "project",
+                "project_id": args_dict.get("id", ""),
+            }
+        except Exception:
+            return {"type": "navigation", "page": "project"}
+    return None
@@ -0,0 +1,199 @@
+"""
+Per-turn latency budget policy.
+
+LatencyPolicy picks the model, reasoning effort and tool timeouts for each
+turn from the mode's latency SLO, the message's complexity class
+(classify_complexity()) and an EWMA of recent time to first output per mode
+and model. When recent TTFT eats into the SLO it steps down, and while on the
+fast model it still probes the primary now and then. With
+LLM_LATENCY_POLICY=0 (the default) decide() returns the fixed settings.
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from metrics import metrics
+
+DEFAULT_MODEL = "gpt-5.4-mini"
+
+SIMPLE, STANDARD, COMPLEX = "simple", "standard", "complex"
+
+EFFORT_LEVELS = ("none", "low", "medium")
+
+# (reasoning effort, tool timeout seconds) per complexity
+TIERS: Dict[str, Dict[str, Tuple[str, float]]] = {
+    "voice": {
+        SIMPLE: ("none", 3.0),
+        STANDARD: ("none", 4.0),
+        COMPLEX: ("none", 5.0),
+    },
+    "text": {
+        SIMPLE: ("low", 5.0),
+        STANDARD: ("low", 6.0),
+        COMPLEX: ("medium", 8.0),
+    },
+}
+
+DEFAULT_SLO_MS = {"voice": 900.0, "text": 2500.0}
+
+# Share of the SLO recent TTFT may use before the policy steps down
+PRESSURE_RATIO = 0.8
+# ...and beyond which it also switches to the fast model
+OVERLOAD_RATIO = 1.2
+EWMA_ALPHA = 0.2
+# How often a primary model nobody is using gets a probe turn; a sample
+# arriving after a gap this long replaces the average instead of blending in
+PROBE_INTERVAL_S = 20.0
+MIN_TOOL_TIMEOUT = 2.0
+
+_COMPLEX_PATTERN = re.compile(
+    r"\b(compare|comparison|difference|differences|versus|vs|trade-?offs?|"
+    r"architecture|design|explain|how does|how did|why did|why do|walk me through|"
+    r"in detail|deep dive|pros and cons|list all|all of your|every)\b"
+)
+_SIMPLE_PATTERN = re.compile(
+    r"^(hi|hello|hey|thanks|thank you|ok|okay|cool|nice|great|yes|no|yeah|nope|sure|bye|goodbye)\b"
+)
+
+
+def classify_complexity(text: str) -> str:
+    """Bucket a user message into simple / standard / complex."""
+    normalized = " ".join(text.lower().split())
+    words = len(normalized.split())
+    if words == 0:
+        return SIMPLE
+    if _COMPLEX_PATTERN.search(normalized) or words > 30 or normalized.count("?") > 1:
+        return COMPLEX
+    if words <= 4 or (_SIMPLE_PATTERN.match(normalized) and words <= 8):
+        return SIMPLE
+    return STANDARD
+
+
+class TtftTracker:
+    """Exponentially weighted recent TTFT per (mode, model), shared by all clients."""
+
+    def __init__(
+        self,
+        alpha: float = EWMA_ALPHA,
+        probe_interval_s: float = PROBE_INTERVAL_S,
+        clock=time.monotonic,
+    ):
+        self.alpha = alpha
+        self.probe_interval_s = probe_interval_s
+        self.clock = clock
+        self.ewma: Dict[Tuple[str, str], float] = {}
+        self._observed_at: Dict[Tuple[str, str], float] = {}
+        self._probed_at: Dict[Tuple[str, str], float] = {}
+
+    def observe(self, mode: str, model: str, ttft_ms: float):
+        key = (mode, model)
+        now = self.clock()
+        previous = self.ewma.get(key)
+        if previous is None or now - self._observed_at[key] > self.probe_interval_s:
+            # Nothing recent to blend with: an old estimate says little about now
+            self.ewma[key] = ttft_ms
+        else:
+            self.ewma[key] = previous + self.alpha * (ttft_ms - previous)
+        self._observed_at[key] = now
+
+    def get(self, mode: str, model: str) -> Optional[float]:
+        return self.ewma.get((mode, model))
+
+    def claim_probe(self, mode: str, model: str) -> bool:
+        """True at most once per probe interval for a model with no recent samples."""
+        key = (mode, model)
+        observed = self._observed_at.get(key)
+        if observed is None:
+            return False
+        now = self.clock()
+        if now - max(observed, self._probed_at.get(key, observed)) < self.probe_interval_s:
+            return False
+        self._probed_at[key] = now
+        return True
+
+    def reset(self):
+        self.ewma.clear()
+        self._observed_at.clear()
+        self._probed_at.clear()
+
+
+ttft_tracker = TtftTracker()
+
+
+@dataclass
+class PolicyDecision:
+    model: str
+    reasoning_effort: str
+    tool_timeout: Optional[float]
+    complexity: str
+    reason: str
+
+    def describe(self) -> str:
+        return (
+            f"model={self.model} effort={self.reasoning_effort} "
+            f"tool_timeout={self.tool_timeout} "
+            f"complexity={self.complexity} reason={self.reason}"
+        )
+
+
+def _step_down(effort: str) -> str:
+    index = EFFORT_LEVELS.index(effort)
+    return EFFORT_LEVELS[max(0, index - 1)]
+
+
+class LatencyPolicy:
+    def __init__(
+        self,
+        mode: str = "voice",
+        enabled: Optional[bool] = None,
+        slo_ms: Optional[float] = None,
+        model: Optional[str] = None,
+        fast_model: Optional[str] = None,
+        tracker: TtftTracker = ttft_tracker,
+    ):
+        self.mode = mode if mode in TIERS else "text"
+        if enabled is None:
+            enabled = os.getenv("LLM_LATENCY_POLICY", "0") == "1"
+        self.enabled = enabled
+        if slo_ms is None:
+            env = "LLM_VOICE_SLO_MS" if self.mode == "voice" else "LLM_TEXT_SLO_MS"
+            slo_ms = float(os.getenv(env, str(DEFAULT_SLO_MS[self.mode])))
+        self.slo_ms = slo_ms
+        self.model = model or os.getenv("LLM_MODEL", DEFAULT_MODEL)
+        self.fast_model = fast_model or os.getenv("LLM_FAST_MODEL") or self.model
+        self.tracker = tracker
+
+    def static(self) -> PolicyDecision:
+        """The fixed per-mode settings used when the policy is disabled."""
+        effort = "none" if self.mode == "voice" else "low"
+        return PolicyDecision(self.model, effort, None, STANDARD, "static")
+
+    def decide(self, text: str) -> PolicyDecision:
+        if not self.enabled:
+            return self.static()
+
+        complexity = classify_complexity(text)
+        effort, tool_timeout = TIERS[self.mode][complexity]
+        model = self.model
+        reason = "within_budget"
+
+        ttft = self.tracker.get(self.mode, self.model)
+        if ttft is not None and ttft > self.slo_ms * PRESSURE_RATIO:
+            effort = _step_down(effort)
+            reason = "ttft_pressure"
+            if ttft > self.slo_ms * OVERLOAD_RATIO and self.fast_model != self.model:
+                if self.tracker.claim_probe(self.mode, self.model):
+                    # The primary gets no samples while we avoid it; check on it
+                    reason = "probe"
+                else:
+                    model = self.fast_model
+                    reason = "ttft_overload"
+            # Leave room in the budget for the answer after the tool returns
+            tool_timeout = max(MIN_TOOL_TIMEOUT, tool_timeout - ttft / 1000)
+
+        metrics.incr(f"policy.{self.mode}.{complexity}")
+        metrics.incr(f"policy.{self.mode}.{reason}")
+        return PolicyDecision(model, effort, tool_timeout, complexity, reason)
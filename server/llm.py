@@ -1,8 +1,14 @@
+import asyncio
 import os
 import json
+import time
 import traceback
-import re
-from typing import Any, List
+import uuid
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from pydantic import BaseModel
 
@@ -19,6 +25,7 @@ from agents import (
     ModelSettings,
     trace,
 )
+from agents.usage import Usage
 from openai.types.shared import Reasoning
 
 
@@ -33,43 +40,28 @@ from custom_types import (
     TextChatMessage,
 )
 
-from prompts import begin_sentence, voice_system_prompt, text_system_prompt
-from project_search import search_projects as search_projects_impl, get_project_by_id
-
-
-def clean_markdown(text: str) -> str:
-    """Remove common markdown formatting from text for voice output.
-    This version is designed to work with streaming text where we might
-    not have complete markdown patterns."""
-    if not text:
-        return text
-
-    # For streaming, we need to be more conservative
-    # Only remove patterns we're absolutely sure are complete
-
-    # Remove asterisks and underscores only if they appear in pairs
-    # and contain text between them (complete bold/italic patterns)
-    text = re.sub(r"\*\*([^*]+)\*\*", r"\1", text)  # Bold
-    text = re.sub(r"\*([^*]+)\*", r"\1", text)  # Italic
-    text = re.sub(r"__([^_]+)__", r"\1", text)  # Bold
-    text = re.sub(r"_([^_]+)_", r"\1", text)  # Italic
-
-    # Remove backticks only if we have a complete inline code pattern
-    text = re.sub(r"`([^`]+)`", r"\1", text)
-
-    # Remove complete links
-    text = re.sub(r"\[([^\]]+)\]\([^)]+\)", r"\1", text)
-
-    # Remove headers at the start of lines
-    text = re.sub(r"^#{1,6}\s+", "", text, flags=re.MULTILINE)
-
-    # Remove list markers at the start of lines
-    text = re.sub(r"^[\*\-\+]\s+", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^\d+\.\s+", "", text, flags=re.MULTILINE)
-
-    # Don't modify whitespace aggressively since we're streaming
-
-    return text
+from prompts import (
+    begin_sentence,
+    text_system_prompt,
+    text_turn_note,
+    voice_system_prompt,
+    voice_turn_note,
+)
+from project_search import (
+    search_projects as search_projects_impl,
+    get_project_by_id,
+    get_projects_by_ids,
+)
+from transcript_state import TranscriptState, utterance_to_message
+from intent_router import IntentMatch, navigation_metadata, route as route_intent
+from metrics import metrics
+from admission import BUSY_TEXT_MESSAGE, BUSY_VOICE_LINE, AdmissionRejected
+from markdown_stream import MarkdownSanitizer, clean_markdown
+from filler import IDLE, SLOW_TOOLS, ToolLatencyMask, with_idle
+from latency_policy import LatencyPolicy, PolicyDecision, ttft_tracker
+from watchdog import TtftWatchdog
+from quick_replies import QuickReplies
+from prompt_sections import PromptSections
 
 
 # Define the output model for the guardrail check
@@ -111,6 +103,15 @@ guardrail_agent = Agent(
 )
 
 
+# Messages the TTFT watchdog's trimmed-prompt fallback keeps
+FALLBACK_HISTORY = 6
+
+# LLM guardrail verdicts keyed by the checked text. Lets a speculative precheck
+# (run while the user is still talking) answer the real turn instantly.
+GUARDRAIL_CACHE_SIZE = 256
+_guardrail_verdicts: "OrderedDict[str, GuardrailFunctionOutput]" = OrderedDict()
+
+
 @input_guardrail
 async def security_guardrail(
     ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]
@@ -128,6 +129,33 @@ async def security_guardrail(
                 content = item.get("content", "")
                 break
 
+    return await check_guardrail(content, input, context=ctx.context)
+
+
+def record_usage(label: str, result: Any, call_id: Optional[str] = None) -> Optional[Usage]:
+    """Log and record a finished run's token usage, split into cached and uncached input."""
+    usage = getattr(getattr(result, "context_wrapper", None), "usage", None)
+    if not isinstance(usage, Usage):
+        return None
+    cached = usage.input_tokens_details.cached_tokens
+    uncached = usage.input_tokens - cached
+    metrics.observe(f"llm.usage.{label}.input_tokens", usage.input_tokens)
+    metrics.observe(f"llm.usage.{label}.cached_tokens", cached)
+    metrics.observe(f"llm.usage.{label}.uncached_tokens", uncached)
+    if usage.input_tokens:
+        metrics.observe(f"llm.usage.{label}.cached_ratio", cached / usage.input_tokens)
+    print(
+        f"usage {label} call_id={call_id or '-'} input={usage.input_tokens} "
+        f"cached={cached} uncached={uncached} output={usage.output_tokens}",
+        flush=True,
+    )
+    return usage
+
+
+async def check_guardrail(
+    content: str, input: str | list[TResponseInputItem], context: Any = None
+) -> GuardrailFunctionOutput:
+    """Classify `content`, using the keyword fast paths before the guardrail agent."""
     # Quick checks for obviously allowed content
     bill_keywords = [
         "bill",
@@ -176,16 +204,27 @@ async def security_guardrail(
             tripwire_triggered=False,
         )
 
+    cached = _guardrail_verdicts.get(content)
+    if cached is not None:
+        _guardrail_verdicts.move_to_end(content)
+        return cached
+
     # Run the guardrail agent for more complex checks
-    result = await Runner.run(guardrail_agent, input, context=ctx.context)
+    result = await Runner.run(guardrail_agent, input, context=context)
+    record_usage("guardrail", result)
 
     # Get the structured output
     output = result.final_output_as(JailbreakCheckOutput)
 
-    return GuardrailFunctionOutput(
+    verdict = GuardrailFunctionOutput(
         output_info=output,
         tripwire_triggered=output.is_jailbreak,  # Trigger if it IS a jailbreak attempt
     )
+    if content:
+        _guardrail_verdicts[content] = verdict
+        if len(_guardrail_verdicts) > GUARDRAIL_CACHE_SIZE:
+            _guardrail_verdicts.popitem(last=False)
+    return verdict
 
 
 @tool
@@ -260,21 +299,53 @@ async def get_project_details(project_id: str, message: str) -> str:
         if not project:
             return f"Could not find project with ID: {project_id}"
 
-        clean_name = clean_markdown(project["name"])
-        clean_summary = clean_markdown(project["summary"])
-        clean_details = clean_markdown(project["details"])
+        return _format_project_details(project)
 
-        response = f"Project ID: {project['id']}\n"
-        response += f"Project: {clean_name}\n\n"
-        response += f"Summary: {clean_summary}\n\n"
-        response += f"Details: {clean_details}"
+    except Exception as e:
+        return f"Error fetching project details: {str(e)}"
 
-        return response.strip()
+
+@tool
+async def get_projects_details(project_ids: List[str], message: str) -> str:
+    """
+    Get full details about several projects at once, e.g. to compare them.
+    Resolves all IDs in a single lookup, so prefer this over repeated get_project_details calls.
+
+    Args:
+        project_ids: Exact project IDs (e.g. ["dispatch-ai", "teachme-3p7bw1"])
+        message: Optional status text for non-voice UI while fetching details.
+
+    Returns:
+        Full details for each project in the order requested, separated by blank lines.
+        Unknown IDs are reported as not found.
+    """
+    try:
+        projects = await get_projects_by_ids(project_ids)
+
+        sections = []
+        for project_id in dict.fromkeys(project_ids):
+            project = projects.get(project_id)
+            if project:
+                sections.append(_format_project_details(project))
+            else:
+                sections.append(f"Could not find project with ID: {project_id}")
+
+        return "\n\n---\n\n".join(sections) if sections else "No project IDs given."
 
     except Exception as e:
         return f"Error fetching project details: {str(e)}"
 
 
+def _format_project_details(project: dict) -> str:
+    # Fields arrive as plain text, sanitized at ingestion (pinecone/load_data.py)
+    response = f"Project ID: {project['id']}\n"
+    response += f"Project: {project['name']}\n\n"
+    response += f"Summary: {project['summary']}\n\n"
+    response += f"Details: {project['details']}"
+
+    return response.strip()
+
+
 @tool
 async def search_projects(query: str, message: str, num_results: int = 3) -> str:
     """
@@ -301,13 +372,10 @@ async def search_projects(query: str, message: str, num_results: int = 3) -> str
         response = f"Found {len(results)} relevant projects:\n\n"
 
         for i, project in enumerate(results, 1):
-            # Clean markdown from the project info
-            clean_name = clean_markdown(project["name"])
-            clean_summary = clean_markdown(project["summary"])
-
+            # Short plain-text summary; the full one comes from get_project_details
             response += f"{i}. Project ID: {project['id']}\n"
-            response += f"   Name: {clean_name}\n"
-            response += f"   Summary: {clean_summary}\n"
+            response += f"   Name: {project['name']}\n"
+            response += f"   Summary: {project['voice_summary']}\n"
             response += "\n"
 
         return response.strip()
@@ -316,39 +384,109 @@ async def search_projects(query: str, message: str, num_results: int = 3) -> str
         return f"Error searching projects: {str(e)}"
 
 
+def _output_call_id(raw_item: Any) -> str:
+    """call_id of a tool output item; function outputs are plain dicts."""
+    if isinstance(raw_item, dict):
+        return raw_item.get("call_id", "")
+    return getattr(raw_item, "call_id", "")
+
+
+def _is_model_output(data: Any) -> bool:
+    """The model has started producing something: a new output item or any delta."""
+    event_type = getattr(data, "type", "")
+    return event_type == "response.output_item.added" or event_type.endswith(".delta")
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+@dataclass
+class ResponseChain:
+    """Conversation state already stored server-side by the Responses API."""
+
+    response_id: str
+    # Number of history messages the stored response already includes
+    covered: int
+    # The last input message we sent, used to detect rewritten history
+    anchor: dict
+    # Text the model streamed back; must match what the history says it said
+    reply: str
+
+
 class LlmClient:
-    def __init__(self, call_id: str, mode: str = "voice", debug=None):
+    def __init__(
+        self,
+        call_id: str,
+        mode: str = "voice",
+        debug=None,
+        chain_responses: Optional[bool] = None,
+        admission=None,
+    ):
         self.call_id = call_id
         self.mode = mode
+        # AdmissionScheduler a model run waits on (class = mode); None runs ungated
+        self.admission = admission
 
         # Select appropriate prompt and reasoning based on mode.
         # Voice mode disables reasoning ("none") for minimum latency on GPT-5.x.
         # Text mode uses "low" reasoning for slightly better answer quality.
+        # With LLM_LATENCY_POLICY=1 these become per-turn decisions instead.
         system_prompt = voice_system_prompt if mode == "voice" else text_system_prompt
-        reasoning_effort = "none" if mode == "voice" else "low"
+        self.latency_policy = LatencyPolicy(mode)
+        defaults = self.latency_policy.static()
+        # With LLM_PROMPT_SECTIONS=1 each turn gets the core plus relevant topic sections
+        self.prompt_sections = PromptSections(mode)
 
         # Create the main agent with input guardrails
         self.agent = Agent(
             name="portfolio_agent",
             instructions=system_prompt,
-            model="gpt-5.4-mini",
+            model=defaults.model,
             tools=self.prepare_functions(),
             input_guardrails=[security_guardrail],
             model_settings=ModelSettings(
                 verbosity="low",
+                # The runner executes tool calls from one model step concurrently
+                parallel_tool_calls=True,
                 reasoning=Reasoning(
-                    effort=reasoning_effort,
+                    effort=defaults.reasoning_effort,
                     summary="auto",
                 ),
+                # One cache key per mode and prompt, instead of the SDK's per-run key,
+                # so consecutive turns and calls share the cached prefix
+                extra_args={"prompt_cache_key": self.prompt_sections.cache_key},
             ),
         )
 
+        # Utterances already seen on this call, so each turn only converts the new tail
+        self.transcript = TranscriptState()
+
         # Control verbose streaming logs via env or constructor
         if debug is None:
             self.debug = os.getenv("LLM_DEBUG", "0") == "1"
         else:
             self.debug = bool(debug)
 
+        # Optionally chain turns with previous_response_id and send only new input
+        if chain_responses is None:
+            self.chain_responses = os.getenv("LLM_CHAIN_RESPONSES", "0") == "1"
+        else:
+            self.chain_responses = bool(chain_responses)
+        self._chain: Optional[ResponseChain] = None
+
+        # Answer plain navigation commands locally instead of running the agent
+        self.intent_routing = os.getenv("LLM_INTENT_ROUTER", "1") == "1"
+
+        # Answer reminders and a bare opening greeting from templates
+        self.quick_replies = QuickReplies(self.mode)
+        # Frontend page last navigated to, for template context
+        self.page: Optional[str] = None
+
+        # Race a fallback run when the first token is late (voice only, 0 = off)
+        self.ttft_deadline_ms = float(os.getenv("LLM_TTFT_DEADLINE_MS", "0"))
+        self.fallback_model = os.getenv("LLM_FALLBACK_MODEL")
+
     def _log(self, *args, **kwargs):
         if self.debug:
             print(*args, **kwargs, flush=True)
@@ -363,37 +501,23 @@ class LlmClient:
         return response
 
     def convert_transcript_to_openai_messages(self, transcript: List[Utterance]):
-        messages = []
-        for utterance in transcript:
-            if utterance.role == "agent":
-                messages.append({"role": "assistant", "content": utterance.content})
-            else:
-                messages.append({"role": "user", "content": utterance.content})
-        return messages
+        return [utterance_to_message(utterance) for utterance in transcript]
 
     def prepare_prompt(self, request: ResponseRequiredRequest):
         # Note: System prompt is in self.agent.instructions, not here
-        # This method prepares the conversation messages from the transcript
-        transcript_messages = self.convert_transcript_to_openai_messages(
-            request.transcript
-        )
-        prompt = list(transcript_messages)
-
-        last_user_message = ""
-        last_user_message_index = -1
-        for i, message in enumerate(reversed(transcript_messages)):
-            if message.get("role") == "user":
-                last_user_message = message.get("content", "")
-                last_user_message_index = len(transcript_messages) - i - 1
-                break
+        # This method prepares the conversation messages from the transcript.
+        # The per-call TranscriptState only converts utterances it hasn't seen yet.
+        transcript_messages = self.transcript.sync(request.transcript).messages
+        return self._finish_voice_prompt(list(transcript_messages), request)
 
-        if last_user_message:
-            last_user_message = (
-                f"User question:{last_user_message}\n\n"
-                "Always respond in plain conversational text. No special symbols or markdown."
-                "This is a VOICE conversation - every character you type will be spoken aloud."
-            )
-            prompt[last_user_message_index]["content"] = last_user_message
+    def _finish_voice_prompt(self, prompt: List[dict], request: ResponseRequiredRequest):
+        """Append the voice turn note and, for reminders, the reminder cue.
+
+        History messages are left exactly as converted, so the request up to
+        the newest utterance matches the previous turn's byte for byte.
+        """
+        if any(m.get("role") == "user" for m in prompt):
+            prompt.append({"role": "developer", "content": voice_turn_note})
 
         if request.interaction_type == "reminder_required":
             prompt.append(
@@ -404,6 +528,96 @@ class LlmClient:
             )
         return prompt
 
+    async def precheck_guardrail(self, request: ResponseRequiredRequest) -> bool:
+        """Run the input guardrail ahead of the turn, warming its verdict cache.
+
+        Returns True if the request would be blocked.
+        """
+        prompt = self.prepare_prompt(request)
+        content = next(
+            (m["content"] for m in reversed(prompt) if m.get("role") == "user"), ""
+        )
+        verdict = await check_guardrail(content, prompt)
+        return verdict.tripwire_triggered
+
+    def _chained_input(self, history: List[dict]) -> Optional[List[dict]]:
+        """Return only the messages the stored response hasn't seen yet.
+
+        Returns None when a full resend is needed: chaining is off, nothing has
+        been stored yet, or the history no longer agrees with what the model
+        saw and said (e.g. Retell truncated an interrupted agent turn).
+        """
+        chain = self._chain
+        if not self.chain_responses or chain is None:
+            return None
+        if chain.covered > len(history) or history[chain.covered - 1] != chain.anchor:
+            return None
+
+        end = chain.covered
+        reply_parts = []
+        while end < len(history) and history[end].get("role") == "assistant":
+            reply_parts.append(history[end].get("content", ""))
+            end += 1
+        if _normalize_text(" ".join(reply_parts)) != _normalize_text(chain.reply):
+            return None
+        if end == len(history):
+            return None
+        return history[end:]
+
+    def _advance_chain(self, result, covered: int, anchor: Optional[dict], reply: str):
+        """Remember the finished run so the next turn can chain onto it."""
+        response_id = getattr(result, "last_response_id", None)
+        if not self.chain_responses or not isinstance(response_id, str) or not anchor:
+            self._chain = None
+            return
+        self._chain = ResponseChain(
+            response_id=response_id,
+            covered=covered,
+            anchor=anchor,
+            reply=reply,
+        )
+
+    def _abandon_run(self, result, reply_parts: List[str]):
+        """Stop an in-flight run whose output nobody is waiting for any more.
+
+        Cancelling the run task also tears down its model HTTP stream and any
+        tool calls still executing.
+        """
+        if result is not None:
+            result.cancel()
+        # Rough estimate: typical turn length minus what was already streamed (~4 chars/token)
+        streamed_tokens = sum(len(part) for part in reply_parts) // 4
+        typical_tokens = metrics.summary("llm.output_tokens")["p50"]
+        metrics.incr("llm.cancelled_runs")
+        metrics.incr("llm.tokens_avoided", max(0, int(typical_tokens) - streamed_tokens))
+        self._log(f"cancelled in-flight run for call_id={self.call_id}")
+
+    def _record_turn(
+        self, chained: bool, started: float, first_output_at, result, model: Optional[str] = None
+    ):
+        """Record TTFT and input tokens per turn, split by chained vs full resend
+        and by prompt layout (monolithic vs sectioned).
+
+        TTFT runs to the model's first output event (see _is_model_output), so
+        tool execution and later model steps don't count towards it.
+        """
+        kind = "chained" if chained else "full"
+        layout = self.prompt_sections.layout
+        metrics.incr(f"llm.turns.{kind}")
+        if first_output_at is not None:
+            ttft_ms = (first_output_at - started) * 1000
+            metrics.observe(f"llm.ttft_ms.{kind}", ttft_ms)
+            metrics.observe(f"llm.prompt.{layout}.ttft_ms", ttft_ms)
+            ttft_tracker.observe(self.latency_policy.mode, model or self.agent.model, ttft_ms)
+        usage = record_usage(f"agent.{self.mode}", result, self.call_id)
+        if usage is not None:
+            metrics.observe(f"llm.input_tokens.{kind}", usage.input_tokens)
+            metrics.observe("llm.output_tokens", usage.output_tokens)
+            metrics.observe(f"llm.prompt.{layout}.input_tokens", usage.input_tokens)
+            if usage.input_tokens:
+                cached = usage.input_tokens_details.cached_tokens
+                metrics.observe(f"llm.prompt.{layout}.cached_ratio", cached / usage.input_tokens)
+
     def prepare_functions(self) -> List[Any]:
         """Return tool functions available to the agent."""
         return [
@@ -416,6 +630,7 @@ class LlmClient:
             display_project,
             search_projects,
             get_project_details,
+            get_projects_details,
         ]
 
     @staticmethod
@@ -423,7 +638,7 @@ class LlmClient:
         """Map a tool call to a user-facing status label for the text chat UI."""
         if name == "search_projects":
             return "Searching projects..."
-        if name == "get_project_details":
+        if name in ("get_project_details", "get_projects_details"):
             try:
                 args_dict = json.loads(args) if args else {}
                 msg = args_dict.get("message", "")
@@ -438,12 +653,206 @@ class LlmClient:
             return None
         return None
 
-    async def draft_response(self, request: ResponseRequiredRequest):
-        messages = self.prepare_prompt(request)
+    @staticmethod
+    def _last_user_content(messages: List[Any]) -> Optional[str]:
+        """Content of the final message if it's from the user (Utterances or dicts)."""
+        if not messages:
+            return None
+        last = messages[-1]
+        role = last.role if isinstance(last, Utterance) else last.get("role")
+        if role != "user":
+            return None
+        return last.content if isinstance(last, Utterance) else last.get("content", "")
+
+    def _route_intent(self, messages: List[Any]) -> Optional[IntentMatch]:
+        """Match the latest user message against the local navigation router."""
+        if not self.intent_routing:
+            return None
+        content = self._last_user_content(messages)
+        if content is None:
+            return None
+        match = route_intent(content)
+        if match is None:
+            metrics.incr("router.deferred")
+            return None
+        metrics.incr("router.hits")
+        self._log(f"intent router: {match.tool} confidence={match.confidence}")
+        return match
+
+    @staticmethod
+    def _user_contents(messages: List[Any]) -> List[str]:
+        """Contents of every user message (Utterances or dicts), in order."""
+        contents: List[str] = []
+        for message in messages:
+            if isinstance(message, Utterance):
+                role, content = message.role, message.content
+            else:
+                role, content = message.get("role"), message.get("content", "")
+            if role == "user":
+                contents.append(content)
+        return contents
+
+    def _plan_turn(self, messages: List[Any]) -> Tuple[Agent, PolicyDecision]:
+        """Pick this turn's prompt sections and latency settings; returns the agent to run."""
+        decision = self.latency_policy.decide(self._last_user_content(messages) or "")
+        overrides: Dict[str, Any] = {}
+
+        instructions = self.prompt_sections.instructions(self._user_contents(messages), self.page)
+        metrics.observe(f"llm.prompt.{self.prompt_sections.layout}.instructions_chars", len(instructions))
+        if self.prompt_sections.enabled:
+            self._log(f"prompt sections: topics={self.prompt_sections.topics} chars={len(instructions)}")
+            overrides["instructions"] = instructions
+
+        if self.latency_policy.enabled:
+            print(f"latency policy call_id={self.call_id} {decision.describe()}", flush=True)
+            overrides["model"] = decision.model
+            overrides["model_settings"] = self.agent.model_settings.resolve(
+                ModelSettings(reasoning=Reasoning(effort=decision.reasoning_effort, summary="auto"))
+            )
+            overrides["tools"] = [
+                replace(t, timeout_seconds=decision.tool_timeout) if t.name in SLOW_TOOLS else t
+                for t in self.agent.tools
+            ]
+
+        if not overrides:
+            return self.agent, decision
+        return self.agent.clone(**overrides), decision
+
+    def _launch_fallback(self, agent: Agent, history: List[dict], request: ResponseRequiredRequest):
+        """Start the watchdog's fallback run: another model, or a trimmed prompt."""
+        if self.fallback_model:
+            agent = agent.clone(model=self.fallback_model)
+            messages = self._finish_voice_prompt(list(history), request)
+        else:
+            messages = self._finish_voice_prompt(list(history[-FALLBACK_HISTORY:]), request)
+        self._log(f"TTFT deadline missed, launching fallback with {len(messages)} messages")
+        return Runner.run_streamed(agent, messages or [{"role": "user", "content": "Hello"}])
+
+    def _quick_reply(self, messages: List[Any], reminder: bool = False) -> Optional[str]:
+        """A templated reply for this turn, or None if the agent should run."""
+        turns = [
+            (m.role, m.content) if isinstance(m, Utterance) else (m.get("role"), m.get("content", ""))
+            for m in messages
+        ]
+        kind = self.quick_replies.classify(turns, reminder)
+        if kind is None:
+            return None
+        reply = self.quick_replies.render(kind, self.page)
+        if reply is not None:
+            self._log(f"quick reply: {kind} page={self.page}")
+        return reply
+
+    def _navigated(self, navigation: Optional[dict]) -> Optional[dict]:
+        """Note the page a navigation event leads to; returns it unchanged."""
+        if navigation is not None:
+            self.page = navigation.get("page")
+        return navigation
+
+    def _drop_chain(self):
+        self._chain = None
+
+    @staticmethod
+    def _effect(effects, update: Callable, *args):
+        """Apply an update to the call's state now, or hand it to a speculative
+        draft's effects (see speculation.DeferredEffects) to apply once claimed."""
+        if effects is None:
+            return update(*args)
+        effects.add(partial(update, *args))
+
+    async def _admit(self) -> bool:
+        """Wait for an admission slot for a model run; False if none opened up in time."""
+        if self.admission is None:
+            return True
+        try:
+            await self.admission.acquire(self.mode)
+        except AdmissionRejected as e:
+            print(f"{self.mode.capitalize()} turn rejected: {e}", flush=True)
+            return False
+        return True
+
+    def _release(self, admitted: bool):
+        """Give back the slot _admit() took (not one the caller holds)."""
+        if not admitted and self.admission is not None:
+            self.admission.release(self.mode)
+
+    async def draft_response(self, request: ResponseRequiredRequest, effects=None, admitted: bool = False):
+        """Stream the events of one voice turn.
+
+        Quick replies and routed intents are answered without an admission
+        slot; a model run waits for one unless the caller already holds it
+        (`admitted`, a speculative draft). A speculative draft also passes
+        `effects`: the page, response chain and turn metrics are then only
+        updated if the draft is used.
+        """
+        history = self.transcript.sync(request.transcript).messages
+
+        reply = self._quick_reply(
+            request.transcript, reminder=request.interaction_type == "reminder_required"
+        )
+        if reply is not None:
+            yield ResponseResponse(
+                response_id=request.response_id,
+                content=reply,
+                content_complete=True,
+                end_call=False,
+            )
+            return
+
+        match = None
+        if request.interaction_type == "response_required":
+            match = self._route_intent(request.transcript)
+        if match is not None:
+            tool_call_id = f"local-{uuid.uuid4().hex[:12]}"
+            yield ToolCallInvocationResponse(
+                tool_call_id=tool_call_id, name=match.tool, arguments=match.arguments
+            )
+            navigation = navigation_metadata(match.tool, match.arguments)
+            self._effect(effects, self._navigated, navigation)
+            yield MetadataResponse(metadata=navigation)
+            yield ToolCallResultResponse(tool_call_id=tool_call_id, content=match.tool_result)
+            yield ResponseResponse(
+                response_id=request.response_id,
+                content=match.acknowledgement,
+                content_complete=True,
+                end_call=False,
+            )
+            return
+
+        if not admitted and not await self._admit():
+            yield ResponseResponse(
+                response_id=request.response_id,
+                content=BUSY_VOICE_LINE,
+                content_complete=True,
+                end_call=False,
+            )
+            return
+        run = self._voice_run(request, history, effects)
+        try:
+            # Closing this stream closes the run, which cancels the agent
+            async with aclosing(run):
+                async for event in run:
+                    yield event
+        finally:
+            self._release(admitted)
+
+    async def _voice_run(self, request: ResponseRequiredRequest, history: List[dict], effects):
+        chained_input = self._chained_input(history)
+        previous_response_id = None
+        if chained_input is not None:
+            messages = self._finish_voice_prompt(list(chained_input), request)
+            previous_response_id = self._chain.response_id
+        else:
+            if self._chain is not None:
+                metrics.incr("llm.chain_fallbacks")
+            messages = self._finish_voice_prompt(list(history), request)
+        # Captured now: later update_only frames keep mutating the transcript state
+        covered, anchor = len(history), (history[-1] if history else None)
+        fallback_history = list(history)
         response_id = request.response_id
 
+        agent, decision = self._plan_turn(request.transcript)
         self._log(
-            f"draft_response: call_id={self.call_id} model=gpt-5.4-mini messages={len(messages)} last_user='{(request.transcript[-1].content if request.transcript else '')[:120]}'",
+            f"draft_response: call_id={self.call_id} model={decision.model} messages={len(messages)} chained={previous_response_id is not None} last_user='{(request.transcript[-1].content if request.transcript else '')[:120]}'",
             flush=True,
         )
 
@@ -451,6 +860,14 @@ class LlmClient:
         if not messages:
             messages = [{"role": "user", "content": "Hello"}]
 
+        reply_parts = []
+        sanitizer = MarkdownSanitizer()
+        latency_mask = ToolLatencyMask()
+        started = time.perf_counter()
+        first_output_at = None
+        result = None
+        watchdog: Optional[TtftWatchdog] = None
+
         try:
             # Create an explicit trace for this response so analytics can be grouped by call/session.
             with trace(
@@ -460,22 +877,49 @@ class LlmClient:
             ):
                 # Runner.run_streamed returns a RunResultStreaming object synchronously
                 # The guardrails will be checked automatically before the agent runs
-                result = Runner.run_streamed(self.agent, messages)
-
-                async for event in result.stream_events():
-                    if isinstance(event, RawResponsesStreamEvent):
+                result = Runner.run_streamed(
+                    agent, messages, previous_response_id=previous_response_id
+                )
+                stream = result.stream_events()
+                if self.ttft_deadline_ms > 0:
+                    watchdog = TtftWatchdog(
+                        result,
+                        lambda: self._launch_fallback(agent, fallback_history, request),
+                        self.ttft_deadline_ms,
+                    )
+                    stream = watchdog.events()
+
+                async for event in with_idle(stream, latency_mask):
+                    if event is IDLE:
+                        # A slow tool is still running: fill the silence
+                        line = latency_mask.due()
+                        if line:
+                            reply_parts.append(line)
+                            yield ResponseResponse(
+                                response_id=response_id,
+                                content=line,
+                                content_complete=False,
+                                end_call=False,
+                            )
+                    elif isinstance(event, RawResponsesStreamEvent):
                         data = event.data
+                        if first_output_at is None and _is_model_output(data):
+                            first_output_at = time.perf_counter()
                         if getattr(data, "type", "") == "response.output_text.delta":
-                            # For streaming, pass through the delta as-is
-                            # The AI has been instructed not to use markdown in the prompts
+                            # The prompt asks for plain speech, but strip any markdown
+                            # that slips through before it reaches TTS
                             delta_content = getattr(data, "delta", "")
                             if delta_content:
-                                yield ResponseResponse(
-                                    response_id=response_id,
-                                    content=delta_content,
-                                    content_complete=False,
-                                    end_call=False,
-                                )
+                                spoken = sanitizer.feed(delta_content)
+                                if spoken:
+                                    latency_mask.spoke()
+                                    reply_parts.append(spoken)
+                                    yield ResponseResponse(
+                                        response_id=response_id,
+                                        content=spoken,
+                                        content_complete=False,
+                                        end_call=False,
+                                    )
 
                     elif isinstance(event, RunItemStreamEvent):
                         if event.name == "tool_called":
@@ -486,66 +930,40 @@ class LlmClient:
                             name = getattr(tool_call, "name", "")
                             args = getattr(tool_call, "arguments", "") or ""
 
+                            latency_mask.invoked(call_id, name)
                             yield ToolCallInvocationResponse(
                                 tool_call_id=call_id,
                                 name=name,
                                 arguments=args,
                             )
 
-                            if name == "display_homepage":
-                                yield MetadataResponse(
-                                    metadata={"type": "navigation", "page": "personal"}
-                                )
-                            elif name == "display_landing_page":
-                                yield MetadataResponse(
-                                    metadata={"type": "navigation", "page": "landing"}
-                                )
-                            elif name == "display_education_page":
-                                yield MetadataResponse(
-                                    metadata={"type": "navigation", "page": "education"}
-                                )
-                            elif name == "display_resume_page":
-                                yield MetadataResponse(
-                                    metadata={"type": "navigation", "page": "resume"}
-                                )
-                            elif name == "display_hackathons_page":
-                                yield MetadataResponse(
-                                    metadata={"type": "navigation", "page": "hackathon"}
-                                )
-                            elif name == "display_architecture_page":
-                                yield MetadataResponse(
-                                    metadata={"type": "navigation", "page": "architecture"}
-                                )
-                            elif name == "display_project":
-                                # Parse the arguments to get the project ID
-                                try:
-                                    args_dict = json.loads(args) if args else {}
-                                    project_id = args_dict.get("id", "")
-                                    yield MetadataResponse(
-                                        metadata={
-                                            "type": "navigation",
-                                            "page": "project",
-                                            "project_id": project_id,
-                                        }
-                                    )
-                                except:
-                                    yield MetadataResponse(
-                                        metadata={"type": "navigation", "page": "project"}
-                                    )
-                            elif name == "search_projects":
-                                # For search_projects, we might want to send the results as metadata
-                                # but since the function returns text, we'll let it be handled normally
-                                pass
+                            navigation = navigation_metadata(name, args)
+                            self._effect(effects, self._navigated, navigation)
+                            if navigation is not None:
+                                yield MetadataResponse(metadata=navigation)
 
                         elif event.name == "tool_output":
                             output_item = event.item
-                            call_id = getattr(output_item.raw_item, "call_id", "")
+                            call_id = _output_call_id(output_item.raw_item)
+                            latency_mask.completed(call_id)
                             yield ToolCallResultResponse(
                                 tool_call_id=call_id,
                                 content=str(output_item.output),
                             )
 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Superseded by a newer response_id (task cancelled) or the consumer
+            # stopped iterating: don't leave the run streaming in the background.
+            if watchdog is not None:
+                watchdog.cancel()
+                result = watchdog.result
+            self._abandon_run(result, reply_parts)
+            raise
         except Exception as e:
+            if watchdog is not None:
+                watchdog.cancel()
+            # Whatever the stored response holds no longer matches the call
+            self._effect(effects, self._drop_chain)
             # Check if it's a guardrail tripwire trigger
             if "InputGuardrailTripwireTriggered" in str(type(e).__name__):
                 self._log(f"Guardrail triggered: Request blocked due to security check")
@@ -569,6 +987,28 @@ class LlmClient:
             )
             return
 
+        # Release anything the sanitizer held back as a possible marker
+        tail = sanitizer.flush()
+        if tail:
+            reply_parts.append(tail)
+            yield ResponseResponse(
+                response_id=response_id,
+                content=tail,
+                content_complete=False,
+                end_call=False,
+            )
+
+        if watchdog is not None and watchdog.fallback_won:
+            # The winning run stored a different (trimmed or other-model) conversation
+            turn = (False, started, first_output_at, watchdog.result, self.fallback_model)
+            self._effect(effects, self._record_turn, *turn)
+            self._effect(effects, self._drop_chain)
+        else:
+            chained = previous_response_id is not None
+            turn = (chained, started, first_output_at, result, decision.model)
+            self._effect(effects, self._record_turn, *turn)
+            self._effect(effects, self._advance_chain, result, covered, anchor, "".join(reply_parts))
+
         # Send final response to signal completion
         yield ResponseResponse(
             response_id=response_id,
@@ -600,17 +1040,56 @@ class LlmClient:
         if not messages:
             messages = [{"role": "user", "content": "Hello"}]
 
-        # Add instruction to the last user message for text chat
-        # Encourage markdown formatting for better readability
-        processed_messages = []
-        for i, msg in enumerate(messages):
-            if i == len(messages) - 1 and msg.get("role") == "user":
-                processed_messages.append({
-                    "role": "user",
-                    "content": f"User question: {msg['content']}\n\nThis is a TEXT chat. Use markdown formatting: **bold** for emphasis, `code` for tech terms, and bullet points for lists."
-                })
-            else:
-                processed_messages.append(msg)
+        reply = self._quick_reply(messages)
+        if reply is not None:
+            yield TextChatStreamChunk(type="content", content=reply)
+            yield TextChatStreamChunk(type="done")
+            return
+
+        match = self._route_intent(messages)
+        if match is not None:
+            yield TextChatStreamChunk(
+                type="metadata",
+                metadata=self._navigated(navigation_metadata(match.tool, match.arguments)),
+            )
+            yield TextChatStreamChunk(type="content", content=match.acknowledgement)
+            yield TextChatStreamChunk(type="done")
+            return
+
+        if not await self._admit():
+            yield TextChatStreamChunk(type="error", content=BUSY_TEXT_MESSAGE)
+            return
+        run = self._text_run(messages)
+        try:
+            async with aclosing(run):
+                async for chunk in run:
+                    yield chunk
+        finally:
+            self._release(False)
+
+    async def _text_run(self, messages: List[dict]):
+        from custom_types import TextChatStreamChunk
+
+        history = messages
+        agent, decision = self._plan_turn(history)
+        chained_input = self._chained_input(history)
+        previous_response_id = None
+        if chained_input is not None:
+            messages = chained_input
+            previous_response_id = self._chain.response_id
+        elif self._chain is not None:
+            metrics.incr("llm.chain_fallbacks")
+
+        # Markdown reminder as a trailing note, leaving the history untouched
+        # so it stays a cacheable prefix
+        processed_messages = list(messages)
+        if processed_messages and processed_messages[-1].get("role") == "user":
+            processed_messages.append({"role": "developer", "content": text_turn_note})
+
+        reply_parts = []
+        started = time.perf_counter()
+        first_output_at = None
+        result = None
 
         try:
             with trace(
@@ -618,7 +1097,11 @@ class LlmClient:
                 group_id=self.call_id,
                 metadata={"mode": self.mode, "message_count": str(len(processed_messages))},
             ):
-                result = Runner.run_streamed(self.agent, processed_messages)
+                result = Runner.run_streamed(
+                    agent,
+                    processed_messages,
+                    previous_response_id=previous_response_id,
+                )
 
                 yield TextChatStreamChunk(type="status", content="Thinking...")
 
@@ -626,9 +1109,12 @@ class LlmClient:
                     if isinstance(event, RawResponsesStreamEvent):
                         data = event.data
                         event_type = getattr(data, "type", "")
+                        if first_output_at is None and _is_model_output(data):
+                            first_output_at = time.perf_counter()
                         if event_type == "response.output_text.delta":
                             delta_content = getattr(data, "delta", "")
                             if delta_content:
+                                reply_parts.append(delta_content)
                                 self._log(f"text content delta: {len(delta_content)} chars")
                                 yield TextChatStreamChunk(
                                     type="content",
@@ -647,58 +1133,19 @@ class LlmClient:
                                 yield TextChatStreamChunk(type="status", content=status_label)
 
                             # Send navigation metadata
-                            if name == "display_homepage":
-                                yield TextChatStreamChunk(
-                                    type="metadata",
-                                    metadata={"type": "navigation", "page": "personal"}
-                                )
-                            elif name == "display_landing_page":
-                                yield TextChatStreamChunk(
-                                    type="metadata",
-                                    metadata={"type": "navigation", "page": "landing"}
-                                )
-                            elif name == "display_education_page":
-                                yield TextChatStreamChunk(
-                                    type="metadata",
-                                    metadata={"type": "navigation", "page": "education"}
-                                )
-                            elif name == "display_resume_page":
-                                yield TextChatStreamChunk(
-                                    type="metadata",
-                                    metadata={"type": "navigation", "page": "resume"}
-                                )
-                            elif name == "display_hackathons_page":
-                                yield TextChatStreamChunk(
-                                    type="metadata",
-                                    metadata={"type": "navigation", "page": "hackathon"}
-                                )
-                            elif name == "display_architecture_page":
-                                yield TextChatStreamChunk(
-                                    type="metadata",
-                                    metadata={"type": "navigation", "page": "architecture"}
-                                )
-                            elif name == "display_project":
-                                try:
-                                    args_dict = json.loads(args) if args else {}
-                                    project_id = args_dict.get("id", "")
-                                    yield TextChatStreamChunk(
-                                        type="metadata",
-                                        metadata={
-                                            "type": "navigation",
-                                            "page": "project",
-                                            "project_id": project_id,
-                                        }
-                                    )
-                                except:
-                                    yield TextChatStreamChunk(
-                                        type="metadata",
-                                        metadata={"type": "navigation", "page": "project"}
-                                    )
+                            navigation = self._navigated(navigation_metadata(name, args))
+                            if navigation is not None:
+                                yield TextChatStreamChunk(type="metadata", metadata=navigation)
 
                     else:
                         self._log(f"unhandled stream event: {type(event).__name__}")
 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client went away mid-stream
+            self._abandon_run(result, reply_parts)
+            raise
         except Exception as e:
+            self._chain = None
             # Check if it's a guardrail tripwire trigger
             if "InputGuardrailTripwireTriggered" in str(type(e).__name__):
                 self._log(f"Guardrail triggered: Request blocked due to security check")
@@ -719,6 +1166,11 @@ class LlmClient:
             )
             return
 
+        self._record_turn(
+            previous_response_id is not None, started, first_output_at, result, decision.model
+        )
+        self._advance_chain(result, len(history), history[-1], "".join(reply_parts))
+
         # Signal completion
         yield TextChatStreamChunk(type="done")
         self._log(f"text chat response complete", flush=True)
@@ -766,6 +1218,7 @@ async def generate_summary(transcript: List[TextChatMessage]) -> str:
             metadata={"message_count": str(len(messages))},
         ):
             result = await Runner.run(summary_agent, messages)
+        record_usage("summary", result)
         return result.final_output
     except Exception as e:
         print(f"Error generating summary: {e}")
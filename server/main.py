@@ -1,8 +1,8 @@
-import json
+import math
 import os
-import asyncio
 import traceback
 import uuid
+from contextlib import aclosing, asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
@@ -12,12 +12,25 @@ from retell import Retell
 from custom_types import (
     ConfigResponse,
     ResponseRequiredRequest,
+    ResponseResponse,
     TextChatRequest,
+    ChatSessionMessage,
     SummaryRequest,
 )
 from typing import Optional, List
-from socket_manager import manager
+from socket_manager import ConnectionWriter, manager
 from llm import LlmClient, generate_summary
+from metrics import metrics
+from speculation import SPECULATION_MODES, Speculator
+from voice_frames import FlushPolicy, TurnFrameStats, coalesce_frames
+from wire import sse_line
+from inbound import FrameDispatcher, decode
+from supervisor import CallSupervisor
+from sessions import max_messages_from_env, session_store_from_env
+from reconnect import ReconnectRegistry
+from rate_limit import RateDecision, RateLimiter, client_key
+from webhooks import WebhookEvent, WebhookIngestor
+from admission import AdmissionRejected, AdmissionScheduler
 
 
 load_dotenv(override=True)
@@ -34,6 +47,44 @@ def validate_environment_variables():
     optional_vars = {
         "OBFUSCATED_WS_PATH": "WebSocket path obfuscation (defaults to 'ws-default')",
         "LLM_DEBUG": "Enable debug logging for LLM (0 or 1, defaults to 0)",
+        "LLM_CHAIN_RESPONSES": "Chain turns via previous_response_id (0 or 1, defaults to 0)",
+        "LLM_INTENT_ROUTER": "Route navigation commands locally (0 or 1, defaults to 1)",
+        "LLM_SPECULATIVE": "Speculate on update_only frames (0, prefetch or generate, defaults to 0)",
+        "VOICE_FLUSH_MAX_CHARS": "Coalesce voice deltas up to this many chars per frame (0 disables, defaults to 120)",
+        "VOICE_FLUSH_MAX_HOLD_MS": "Longest a voice delta is held before sending (defaults to 120)",
+        "VOICE_FILLER_AFTER_MS": "Speak a filler line once a slow tool runs this long (0 disables, defaults to 600)",
+        "VOICE_MAX_QUEUED_FRAMES": "Cap on queued background frames per call (defaults to 8)",
+        "VOICE_SEND_MAX_PENDING": "High-water mark for each call's send queue (defaults to 64)",
+        "VOICE_RECONNECT_GRACE_S": "Keep a disconnected call's state this long for a reconnect (0 disables, defaults to 30)",
+        "VOICE_RECONNECT_MAX_PARKED": "Most disconnected calls kept for a reconnect (defaults to 32)",
+        "VOICE_RECONNECT_MAX_BYTES": "Transcript text kept across parked calls (defaults to 2000000)",
+        "LLM_MAX_CONCURRENCY": "LLM runs in flight across voice, text and summaries (defaults to 24)",
+        "LLM_CLASS_LIMITS": "Per-class run limits (defaults to voice=24,text=12,summary=4)",
+        "LLM_QUEUE_TIMEOUTS_MS": "Per-class queue timeouts (defaults to voice=1500,text=10000,summary=15000)",
+        "LLM_LATENCY_POLICY": "Choose model, effort and tool timeouts per turn (0 or 1, defaults to 0)",
+        "LLM_FAST_MODEL": "Model the latency policy falls back to when TTFT overshoots the SLO",
+        "LLM_TTFT_DEADLINE_MS": "Race a fallback voice run after this long without a first token (0 disables, defaults to 0)",
+        "LLM_FALLBACK_MODEL": "Model for the TTFT watchdog fallback (defaults to a trimmed prompt on the same model)",
+        "LLM_QUICK_REPLIES": "Modes that answer reminder and greeting turns from templates (defaults to voice,text; 0 disables)",
+        "LLM_QUICK_REPLIES_FILE": "JSON file replacing the quick reply template pool",
+        "LLM_PROMPT_SECTIONS": "Send the core prompt plus only the needed topic sections (0 or 1, defaults to 0)",
+        "RATE_LIMIT_CHAT_PER_MIN": "Chat messages per minute per client (0 disables, defaults to 20)",
+        "RATE_LIMIT_CHAT_BURST": "Chat messages a client may send back to back (defaults to 5)",
+        "RATE_LIMIT_SUMMARY_PER_MIN": "Summaries per minute per client (0 disables, defaults to 4)",
+        "RATE_LIMIT_SUMMARY_BURST": "Summaries a client may request back to back (defaults to 2)",
+        "RATE_LIMIT_SESSION_PER_MIN": "Chat sessions created per minute per client (0 disables, defaults to 6)",
+        "RATE_LIMIT_SESSION_BURST": "Chat sessions a client may create back to back (defaults to 3)",
+        "RATE_LIMIT_MAX_KEYS": "Most clients tracked by the in-memory rate limiter (defaults to 10000)",
+        "RATE_LIMIT_REDIS_URL": "Share rate limit buckets between workers through Redis",
+        "RATE_LIMIT_TRUSTED_PROXIES": "Proxies in front of the server that append to X-Forwarded-For (1 on Cloud Run; defaults to 0, peer address only)",
+        "WEBHOOK_EVENT_LOG": "Path of an append-only JSONL log of call webhook events (off unless set)",
+        "WEBHOOK_EVENT_LOG_MAX_BYTES": "Size at which the webhook event log is moved to <path>.1 (defaults to 50000000, 0 disables)",
+        "WEBHOOK_QUEUE_MAX": "Webhook events queued for the background writer before 503s (defaults to 1000)",
+        "WEBHOOK_BATCH_MAX": "Most webhook events written per batch (defaults to 100)",
+        "CHAT_SESSION_TTL_S": "Idle seconds before a chat session expires (defaults to 1800)",
+        "CHAT_SESSION_MAX": "Most chat sessions kept in memory per worker, least recently used evicted (defaults to 1000)",
+        "CHAT_SESSION_MAX_MESSAGES": "Messages of history kept per chat session (defaults to 200)",
+        "CHAT_SESSION_REDIS_URL": "Keep chat sessions in Redis instead of process memory",
     }
     
     missing_required = []
@@ -61,7 +112,33 @@ def validate_environment_variables():
 # Validate environment on startup
 validate_environment_variables()
 
-app = FastAPI()
+SPECULATIVE_MODE = os.getenv("LLM_SPECULATIVE", "0")
+if SPECULATIVE_MODE not in SPECULATION_MODES:
+    print(f"Unknown LLM_SPECULATIVE={SPECULATIVE_MODE!r}, speculation disabled")
+    SPECULATIVE_MODE = "0"
+
+VOICE_FLUSH_POLICY = FlushPolicy.from_env()
+
+# Call state parked between a disconnect and Retell's auto-reconnect
+call_registry = ReconnectRegistry.from_env()
+
+# One gate on LLM concurrency; voice turns are admitted before text and summaries
+admission = AdmissionScheduler.from_env()
+
+# Per-client token buckets for the endpoints that start LLM runs
+rate_limiter = RateLimiter.from_env()
+
+chat_sessions = session_store_from_env()
+CHAT_SESSION_MAX_MESSAGES = max_messages_from_env()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Write out webhook events still queued before the process exits
+    await webhook_ingestor.close()
+
+
+app = FastAPI(lifespan=lifespan)
 origins = [
     "http://localhost:3000",
     "https://art3m1s.me",
@@ -84,17 +161,49 @@ async def ping():
     return {"message": "pong"}
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Live admission queues plus the process-wide counters and latency samples."""
+    return {"admission": admission.snapshot(), **metrics.snapshot()}
+
+
+async def rate_limit(endpoint: str, http_request: Request) -> Optional[JSONResponse]:
+    """A 429 response if the caller is over the endpoint's rate limit, else None."""
+    peer = http_request.client.host if http_request.client else None
+    client = client_key(http_request.headers, peer, rate_limiter.trusted_proxies)
+    decision: RateDecision = await rate_limiter.check(endpoint, client)
+    if decision.allowed:
+        return None
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Too many requests, please slow down."},
+        headers={"Retry-After": str(max(1, math.ceil(decision.retry_after_s)))},
+    )
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+}
+
+
 @app.post("/chat")
-async def chat_endpoint(request: TextChatRequest):
+async def chat_endpoint(request: TextChatRequest, http_request: Request):
     """
     Text chat endpoint with SSE streaming.
-    Accepts messages and streams back responses using Server-Sent Events.
+    Accepts the full message history and streams back responses using Server-Sent Events.
+    See /chat/sessions for sending only the new message.
     """
+    limited = await rate_limit("chat", http_request)
+    if limited is not None:
+        return limited
     
     async def generate_sse():
         # Create a unique session ID for this chat
         session_id = str(uuid.uuid4())[:8]
-        llm_client = LlmClient(call_id=f"text-{session_id}", mode="text")
+        # Model runs wait for a text admission slot; local answers don't
+        llm_client = LlmClient(call_id=f"text-{session_id}", mode="text", admission=admission)
         
         # Convert TextChatMessage to dict format expected by LLM
         messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
@@ -102,31 +211,97 @@ async def chat_endpoint(request: TextChatRequest):
         try:
             async for chunk in llm_client.draft_text_response(messages):
                 # Format as SSE
-                data = json.dumps(chunk.model_dump())
-                yield f"data: {data}\n\n"
+                yield sse_line(chunk)
         except Exception as e:
-            error_data = json.dumps({"type": "error", "content": str(e)})
-            yield f"data: {error_data}\n\n"
+            yield sse_line({"type": "error", "content": str(e)})
     
-    return StreamingResponse(
-        generate_sse(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
-        }
-    )
+    return StreamingResponse(generate_sse(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.post("/chat/sessions")
+async def create_chat_session(http_request: Request):
+    """
+    Start a server-side chat session. Post each new message to
+    /chat/sessions/{session_id}/messages; the server keeps the history.
+    """
+    # Otherwise one client could create sessions until every real one is evicted
+    limited = await rate_limit("session", http_request)
+    if limited is not None:
+        return limited
+    session = await chat_sessions.create()
+    return {"session_id": session.session_id, "ttl_s": chat_sessions.ttl_s}
+
+
+@app.post("/chat/sessions/{session_id}/messages")
+async def chat_session_message(session_id: str, request: ChatSessionMessage, http_request: Request):
+    """
+    Stream the reply to one new user message in a chat session (SSE, same
+    chunks as /chat). The exchange is added to the history once it completes.
+    """
+    # Keyed by client, not session, so new sessions don't reset the bucket
+    limited = await rate_limit("chat", http_request)
+    if limited is not None:
+        return limited
+    session = await chat_sessions.get(session_id)
+    if session is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session"})
+
+    async def generate_sse():
+        async with chat_sessions.turn(session):
+            if session.client is None:
+                session.client = LlmClient(
+                    call_id=f"text-{session.session_id[:8]}", mode="text", admission=admission
+                )
+            user_message = {"role": "user", "content": request.content}
+            reply_parts = []
+            completed = False
+            try:
+                async for chunk in session.client.draft_text_response(session.messages + [user_message]):
+                    if chunk.type == "content" and chunk.content:
+                        reply_parts.append(chunk.content)
+                    completed = chunk.type == "done"
+                    yield sse_line(chunk)
+            except Exception as e:
+                yield sse_line({"type": "error", "content": str(e)})
+            # Only a finished turn joins the history; a failed or abandoned one
+            # leaves the session as it was so the message can be resent
+            if completed:
+                session.extend(
+                    [user_message, {"role": "assistant", "content": "".join(reply_parts)}],
+                    CHAT_SESSION_MAX_MESSAGES,
+                )
+                await chat_sessions.save(session)
+
+    return StreamingResponse(generate_sse(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.delete("/chat/sessions/{session_id}")
+async def delete_chat_session(session_id: str):
+    """End a chat session and drop its history."""
+    if not await chat_sessions.delete(session_id):
+        return JSONResponse(status_code=404, content={"error": "Unknown or expired session"})
+    return {"deleted": True}
 
 
 @app.post("/summary")
-async def summary_endpoint(request: SummaryRequest):
+async def summary_endpoint(request: SummaryRequest, http_request: Request):
     """
     Generate a recruiter-focused summary of the conversation.
     """
+    limited = await rate_limit("summary", http_request)
+    if limited is not None:
+        return limited
     try:
-        summary = await generate_summary(request.transcript)
+        async with admission.slot("summary"):
+            summary = await generate_summary(request.transcript)
         return {"summary": summary}
+    except AdmissionRejected as e:
+        print(f"Summary rejected: {e}", flush=True)
+        return JSONResponse(
+            status_code=503,
+            content={"error": "The server is busy, please try again shortly."},
+            headers={"Retry-After": "5"},
+        )
     except Exception as e:
         return JSONResponse(
             status_code=500,
@@ -136,30 +311,39 @@ async def summary_endpoint(request: SummaryRequest):
 
 # Handle webhook from Retell server. This is used to receive events from Retell server.
 # Including call_started, call_ended, call_analyzed
+def handle_call_event(event: WebhookEvent):
+    """Per-event webhook work, run by the ingestor's background worker."""
+    if event.event == "call_started":
+        print("Call started event", event.call_id)
+    elif event.event == "call_ended":
+        print("Call ended event", event.call_id)
+        # No reconnect is coming; free any parked state now
+        call_registry.discard(event.call_id)
+    elif event.event == "call_analyzed":
+        print("Call analyzed event", event.call_id)
+    else:
+        print("Unknown event", event.event)
+
+
+webhook_ingestor = WebhookIngestor.from_env(on_event=handle_call_event)
+
+
 @app.post("/webhook")
 async def handle_webhook(request: Request):
     try:
-        post_data = await request.json()
+        # Retell signs the body it sends; verify those bytes, not a re-encoding
+        raw = await request.body()
         valid_signature = retell.verify(
-            json.dumps(post_data, separators=(",", ":"), ensure_ascii=False),
+            raw.decode("utf-8"),
             api_key=str(os.getenv("RETELL_API_KEY")),
             signature=str(request.headers.get("X-Retell-Signature")),
         )
         if not valid_signature:
-            print(
-                "Received Unauthorized",
-                post_data["event"],
-                post_data["data"]["call_id"],
-            )
+            print("Received Unauthorized webhook")
             return JSONResponse(status_code=401, content={"message": "Unauthorized"})
-        if post_data["event"] == "call_started":
-            print("Call started event", post_data["data"]["call_id"])
-        elif post_data["event"] == "call_ended":
-            print("Call ended event", post_data["data"]["call_id"])
-        elif post_data["event"] == "call_analyzed":
-            print("Call analyzed event", post_data["data"]["call_id"])
-        else:
-            print("Unknown event", post_data["event"])
+        # Acknowledge now; logging and the event log write happen in the background
+        if not webhook_ingestor.submit(WebhookEvent.parse(raw)):
+            return JSONResponse(status_code=503, content={"message": "Busy, retry later"})
         return JSONResponse(status_code=200, content={"received": True})
     except Exception as err:
         print(f"Error in webhook: {err}")
@@ -173,14 +357,33 @@ async def handle_webhook(request: Request):
 # generating responses with LLM and send back to Retell server.
 @app.websocket(f"/{os.environ.get('OBFUSCATED_WS_PATH', 'ws-default')}" + "/{call_id}")
 async def websocket_handler(websocket: WebSocket, call_id: str):
-    # Initialize tasks set before try block for proper cleanup
-    tasks = set()
+    # Initialize before the try block for proper cleanup
+    supervisor: Optional[CallSupervisor] = None
+    writer: Optional[ConnectionWriter] = None
+    llm_client = None
+    speculator = None
+    # Only a disconnect parks the call for a reconnect; errors drop its state
+    reconnectable = False
     
     try:
         print(f"Attempting to accept websocket for call_id={call_id}")
         await websocket.accept()
         print("WebSocket accepted", call_id)
-        llm_client = LlmClient(call_id, mode="voice")
+        # Every send goes through the writer task, so a slow socket never
+        # blocks generation and concurrent tasks can't interleave writes
+        writer = ConnectionWriter(websocket)
+        parked = call_registry.reclaim(call_id)
+        reattached = parked is not None
+        if reattached:
+            # Auto-reconnect: keep the transcript, chain, caches and speculation
+            llm_client, speculator = parked.llm_client, parked.speculator
+            print(f"Reattached parked call state for {call_id}", flush=True)
+        else:
+            llm_client = LlmClient(call_id, mode="voice", admission=admission)
+            if SPECULATIVE_MODE != "0":
+                speculator = Speculator(
+                    llm_client, generate=SPECULATIVE_MODE == "generate", admission=admission
+                )
         call_metadata = None  # Will store metadata from call_details
 
         # Send optional config to Retell server
@@ -190,72 +393,96 @@ async def websocket_handler(websocket: WebSocket, call_id: str):
                 "auto_reconnect": True,
                 "call_details": True,
             },
-            response_id=1,
         )
         print("Sent initial config", flush=True)
-        await websocket.send_json(config.__dict__)
+        writer.send(config)
         response_id = 0
 
-        async def handle_message(request_json):
+        async def handle_message(raw: str):
             try:
+                # Decoded here, off the receive loop
+                request_json = decode(raw)
                 nonlocal response_id
                 nonlocal llm_client
                 # There are 5 types of interaction_type: call_details, pingpong, update_only, response_required, and reminder_required.
                 # Not all of them need to be handled, only response_required and reminder_required.
                 print("handle_message received:", request_json.get("interaction_type"))
                 if request_json["interaction_type"] == "call_details":
-                    # Send first message to signal ready of server
-                    first_event = llm_client.draft_begin_message()
+                    # Send first message to signal ready of server; a reconnected
+                    # call is already past the greeting, so it gets an empty one
+                    if reattached:
+                        first_event = ResponseResponse(
+                            response_id=0, content="", content_complete=True, end_call=False
+                        )
+                    else:
+                        first_event = llm_client.draft_begin_message()
                     print("Sent first_event", flush=True)
-                    await websocket.send_json(first_event.__dict__)
-                    return
-                if request_json["interaction_type"] == "ping_pong":
-                    await websocket.send_json(
-                        {
-                            "response_type": "ping_pong",
-                            "timestamp": request_json["timestamp"],
-                        }
-                    )
+                    writer.send(first_event)
                     return
                 if request_json["interaction_type"] == "update_only":
+                    # Keep the per-call transcript warm so the next response turn
+                    # only has to validate what was said since this update.
+                    llm_client.transcript.sync(request_json["transcript"])
+                    if speculator is not None:
+                        speculator.observe(request_json.get("turntaking"))
                     return
                 if (
                     request_json["interaction_type"] == "response_required"
                     or request_json["interaction_type"] == "reminder_required"
                 ):
                     response_id = request_json["response_id"]
-                    request = ResponseRequiredRequest(
+                    frame_stats = TurnFrameStats()
+                    # Only utterances the call hasn't seen yet get validated here;
+                    # the already-known prefix is reused as-is.
+                    transcript = llm_client.transcript.sync(request_json["transcript"])
+                    request = ResponseRequiredRequest.model_construct(
                         interaction_type=request_json["interaction_type"],
-                        response_id=response_id,
-                        transcript=request_json["transcript"],
+                        response_id=int(response_id),
+                        transcript=list(transcript.utterances),
                     )
                     print(
                         f"Received {request_json['interaction_type']} response_id={response_id}",
                         flush=True,
                     )
 
-                    async for event in llm_client.draft_response(request):
-                        await websocket.send_json(event.__dict__)
-                        if request.response_id < response_id:
-                            print(
-                                "Detected newer response_id, abandoning current stream"
-                            )
-                            break  # new response needed, abandon this one
+                    stream = speculator.take(request) if speculator is not None else None
+                    if stream is None:
+                        # A model run waits for a voice slot inside the client
+                        stream = llm_client.draft_response(request)
+                    stream = coalesce_frames(stream, VOICE_FLUSH_POLICY)
+                    try:
+                        async with aclosing(stream):
+                            async for event in stream:
+                                if not writer.send(event):
+                                    break  # socket gone or closed as a slow consumer
+                                frame_stats.record(event)
+                                if request.response_id < response_id:
+                                    print(
+                                        "Detected newer response_id, abandoning current stream"
+                                    )
+                                    break  # new response needed, abandon this one
+                    finally:
+                        frame_stats.finish()
             except Exception as e:
                 print(
-                    f"Exception in handle_message: {e}\n{traceback.format_exc()}\nPayload: {request_json}",
+                    f"Exception in handle_message: {e}\n{traceback.format_exc()}\nPayload: {raw}",
                     flush=True,
                 )
 
-        async for data in websocket.iter_json():
-            # Create task and add to tracking set
-            task = asyncio.create_task(handle_message(data))
-            tasks.add(task)
-            
-            # Remove completed tasks from the set
-            task.add_done_callback(lambda t: tasks.discard(t))
+        # ping_pong is answered inline and update_only dropped unless the
+        # speculator reads it; the supervisor runs the rest (one response at
+        # a time, latest wins, bounded background queue)
+        dispatcher = FrameDispatcher(writer, wants_updates=speculator is not None)
+        supervisor = CallSupervisor(handle_message)
+        async for raw in websocket.iter_text():
+            kind = await dispatcher.dispatch(raw)
+            if kind is not None:
+                await supervisor.submit(kind, raw)
+        # iter_text() ends quietly when the socket disconnects
+        reconnectable = True
 
     except WebSocketDisconnect:
+        reconnectable = True
         print(f"LLM WebSocket disconnected for {call_id}")
     except ConnectionTimeoutError as e:
         print("Connection timeout error for {call_id}")
@@ -263,13 +490,14 @@ async def websocket_handler(websocket: WebSocket, call_id: str):
         print(f"Error in LLM WebSocket: {e} for {call_id}")
         await websocket.close(1011, "Server error")
     finally:
-        # Cancel all pending tasks to prevent memory leaks
-        for task in tasks:
-            if not task.done():
-                task.cancel()
-        
-        # Wait for all tasks to complete cancellation
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+        # Cancel all pending work to prevent memory leaks
+        if supervisor is not None:
+            await supervisor.close()
+        if writer is not None:
+            await writer.aclose()
+        if reconnectable and llm_client is not None:
+            call_registry.park(call_id, llm_client, speculator)
+        elif speculator is not None:
+            speculator.discard()
         
         print(f"LLM WebSocket connection closed for {call_id}")
@@ -0,0 +1,190 @@
+"""
+Incremental markdown stripping for text that will be spoken.
+
+MarkdownSanitizer is a small state machine fed one streamed delta at a time.
+Plain text is copied through in bulk; only a potential marker prefix is held
+back (a run of `*`/`_`, a `]` that may open a link URL, or the first few
+characters of a line that may be a header / list marker), so each delta costs
+O(len(delta)) and emitted text is never re-scanned.
+
+What gets removed:
+- emphasis markers (`*`, `**`, `_`, `__`) unless they stand alone between
+  spaces ("2 * 3") or sit inside a word (`snake_case`)
+- backticks
+- link syntax: `[text](url)` becomes `text`
+- header (`#`..`######`) and list (`*`, `-`, `+`, `1.`) markers at line start
+"""
+
+import re
+from typing import List, Optional
+
+# Characters that may need more than a straight copy in the inline state
+_SPECIAL = re.compile(r"[*_`\[\]\n]")
+
+_BLOCK_BULLETS = "*+-"
+MAX_HEADER_LEVEL = 6
+MAX_LIST_DIGITS = 9
+MAX_MARKER_RUN = 3
+# Give up skipping a link target after this many characters
+MAX_URL_CHARS = 2048
+
+
+class MarkdownSanitizer:
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._prev = "\n"  # last emitted character
+        self._line_start = True  # block markers are only recognised at column 0
+        self._block = ""  # held potential block marker
+        self._strip_ws = False  # drop whitespace following a block marker
+        self._run = ""  # held run of * or _
+        self._run_prev = ""  # character emitted before the run
+        self._link_depth = 0  # inside [link text]
+        self._close_pending = False  # saw "]" of a link, waiting to see "("
+        self._url_chars = -1  # >= 0 while skipping a (url)
+
+    def feed(self, delta: str) -> str:
+        """Consume a streamed delta and return the text that is safe to emit."""
+        out: List[str] = []
+        self._process(delta, out)
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Resolve anything held back at the end of the stream and reset."""
+        out: List[str] = []
+        if self._block:
+            self._release_block(out)
+        if self._run:
+            self._resolve_run(None, out)
+        self._reset()
+        return "".join(out)
+
+    def _emit(self, text: str, out: List[str]):
+        out.append(text)
+        self._prev = text[-1]
+
+    def _process(self, text: str, out: List[str]):
+        i, n = 0, len(text)
+        while i < n:
+            ch = text[i]
+
+            if self._url_chars >= 0:
+                end = text.find(")", i)
+                if end == -1:
+                    self._url_chars += n - i
+                    if self._url_chars > MAX_URL_CHARS:
+                        self._url_chars = -1
+                    return
+                self._url_chars = -1
+                i = end + 1
+                continue
+
+            if self._close_pending:
+                self._close_pending = False
+                if ch == "(":
+                    self._url_chars = 0
+                    i += 1
+                    continue
+
+            if self._strip_ws:
+                if ch == " " or ch == "\t":
+                    i += 1
+                    continue
+                self._strip_ws = False
+
+            if self._line_start and self._feed_block(ch, out):
+                i += 1
+                continue
+
+            if self._run:
+                if ch == self._run[0] and len(self._run) < MAX_MARKER_RUN:
+                    self._run += ch
+                    i += 1
+                    continue
+                self._resolve_run(ch, out)
+
+            if ch == "*" or ch == "_":
+                self._run = ch
+                self._run_prev = self._prev
+                i += 1
+            elif ch == "`":
+                i += 1
+            elif ch == "[":
+                self._link_depth += 1
+                i += 1
+            elif ch == "]" and self._link_depth:
+                self._link_depth -= 1
+                self._close_pending = True
+                i += 1
+            elif ch == "\n":
+                self._emit(ch, out)
+                self._line_start = True
+                self._link_depth = 0
+                i += 1
+            else:
+                match = _SPECIAL.search(text, i + 1)
+                end = match.start() if match else n
+                self._emit(text[i:end], out)
+                i = end
+
+    def _feed_block(self, ch: str, out: List[str]) -> bool:
+        """Advance the line-start state. Returns True if `ch` was consumed."""
+        block = self._block
+        if not block:
+            if ch == "#" or ch in _BLOCK_BULLETS or ch.isdigit():
+                self._block = ch
+                return True
+            self._line_start = False
+            return False
+
+        if ch == " " or ch == "\t":
+            if (
+                block[0] == "#"
+                or block in _BLOCK_BULLETS
+                or (block[-1] == "." and block[:-1].isdigit())
+            ):
+                # A complete marker: drop it and the whitespace after it
+                self._block = ""
+                self._line_start = False
+                self._strip_ws = True
+                return True
+        elif block[0] == "#":
+            if ch == "#" and len(block) < MAX_HEADER_LEVEL:
+                self._block += ch
+                return True
+        elif block[0].isdigit() and block[-1] != ".":
+            if ch.isdigit() and len(block) < MAX_LIST_DIGITS:
+                self._block += ch
+                return True
+            if ch == ".":
+                self._block += ch
+                return True
+
+        # Not a marker after all: let the held characters through as inline text
+        self._release_block(out)
+        return False
+
+    def _release_block(self, out: List[str]):
+        pending, self._block = self._block, ""
+        self._line_start = False
+        self._process(pending, out)
+
+    def _resolve_run(self, next_char: Optional[str], out: List[str]):
+        run, before = self._run, self._run_prev
+        self._run = ""
+        left_space = not before or before.isspace()
+        right_space = next_char is None or next_char.isspace()
+        if left_space and right_space:
+            self._emit(run, out)  # standalone, e.g. "2 * 3"
+        elif run[0] == "_" and before.isalnum() and next_char is not None and next_char.isalnum():
+            self._emit(run, out)  # inside a word, e.g. snake_case
+        # otherwise it's emphasis: drop it
+
+
+def clean_markdown(text: str) -> str:
+    """Remove markdown formatting from a complete string for voice output."""
+    if not text:
+        return text
+    sanitizer = MarkdownSanitizer()
+    return sanitizer.feed(text) + sanitizer.flush()
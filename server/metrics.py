@@ -0,0 +1,57 @@
+"""
+Process-wide counters and latency samples.
+
+Kept deliberately tiny: counters are plain integers and observations keep a
+bounded window of recent samples so percentiles stay cheap to compute.
+"""
+
+from collections import defaultdict, deque
+from typing import Deque, Dict, List
+
+SAMPLE_WINDOW = 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Metrics:
+    def __init__(self, window: int = SAMPLE_WINDOW):
+        self.window = window
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.samples: Dict[str, Deque[float]] = defaultdict(
+            lambda: deque(maxlen=self.window)
+        )
+
+    def incr(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def observe(self, name: str, value: float):
+        self.samples[name].append(value)
+
+    def summary(self, name: str) -> Dict[str, float]:
+        values = list(self.samples.get(name, ()))
+        return {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "max": max(values) if values else 0.0,
+        }
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return {
+            "counters": dict(self.counters),
+            "samples": {name: self.summary(name) for name in self.samples},
+        }
+
+    def reset(self):
+        self.counters.clear()
+        self.samples.clear()
+
+
+metrics = Metrics()
@@ -5,6 +5,9 @@ from dotenv import load_dotenv
 from openai import AsyncOpenAI
 from pinecone import PineconeAsyncio
 
+from markdown_stream import clean_markdown
+from metrics import metrics
+
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
@@ -46,19 +49,8 @@ async def search_projects(query: str, top_k: int = 3) -> List[Dict]:
 
         projects = []
         for match in results.matches:
-            project = {
-                "id": match.id,
-                "name": match.metadata.get("name", "Unknown Project"),
-                "summary": match.metadata.get("summary", "No summary available"),
-                "details": match.metadata.get("details", "No details available"),
-                "score": round(match.score, 3),
-            }
-
-            if match.metadata.get("github"):
-                project["github"] = match.metadata.get("github")
-            if match.metadata.get("demo"):
-                project["demo"] = match.metadata.get("demo")
-
+            project = _project_from_metadata(match.id, match.metadata)
+            project["score"] = round(match.score, 3)
             projects.append(project)
 
         return projects
@@ -68,6 +60,38 @@ async def search_projects(query: str, top_k: int = 3) -> List[Dict]:
         return []
 
 
+def _plain(metadata: Dict, field: str, default: str) -> str:
+    """
+    The plain-text version of a field, as stored by pinecone/load_data.py.
+
+    Vectors uploaded before load_data.py stored plain_* fields are cleaned
+    here instead; projects.unprocessed counts how often that happens.
+    """
+    plain = metadata.get(f"plain_{field}")
+    if plain is not None:
+        return plain
+    metrics.incr("projects.unprocessed")
+    return clean_markdown(metadata.get(field, default))
+
+
+def _project_from_metadata(project_id: str, metadata: Dict) -> Dict:
+    summary = _plain(metadata, "summary", "No summary available")
+    project = {
+        "id": project_id,
+        "name": _plain(metadata, "name", "Unknown Project"),
+        "summary": summary,
+        "voice_summary": metadata.get("voice_summary") or summary,
+        "details": _plain(metadata, "details", "No details available"),
+    }
+
+    if metadata.get("github"):
+        project["github"] = metadata.get("github")
+    if metadata.get("demo"):
+        project["demo"] = metadata.get("demo")
+
+    return project
+
+
 async def get_project_by_id(project_id: str) -> Optional[Dict]:
     """
     Fetch a specific project by its ID.
@@ -84,21 +108,7 @@ async def get_project_by_id(project_id: str) -> Optional[Dict]:
 
         if project_id in fetch_result.vectors:
             vector_data = fetch_result.vectors[project_id]
-            metadata = vector_data.metadata
-
-            project = {
-                "id": project_id,
-                "name": metadata.get("name", "Unknown Project"),
-                "summary": metadata.get("summary", "No summary available"),
-                "details": metadata.get("details", "No details available"),
-            }
-
-            if metadata.get("github"):
-                project["github"] = metadata.get("github")
-            if metadata.get("demo"):
-                project["demo"] = metadata.get("demo")
-
-            return project
+            return _project_from_metadata(project_id, vector_data.metadata)
 
         return None
 
@@ -107,6 +117,37 @@ async def get_project_by_id(project_id: str) -> Optional[Dict]:
         return None
 
 
+async def get_projects_by_ids(project_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """
+    Fetch several projects with a single Pinecone fetch.
+
+    Args:
+        project_ids: Project IDs to fetch; duplicates are fetched once
+
+    Returns:
+        Mapping of every requested ID to its project dictionary, or None if
+        it wasn't found. All values are None if the fetch failed.
+    """
+    unique_ids = list(dict.fromkeys(project_ids))
+    found: Dict[str, Optional[Dict]] = {project_id: None for project_id in unique_ids}
+    if not unique_ids:
+        return found
+
+    try:
+        async with pc.IndexAsyncio(INDEX_NAME) as index:
+            fetch_result = await index.fetch(ids=unique_ids)
+
+        for project_id in unique_ids:
+            if project_id in fetch_result.vectors:
+                vector_data = fetch_result.vectors[project_id]
+                found[project_id] = _project_from_metadata(project_id, vector_data.metadata)
+
+    except Exception as e:
+        print(f"Error fetching projects {unique_ids}: {e}")
+
+    return found
+
+
 async def find_similar_projects(project_id: str, top_k: int = 3) -> List[Dict]:
     """
     Find projects similar to a given project.
@@ -138,8 +179,8 @@ async def find_similar_projects(project_id: str, top_k: int = 3) -> List[Dict]:
             if match.id != project_id:
                 project = {
                     "id": match.id,
-                    "name": match.metadata.get("name", "Unknown Project"),
-                    "summary": match.metadata.get("summary", "No summary available"),
+                    "name": _plain(match.metadata, "name", "Unknown Project"),
+                    "summary": _plain(match.metadata, "summary", "No summary available"),
                     "score": round(match.score, 3),
                 }
                 similar_projects.append(project)
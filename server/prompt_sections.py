@@ -0,0 +1,140 @@
+"""
+Sectioned system prompt.
+
+With LLM_PROMPT_SECTIONS=1, PromptSections sends a core (identity, style,
+boundaries, tool rules and the mode suffix) plus topic sections (education,
+career, interests, projects, architecture) once select_topics() says the
+conversation needs them. Topics are appended in the order first needed and
+never removed, so each turn's instructions extend the previous turn's and
+the prefix cache keeps hitting. cache_key names the stable part per mode
+and layout and is sent as the request's prompt_cache_key.
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from prompts import (
+    architecture_section,
+    boundaries_section,
+    career_section,
+    communication_section,
+    education_section,
+    enforcing_section,
+    examples_section,
+    identity_section,
+    interests_section,
+    knowledge_section,
+    navigation_section,
+    personality_section,
+    project_discussion_section,
+    project_tools_section,
+    text_prompt_suffix,
+    text_system_prompt,
+    voice_prompt_suffix,
+    voice_system_prompt,
+)
+
+CORE = (
+    identity_section
+    + personality_section
+    + communication_section
+    + boundaries_section
+    + enforcing_section
+    + navigation_section
+    + project_tools_section
+)
+
+# Topic -> sections, in canonical order
+TOPICS: Dict[str, Tuple[str, ...]] = {
+    "education": (education_section,),
+    "career": (career_section,),
+    "interests": (interests_section, knowledge_section, examples_section),
+    "projects": (project_discussion_section,),
+    "architecture": (architecture_section,),
+}
+
+TOPIC_PATTERNS: Dict[str, "re.Pattern[str]"] = {
+    "education": re.compile(
+        r"\b(school|education|college|universit\w*|degree|masters?|usc|ucsc|santa cruz|"
+        r"southern california|stud(y|ied|ies)|major|courses?|coursework|grew up|lynbrook|background)\b"
+    ),
+    "career": re.compile(
+        r"\b(work(ed|ing)|your work|for work|jobs?|experience|career|ringcentral|scale|compan(y|ies)|engineer\w*|"
+        r"intern\w*|hackathons?|won|wins?|linkedin|roles?|resume|cv|hire|hiring)\b"
+    ),
+    "interests": re.compile(
+        r"\b(music|piano|drums?|drumset|orchestra\w*|arrang\w*|games?|gaming|halo|mass effect|"
+        r"valorant|league|witcher|sci ?fi|cook\w*|hobb(y|ies)|fun|free time|snacks?|motto|"
+        r"yourself|who are you|personality)\b"
+    ),
+    "projects": re.compile(
+        r"\b(projects?|built|build|building|demos?|adapted|dispatch|talktuahbank|talk tuah|"
+        r"tech stack|apps?|portfolio|hackathons?|wins?|won)\b"
+    ),
+    "architecture": re.compile(
+        r"\b(how does this|how is this|how was this|this (site|website|portfolio)|under the hood|"
+        r"architecture|powers this|retell|pinecone|fastapi)\b"
+    ),
+}
+
+# Topics the page on screen implies
+PAGE_TOPICS: Dict[str, Tuple[str, ...]] = {
+    "education": ("education",),
+    "resume": ("career",),
+    "hackathon": ("career", "projects"),
+    "project": ("projects",),
+    "architecture": ("architecture",),
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def select_topics(text: str, page: Optional[str] = None) -> FrozenSet[str]:
+    """Topic sections relevant to a user message and the current page."""
+    normalized = " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+    topics = {topic for topic, pattern in TOPIC_PATTERNS.items() if pattern.search(normalized)}
+    topics.update(PAGE_TOPICS.get(page or "", ()))
+    return frozenset(topics)
+
+
+class PromptSections:
+    def __init__(self, mode: str = "voice", enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv("LLM_PROMPT_SECTIONS", "0") == "1"
+        self.enabled = enabled
+        self.layout = "sectioned" if enabled else "monolithic"
+        suffix = voice_prompt_suffix if mode == "voice" else text_prompt_suffix
+        self.monolithic = voice_system_prompt if mode == "voice" else text_system_prompt
+        self.prefix = CORE + suffix
+        stable = self.prefix if enabled else self.monolithic
+        digest = hashlib.sha256(stable.encode("utf-8")).hexdigest()[:12]
+        self.cache_key = f"portfolio-{mode}-{self.layout}-{digest}"
+        # Topics included so far, in first-needed order, and the prompt they make
+        self.topics: List[str] = []
+        self._prompt = self.prefix
+        # User messages already classified
+        self._seen = 0
+
+    def _include(self, topics: FrozenSet[str]):
+        # Canonical order within one message, so the same history gives the same prompt
+        for topic in TOPICS:
+            if topic in topics and topic not in self.topics:
+                self.topics.append(topic)
+                if len(self.topics) == 1:
+                    self._prompt += "\n"
+                self._prompt += "".join(TOPICS[topic])
+
+    def instructions(self, user_texts: List[str], page: Optional[str] = None) -> str:
+        """This turn's instructions, given every user message so far and the page on screen."""
+        if not self.enabled:
+            return self.monolithic
+        if len(user_texts) < self._seen:
+            # A different (shorter) conversation: start over
+            self.topics, self._prompt, self._seen = [], self.prefix, 0
+        for text in user_texts[self._seen:]:
+            self._include(select_topics(text))
+        self._seen = len(user_texts)
+        self._include(select_topics("", page))
+        return self._prompt
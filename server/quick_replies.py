@@ -0,0 +1,122 @@
+"""
+Canned replies for turns that don't need a model run.
+
+QuickReplies answers reminder_required nudges and a bare opening greeting
+from a template pool. Each kind has variants that may use context slots
+(currently {page}); variants whose slots can't be filled are skipped. The
+pool can be replaced from a JSON file (LLM_QUICK_REPLIES_FILE), and
+LLM_QUICK_REPLIES picks the modes it applies to.
+"""
+
+import json
+import os
+import random
+import re
+import string
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import metrics
+
+REMINDER, GREETING = "reminder", "greeting"
+
+TEMPLATES: Dict[str, Tuple[str, ...]] = {
+    REMINDER: (
+        "Still there? Happy to keep going whenever you are.",
+        "No rush. Want to hear about one of my hackathon projects?",
+        "I can also walk you through my resume or my work at RingCentral. What sounds good?",
+        "Anything you'd like to know about {page}?",
+        "Take your time. Any questions about {page}?",
+    ),
+    GREETING: (
+        "Hey! Ask me about my projects, my hackathon wins, or my work at RingCentral.",
+        "Hi there! I can walk you through my projects, my resume, or the hackathons I've been to. What sounds good?",
+        "Hello! Want to hear about a project, my experience, or how this site works?",
+    ),
+}
+
+# How each frontend page is referred to in a sentence
+PAGE_LABELS: Dict[str, str] = {
+    "personal": "my homepage",
+    "education": "my education",
+    "resume": "my resume",
+    "hackathon": "the hackathon map",
+    "architecture": "how this site works",
+    "project": "this project",
+}
+
+GREETING_PATTERN = re.compile(
+    r"^(hi|hello|hey|hiya|howdy|yo|good (morning|afternoon|evening))"
+    r"( there| bill)?( how are you( doing)?| how s it going| what s up)?$"
+)
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def is_greeting(text: str) -> bool:
+    """Whether a message is only a greeting, with nothing to answer."""
+    normalized = " ".join(_PUNCTUATION.sub(" ", text.lower()).split())
+    return bool(GREETING_PATTERN.match(normalized))
+
+
+def _slots(template: str) -> List[str]:
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+
+class QuickReplies:
+    def __init__(
+        self,
+        mode: str = "voice",
+        modes: Optional[Iterable[str]] = None,
+        templates: Optional[Dict[str, Tuple[str, ...]]] = None,
+    ):
+        if modes is None:
+            modes = os.getenv("LLM_QUICK_REPLIES", "voice,text").split(",")
+        self.enabled = mode in {m.strip() for m in modes}
+        if templates is None:
+            templates = self._load(os.getenv("LLM_QUICK_REPLIES_FILE"))
+        self.templates = templates
+        self._last: Dict[str, str] = {}
+
+    @staticmethod
+    def _load(path: Optional[str]) -> Dict[str, Tuple[str, ...]]:
+        if not path:
+            return TEMPLATES
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                loaded = json.load(f)
+            return {kind: tuple(loaded.get(kind, TEMPLATES[kind])) for kind in TEMPLATES}
+        except Exception as e:
+            print(f"Could not load quick replies from {path}: {e}")
+            return TEMPLATES
+
+    def classify(self, messages: List[Tuple[str, str]], reminder: bool = False) -> Optional[str]:
+        """The quick-reply kind for a turn, or None to run the agent.
+
+        `messages` is the conversation as (role, content) pairs.
+        """
+        if not self.enabled:
+            return None
+        if reminder:
+            return REMINDER
+        user_turns = [content for role, content in messages if role == "user"]
+        if len(user_turns) == 1 and messages[-1][0] == "user" and is_greeting(user_turns[0]):
+            return GREETING
+        return None
+
+    def render(self, kind: str, page: Optional[str] = None) -> Optional[str]:
+        """Pick a variant of `kind` whose slots can be filled, avoiding the last one used.
+
+        Returns None if no variant fits, so the turn goes to the agent.
+        """
+        context = {"page": PAGE_LABELS.get(page or "")}
+        usable = [
+            t for t in self.templates[kind] if all(context.get(slot) for slot in _slots(t))
+        ]
+        if not usable:
+            return None
+        fresh = [t for t in usable if t != self._last.get(kind)] or usable
+        template = random.choice(fresh)
+        self._last[kind] = template
+        metrics.incr(f"quick_replies.{kind}")
+        # Each one is a guardrail check and an agent run that didn't happen
+        metrics.incr("llm.runs_avoided")
+        return template.format(**{slot: context[slot] for slot in _slots(template)})
@@ -0,0 +1,195 @@
+"""
+Per-client token-bucket rate limiting for the endpoints that start LLM runs.
+
+RateLimiter keeps a token bucket per (endpoint, client) key; a request with
+no token left gets a 429 with Retry-After. Buckets live in memory
+(LocalBackend) or in Redis (RedisBackend, RATE_LIMIT_REDIS_URL), which fails
+open. client_key() uses the peer address, or X-Forwarded-For behind
+RATE_LIMIT_TRUSTED_PROXIES trusted proxies.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from metrics import metrics
+
+DEFAULT_MAX_KEYS = 10000
+
+
+@dataclass(frozen=True)
+class BucketLimit:
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second."""
+        return self.per_minute / 60
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0 and self.burst > 0
+
+    @classmethod
+    def from_env(cls, prefix: str, per_minute: float, burst: int) -> "BucketLimit":
+        return cls(
+            per_minute=float(os.getenv(f"{prefix}_PER_MIN", str(per_minute))),
+            burst=int(os.getenv(f"{prefix}_BURST", str(burst))),
+        )
+
+
+@dataclass
+class RateDecision:
+    allowed: bool
+    retry_after_s: float = 0.0
+
+
+@dataclass(slots=True)
+class _Bucket:
+    tokens: float
+    updated: float
+    # When the bucket is back to `burst`; from then on it can be forgotten
+    full_at: float
+
+
+class LocalBackend:
+    def __init__(self, max_keys: int = DEFAULT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max(1, max_keys)
+        self.clock = clock
+        self._buckets: "OrderedDict[str, _Bucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, limit: BucketLimit, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take `cost` tokens from the key's bucket: (allowed, seconds until it would be)."""
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = float(limit.burst)
+        else:
+            tokens = min(limit.burst, bucket.tokens + (now - bucket.updated) * limit.rate)
+        allowed = tokens >= cost
+        retry_after = 0.0
+        if allowed:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / limit.rate
+        full_at = now + (limit.burst - tokens) / limit.rate
+        if bucket is None:
+            self._buckets[key] = _Bucket(tokens, now, full_at)
+        else:
+            bucket.tokens, bucket.updated, bucket.full_at = tokens, now, full_at
+            self._buckets.move_to_end(key)
+        self._evict(now)
+        return allowed, retry_after
+
+    def _evict(self, now: float):
+        # Amortised O(1): only ever looks at the least recently used bucket
+        while self._buckets:
+            key, oldest = next(iter(self._buckets.items()))
+            if oldest.full_at <= now:
+                metrics.incr("ratelimit.evicted.idle")
+            elif len(self._buckets) > self.max_keys:
+                metrics.incr("ratelimit.evicted.capacity")
+            else:
+                return
+            del self._buckets[key]
+
+
+# KEYS[1] = bucket, ARGV = rate per second, burst, cost. Uses the Redis clock so
+# every worker agrees on time; the key expires once the bucket would be full.
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBackend:
+    def __init__(self, client: Any, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, limit: BucketLimit, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, retry_after = await self.client.eval(
+            _TAKE_SCRIPT, 1, self.prefix + key, limit.rate, limit.burst, cost
+        )
+        return bool(int(allowed)), float(retry_after)
+
+
+class RateLimiter:
+    def __init__(self, backend: Any, limits: Dict[str, BucketLimit], trusted_proxies: int = 0):
+        self.backend = backend
+        self.limits = limits
+        self.trusted_proxies = max(0, trusted_proxies)
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        limits = {
+            "chat": BucketLimit.from_env("RATE_LIMIT_CHAT", per_minute=20, burst=5),
+            "summary": BucketLimit.from_env("RATE_LIMIT_SUMMARY", per_minute=4, burst=2),
+            "session": BucketLimit.from_env("RATE_LIMIT_SESSION", per_minute=6, burst=3),
+        }
+        trusted_proxies = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+        redis_url = os.getenv("RATE_LIMIT_REDIS_URL")
+        if redis_url:
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError as e:
+                raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed") from e
+            return cls(RedisBackend(redis_asyncio.from_url(redis_url)), limits, trusted_proxies)
+        max_keys = int(os.getenv("RATE_LIMIT_MAX_KEYS", str(DEFAULT_MAX_KEYS)))
+        return cls(LocalBackend(max_keys=max_keys), limits, trusted_proxies)
+
+    async def check(self, endpoint: str, client: str) -> RateDecision:
+        """Take a token for `client` from the endpoint's bucket."""
+        limit: Optional[BucketLimit] = self.limits.get(endpoint)
+        if limit is None or not limit.enabled:
+            return RateDecision(True)
+        try:
+            allowed, retry_after = await self.backend.take(f"{endpoint}:{client}", limit)
+        except Exception as e:
+            # A shared backend outage shouldn't take the endpoints down with it
+            metrics.incr("ratelimit.backend_errors")
+            print(f"Rate limit backend failed, allowing request: {e}", flush=True)
+            return RateDecision(True)
+        metrics.incr(f"ratelimit.{endpoint}.{'allowed' if allowed else 'limited'}")
+        return RateDecision(allowed, retry_after)
+
+
+def client_key(headers: Any, host: Optional[str], trusted_proxies: int = 0) -> str:
+    """The caller's address: the peer, or the X-Forwarded-For hop the proxies saw.
+
+    Each of the trusted_proxies in front of the server appends the address it
+    saw, so the client is the trusted_proxies-th hop from the end; anything
+    before it came from the client. With no trusted proxies, or fewer hops
+    than proxies, the header can't be trusted and the peer address is used.
+    """
+    if trusted_proxies > 0:
+        hops = headers.get("x-forwarded-for", "").split(",")
+        if len(hops) >= trusted_proxies:
+            hop = hops[-trusted_proxies].strip()
+            if hop:
+                return hop
+    return host or "unknown"
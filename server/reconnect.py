@@ -0,0 +1,131 @@
+"""
+Per-call state kept across Retell auto-reconnects.
+
+When a connection ends with a disconnect, websocket_handler parks the call's
+LlmClient and Speculator in the ReconnectRegistry, and a reconnect on the same
+call_id within VOICE_RECONNECT_GRACE_S reclaims them. The registry is bounded
+by VOICE_RECONNECT_MAX_PARKED calls and VOICE_RECONNECT_MAX_BYTES of
+transcript text; expired and evicted calls have their speculation cancelled.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from metrics import metrics
+
+
+@dataclass
+class ParkedCall:
+    llm_client: Any
+    speculator: Any = None
+    parked_at: float = 0.0
+    size: int = 0
+    expiry: Optional[asyncio.TimerHandle] = None
+
+    def release(self):
+        """Drop the call for good: stop its timer and in-flight speculation."""
+        if self.expiry is not None:
+            self.expiry.cancel()
+        if self.speculator is not None:
+            self.speculator.discard()
+
+
+def transcript_size(llm_client: Any) -> int:
+    """Rough memory footprint of a call: characters of transcript it holds."""
+    transcript = getattr(llm_client, "transcript", None)
+    messages = getattr(transcript, "messages", None) or []
+    return sum(len(message.get("content", "")) for message in messages)
+
+
+class ReconnectRegistry:
+    def __init__(self, grace_s: float = 30.0, max_parked: int = 32, max_bytes: int = 2_000_000):
+        self.grace_s = grace_s
+        self.max_parked = max(1, max_parked)
+        self.max_bytes = max_bytes
+        self.parked_bytes = 0
+        self._calls: "OrderedDict[str, ParkedCall]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ReconnectRegistry":
+        return cls(
+            grace_s=float(os.getenv("VOICE_RECONNECT_GRACE_S", "30")),
+            max_parked=int(os.getenv("VOICE_RECONNECT_MAX_PARKED", "32")),
+            max_bytes=int(os.getenv("VOICE_RECONNECT_MAX_BYTES", "2000000")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_s > 0
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self._calls
+
+    def park(self, call_id: str, llm_client: Any, speculator: Any = None):
+        """Keep a disconnected call's state for the grace period."""
+        if not self.enabled:
+            if speculator is not None:
+                speculator.discard()
+            return
+        self.discard(call_id, count=False)
+        parked = ParkedCall(
+            llm_client,
+            speculator,
+            parked_at=time.perf_counter(),
+            size=transcript_size(llm_client),
+        )
+        parked.expiry = asyncio.get_running_loop().call_later(
+            self.grace_s, self._expire, call_id, parked
+        )
+        self._calls[call_id] = parked
+        self.parked_bytes += parked.size
+        metrics.incr("voice.reconnect.parked")
+        self._evict()
+        metrics.observe("voice.reconnect.parked_calls", len(self._calls))
+
+    def reclaim(self, call_id: str) -> Optional[ParkedCall]:
+        """Take a parked call's state back for a reconnect, if it is still here."""
+        parked = self._pop(call_id)
+        if parked is None:
+            return None
+        if parked.expiry is not None:
+            parked.expiry.cancel()
+        metrics.incr("voice.reconnect.reattached")
+        metrics.observe("voice.reconnect.parked_ms", (time.perf_counter() - parked.parked_at) * 1000)
+        return parked
+
+    def discard(self, call_id: str, count: bool = True):
+        """Drop a call that won't reconnect (e.g. the call_ended webhook)."""
+        parked = self._pop(call_id)
+        if parked is not None:
+            parked.release()
+            if count:
+                metrics.incr("voice.reconnect.discarded")
+
+    def _pop(self, call_id: str) -> Optional[ParkedCall]:
+        parked = self._calls.pop(call_id, None)
+        if parked is not None:
+            self.parked_bytes -= parked.size
+        return parked
+
+    def _expire(self, call_id: str, parked: ParkedCall):
+        # A newer park of the same call_id has its own timer
+        if self._calls.get(call_id) is parked:
+            self._pop(call_id)
+            parked.release()
+            metrics.incr("voice.reconnect.evicted.expired")
+
+    def _evict(self):
+        # Longest-parked first; a call bigger than max_bytes on its own goes too
+        while self._calls and (
+            len(self._calls) > self.max_parked or self.parked_bytes > self.max_bytes
+        ):
+            call_id = next(iter(self._calls))
+            self._pop(call_id).release()
+            metrics.incr("voice.reconnect.evicted.capacity")
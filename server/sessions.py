@@ -0,0 +1,224 @@
+"""
+Server-side history for /chat sessions.
+
+A client creates a session (POST /chat/sessions) and then posts only its new
+messages. MemorySessionStore (default) keeps sessions in a TTL-bounded LRU;
+RedisSessionStore (CHAT_SESSION_REDIS_URL) keeps the history in Redis so
+every worker sees every session. A message is handled inside
+`async with store.turn(session)`, which serializes turns on one session
+across workers. History is capped at CHAT_SESSION_MAX_MESSAGES.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from metrics import metrics
+
+DEFAULT_TTL_S = 1800.0
+DEFAULT_MAX_SESSIONS = 1000
+DEFAULT_MAX_MESSAGES = 200
+# Longest a turn holds a session's Redis lock; a worker that dies mid-turn
+# blocks the session for at most this long
+DEFAULT_LOCK_TTL_S = 120.0
+LOCK_POLL_S = 0.05
+
+# KEYS[1] = lock, ARGV[1] = the holder's token. Deletes the lock only if this
+# holder still owns it, in one step, so a lock that expired and was taken by
+# another worker in between is left alone.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class ChatSession:
+    session_id: str
+    messages: List[Dict[str, str]] = field(default_factory=list)
+    last_used: float = field(default_factory=time.monotonic)
+    # Per-process state, never persisted
+    client: Any = field(default=None, repr=False, compare=False)
+    # One message at a time per session, so turns can't interleave
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+
+    def extend(self, new_messages: List[Dict[str, str]], max_messages: int):
+        """Append a finished exchange, keeping only the newest max_messages."""
+        self.messages = (self.messages + new_messages)[-max_messages:]
+
+
+def new_session_id() -> str:
+    return uuid.uuid4().hex
+
+
+class MemorySessionStore:
+    def __init__(
+        self,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        ttl_s: float = DEFAULT_TTL_S,
+        clock=time.monotonic,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_s = ttl_s
+        self.clock = clock
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    async def create(self) -> ChatSession:
+        session = ChatSession(new_session_id(), last_used=self.clock())
+        await self.save(session)
+        metrics.incr("chat.sessions.created")
+        return session
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        session = self._sessions.get(session_id)
+        if session is not None and self._expired(session):
+            del self._sessions[session_id]
+            metrics.incr("chat.sessions.evicted.ttl")
+            session = None
+        if session is None:
+            metrics.incr("chat.sessions.misses")
+            return None
+        session.last_used = self.clock()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    async def save(self, session: ChatSession):
+        session.last_used = self.clock()
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        self._evict()
+
+    async def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    @asynccontextmanager
+    async def turn(self, session: ChatSession) -> AsyncIterator[ChatSession]:
+        """Hold a session for one exchange."""
+        async with session.lock:
+            yield session
+
+    def _expired(self, session: ChatSession) -> bool:
+        return self.clock() - session.last_used > self.ttl_s
+
+    def _evict(self):
+        # Least recently used first; expired sessions go regardless of the cap
+        while self._sessions:
+            session_id, oldest = next(iter(self._sessions.items()))
+            if self._expired(oldest):
+                metrics.incr("chat.sessions.evicted.ttl")
+            elif len(self._sessions) > self.max_sessions:
+                metrics.incr("chat.sessions.evicted.lru")
+            else:
+                break
+            del self._sessions[session_id]
+
+
+class RedisSessionStore:
+    def __init__(
+        self,
+        client: Any,
+        ttl_s: float = DEFAULT_TTL_S,
+        prefix: str = "chat-session:",
+        max_local: int = DEFAULT_MAX_SESSIONS,
+        lock_ttl_s: float = DEFAULT_LOCK_TTL_S,
+    ):
+        self.client = client
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+        self.max_local = max(1, max_local)
+        self.lock_ttl_s = lock_ttl_s
+        # This worker's ChatSession objects (lock, LlmClient), least recently used first
+        self._local: "OrderedDict[str, ChatSession]" = OrderedDict()
+
+    def _key(self, session_id: str) -> str:
+        return self.prefix + session_id
+
+    def _cache(self, session: ChatSession) -> ChatSession:
+        self._local[session.session_id] = session
+        self._local.move_to_end(session.session_id)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+        return session
+
+    async def _load(self, session_id: str) -> Optional[List[Dict[str, str]]]:
+        raw = await self.client.get(self._key(session_id))
+        return None if raw is None else json.loads(raw)["messages"]
+
+    async def create(self) -> ChatSession:
+        session = ChatSession(new_session_id())
+        await self.save(session)
+        metrics.incr("chat.sessions.created")
+        return session
+
+    async def get(self, session_id: str) -> Optional[ChatSession]:
+        messages = await self._load(session_id)
+        if messages is None:
+            self._local.pop(session_id, None)
+            metrics.incr("chat.sessions.misses")
+            return None
+        session = self._local.get(session_id)
+        if session is None:
+            session = ChatSession(session_id, messages=messages)
+        elif not session.lock.locked():
+            # Another worker may have added to it; a turn in progress reloads itself
+            session.messages = messages
+        return self._cache(session)
+
+    async def save(self, session: ChatSession):
+        # Saving refreshes the expiry, like a use of the in-memory session
+        await self.client.set(
+            self._key(session.session_id),
+            json.dumps({"messages": session.messages}),
+            ex=max(1, int(self.ttl_s)),
+        )
+        self._cache(session)
+
+    async def delete(self, session_id: str) -> bool:
+        self._local.pop(session_id, None)
+        return bool(await self.client.delete(self._key(session_id)))
+
+    @asynccontextmanager
+    async def turn(self, session: ChatSession) -> AsyncIterator[ChatSession]:
+        """Hold a session for one exchange, across workers."""
+        lock_key = self._key(session.session_id) + ":lock"
+        token = uuid.uuid4().hex
+        async with session.lock:
+            while not await self.client.set(lock_key, token, nx=True, px=int(self.lock_ttl_s * 1000)):
+                await asyncio.sleep(LOCK_POLL_S)
+            try:
+                # The history as the previous holder (on any worker) left it
+                messages = await self._load(session.session_id)
+                if messages is not None:
+                    session.messages = messages
+                yield session
+            finally:
+                await self.client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+
+
+def session_store_from_env():
+    """The store the CHAT_SESSION_* environment variables describe."""
+    ttl_s = float(os.getenv("CHAT_SESSION_TTL_S", str(DEFAULT_TTL_S)))
+    max_sessions = int(os.getenv("CHAT_SESSION_MAX", str(DEFAULT_MAX_SESSIONS)))
+    redis_url = os.getenv("CHAT_SESSION_REDIS_URL")
+    if redis_url:
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("CHAT_SESSION_REDIS_URL is set but the redis package is not installed") from e
+        return RedisSessionStore(redis_asyncio.from_url(redis_url), ttl_s=ttl_s, max_local=max_sessions)
+    return MemorySessionStore(max_sessions=max_sessions, ttl_s=ttl_s)
+
+
+def max_messages_from_env() -> int:
+    return max(2, int(os.getenv("CHAT_SESSION_MAX_MESSAGES", str(DEFAULT_MAX_MESSAGES))))
@@ -1,6 +1,15 @@
-from typing import Dict
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
 from fastapi import WebSocket
 
+from custom_types import ResponseResponse
+from metrics import metrics
+from wire import is_delta, send_event
+
 
 # Manages WebSocket connections across multiple clients and tracks state
 class ConnectionManager:
@@ -29,4 +38,142 @@ class ConnectionManager:
             await connection.send_json(data)
 
 
+def _merge(first: ResponseResponse, second: ResponseResponse) -> ResponseResponse:
+    return ResponseResponse(
+        response_id=first.response_id,
+        content=first.content + second.content,
+        content_complete=False,
+        end_call=False,
+    )
+
+
+class ConnectionWriter:
+    """Owns every send on one Retell websocket.
+
+    send() only queues the event; a single writer task encodes and writes in
+    order. While the socket is behind, pending content deltas of a response
+    are coalesced and deltas of a superseded response are dropped. Past
+    max_pending queued events the queue is compacted, and if it is still
+    over, the socket is closed with 1011.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_pending: Optional[int] = None,
+    ):
+        self.websocket = websocket
+        if max_pending is None:
+            max_pending = int(os.getenv("VOICE_SEND_MAX_PENDING", "64"))
+        self.max_pending = max(1, max_pending)
+        self.closed = False
+        self.latest_response_id = -1
+        self._pending: Deque[Tuple[Any, float]] = deque()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Task] = None
+
+    def send(self, event: Any) -> bool:
+        """Queue an outbound event. False once the writer has shut down."""
+        if self.closed:
+            return False
+        if type(event) is ResponseResponse and type(event.response_id) is int:
+            self.latest_response_id = max(self.latest_response_id, event.response_id)
+        self._pending.append((event, time.perf_counter()))
+        if len(self._pending) > self.max_pending:
+            self._relieve()
+            if self.closed:
+                return False
+        self._idle.clear()
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return True
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def _stale(self, event: Any) -> bool:
+        return is_delta(event) and event.response_id < self.latest_response_id
+
+    def _compact(self):
+        compacted: Deque[Tuple[Any, float]] = deque()
+        for event, enqueued in self._pending:
+            if self._stale(event):
+                metrics.incr("voice.send.stale")
+                continue
+            if compacted and is_delta(event):
+                previous, first_enqueued = compacted[-1]
+                if is_delta(previous) and previous.response_id == event.response_id:
+                    compacted[-1] = (_merge(previous, event), first_enqueued)
+                    metrics.incr("voice.send.coalesced")
+                    continue
+            compacted.append((event, enqueued))
+        self._pending = compacted
+
+    def _relieve(self):
+        """Bring the queue back under the high-water mark, or close the socket."""
+        # Only stale deltas go; still over means the consumer can't keep up
+        self._compact()
+        if len(self._pending) > self.max_pending:
+            self._shut(slow_consumer=True)
+
+    def _shut(self, slow_consumer: bool = False):
+        self.closed = True
+        self._pending.clear()
+        self._idle.set()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        if slow_consumer:
+            metrics.incr("voice.send.slow_consumer_closes")
+            print("Closing websocket: send queue over its high-water mark", flush=True)
+            self._closing = asyncio.create_task(self.websocket.close(1011, "Slow consumer"))
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._idle.set()
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            event, enqueued = self._pending.popleft()
+            if self._stale(event):
+                metrics.incr("voice.send.stale")
+                continue
+            # Deltas that queued up behind this one go out in the same frame
+            while (
+                is_delta(event)
+                and self._pending
+                and is_delta(self._pending[0][0])
+                and self._pending[0][0].response_id == event.response_id
+            ):
+                event = _merge(event, self._pending.popleft()[0])
+                metrics.incr("voice.send.coalesced")
+            started = time.perf_counter()
+            metrics.observe("voice.send.queue_ms", (started - enqueued) * 1000)
+            try:
+                await send_event(self.websocket, event)
+            except Exception as e:
+                # The receive loop sees the disconnect; stop writing
+                print(f"Websocket send failed: {e}", flush=True)
+                self._shut()
+                return
+            metrics.observe("voice.send.write_ms", (time.perf_counter() - started) * 1000)
+
+    async def flush(self):
+        """Wait until everything queued so far has been written."""
+        await self._idle.wait()
+
+    async def aclose(self):
+        """Stop the writer; anything still queued is discarded."""
+        if not self.closed:
+            self._shut()
+        tasks = [task for task in (self._task, self._closing) if task is not None]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
 manager = ConnectionManager()
@@ -0,0 +1,200 @@
+"""
+Speculative work on update_only frames.
+
+When the growing user utterance looks finished, the Speculator starts the
+turn early: "prefetch" prechecks the input guardrail, "generate" drafts the
+whole response into a buffer. If the response_required transcript matches,
+take() claims the draft, applying its deferred state updates
+(DeferredEffects) and replaying its events; otherwise the draft is cancelled.
+A draft only runs if a "voice" admission slot is free right now.
+"""
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+from custom_types import ResponseRequiredRequest
+from metrics import metrics
+
+SPECULATION_MODES = ("0", "prefetch", "generate")
+
+END_PUNCTUATION = re.compile(r"[.?!]\s*$")
+
+# Placeholder until the real response_id is known
+SPECULATIVE_RESPONSE_ID = -1
+
+_DONE = object()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def looks_stable(previous: Optional[str], text: str, turntaking: Optional[str] = None) -> bool:
+    """Guess whether the user has finished the utterance.
+
+    Any of: Retell hinting it is the agent's turn, the utterance ending in
+    sentence punctuation, or the utterance not changing between two updates.
+    """
+    if not text.strip():
+        return False
+    if turntaking == "agent_turn":
+        return True
+    if END_PUNCTUATION.search(text):
+        return True
+    return previous is not None and _normalize(previous) == _normalize(text)
+
+
+class DeferredEffects:
+    """Call-state updates (page, response chain, turn metrics) from a generated
+    draft, held back until take() claims it; a discarded draft leaves no trace."""
+
+    def __init__(self):
+        self.claimed = False
+        self._pending: List[Callable[[], Any]] = []
+
+    def add(self, effect: Callable[[], Any]):
+        if self.claimed:
+            effect()
+        else:
+            self._pending.append(effect)
+
+    def claim(self):
+        """Apply what the draft did so far; later updates apply as they happen."""
+        self.claimed = True
+        pending, self._pending = self._pending, []
+        for effect in pending:
+            effect()
+
+
+@dataclass
+class SpeculativeDraft:
+    key: Tuple[int, str]
+    started: float
+    generate: bool
+    events: "asyncio.Queue[Any]" = field(default_factory=asyncio.Queue)
+    effects: DeferredEffects = field(default_factory=DeferredEffects)
+    task: Optional[asyncio.Task] = None
+    finished: Optional[float] = None
+
+    def cancel(self):
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+
+class Speculator:
+    """Per-call speculative drafting driven by update_only frames."""
+
+    def __init__(self, llm_client, generate: bool = False, admission=None):
+        self.llm_client = llm_client
+        self.generate = generate
+        self.admission = admission
+        self._last_text: Optional[str] = None
+        self._draft: Optional[SpeculativeDraft] = None
+
+    def observe(self, turntaking: Optional[str] = None):
+        """Inspect the call transcript after an update_only frame was synced."""
+        utterances = self.llm_client.transcript.utterances
+        if not utterances or utterances[-1].role != "user":
+            self._last_text = None
+            return
+
+        text = utterances[-1].content
+        stable = looks_stable(self._last_text, text, turntaking)
+        self._last_text = text
+
+        key = (len(utterances), _normalize(text))
+        if self._draft is not None and self._draft.key != key:
+            # The user kept talking; the draft can no longer match
+            self.discard()
+            metrics.incr("speculation.discarded")
+        if not stable or self._draft is not None:
+            return
+        if self.generate and self.admission is not None and not self.admission.try_acquire("voice"):
+            metrics.incr("speculation.skipped_busy")
+            return
+
+        request = ResponseRequiredRequest.model_construct(
+            interaction_type="response_required",
+            response_id=SPECULATIVE_RESPONSE_ID,
+            transcript=list(utterances),
+        )
+        draft = SpeculativeDraft(key=key, started=time.perf_counter(), generate=self.generate)
+        draft.task = asyncio.create_task(self._run(draft, request))
+        if self.generate and self.admission is not None:
+            # A done callback, since a task cancelled before it starts never runs _run's finally
+            draft.task.add_done_callback(lambda _: self.admission.release("voice"))
+        self._draft = draft
+        metrics.incr("speculation.started")
+
+    async def _run(self, draft: SpeculativeDraft, request: ResponseRequiredRequest):
+        try:
+            if draft.generate:
+                # The run checks the guardrail itself, in parallel with the model
+                # The run uses the slot observe() took for it
+                stream = self.llm_client.draft_response(
+                    request, effects=draft.effects, admitted=self.admission is not None
+                )
+                async for event in stream:
+                    draft.events.put_nowait(event)
+            else:
+                await self.llm_client.precheck_guardrail(request)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Speculative draft failed: {e}", flush=True)
+        finally:
+            draft.finished = time.perf_counter()
+            draft.events.put_nowait(_DONE)
+
+    def take(self, request: ResponseRequiredRequest) -> Optional[AsyncIterator[Any]]:
+        """Claim the speculative draft for a response turn.
+
+        Returns an event stream to use instead of draft_response() when a
+        generated draft matches, or None to run the turn normally (a matching
+        guardrail-only precheck has already warmed the verdict cache).
+        """
+        draft, self._draft = self._draft, None
+        self._last_text = None
+        if draft is None:
+            return None
+
+        transcript = request.transcript
+        matches = (
+            request.interaction_type == "response_required"
+            and bool(transcript)
+            and transcript[-1].role == "user"
+            and (len(transcript), _normalize(transcript[-1].content)) == draft.key
+        )
+        if not matches:
+            draft.cancel()
+            metrics.incr("speculation.misses")
+            return None
+
+        now = time.perf_counter()
+        metrics.incr("speculation.hits")
+        metrics.observe("speculation.saved_ms", (min(now, draft.finished or now) - draft.started) * 1000)
+        if not draft.generate:
+            return None
+        draft.effects.claim()
+        return self._replay(draft, request.response_id)
+
+    async def _replay(self, draft: SpeculativeDraft, response_id: int):
+        try:
+            while True:
+                event = await draft.events.get()
+                if event is _DONE:
+                    return
+                if hasattr(event, "response_id"):
+                    event.response_id = response_id
+                yield event
+        finally:
+            draft.cancel()
+
+    def discard(self):
+        """Drop any in-flight speculation (new utterance, call ended, ...)."""
+        if self._draft is not None:
+            self._draft.cancel()
+            self._draft = None
@@ -0,0 +1,110 @@
+"""
+Per-call supervision of the work inbound frames start.
+
+CallSupervisor runs each kind of frame in its own lane:
+
+- response lane (response_required / reminder_required): one active task,
+  latest wins; a new turn cancels the running one and waits for it to unwind,
+- fast lane (call_details): handled inline on the receive loop,
+- background lane (update_only for the speculator, unclassified frames): a
+  bounded queue drained in order by one worker, dropping the oldest when full.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Set
+
+from metrics import metrics
+
+RESPONSE_KINDS = frozenset({"response_required", "reminder_required"})
+FAST_KINDS = frozenset({"call_details"})
+
+DEFAULT_MAX_QUEUED = 8
+
+
+class CallSupervisor:
+    def __init__(
+        self,
+        handler: Callable[[str], Awaitable[None]],
+        max_queued: Optional[int] = None,
+    ):
+        self.handler = handler
+        if max_queued is None:
+            max_queued = int(os.getenv("VOICE_MAX_QUEUED_FRAMES", str(DEFAULT_MAX_QUEUED)))
+        self.max_queued = max(1, max_queued)
+        # The task currently streaming a response; a newer response turn cancels it
+        self.active: Optional[asyncio.Task] = None
+        self._queue: Deque[str] = deque()
+        self._wakeup = asyncio.Event()
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, kind: str, raw: str):
+        """Route one frame (its peeked interaction_type and raw text) to its lane."""
+        if kind in RESPONSE_KINDS:
+            self._respond(raw)
+        elif kind in FAST_KINDS:
+            await self.handler(raw)
+        else:
+            self._enqueue(raw)
+
+    def _respond(self, raw: str):
+        previous = self.active
+        self.active = self._track(asyncio.create_task(self._run_response(previous, raw)))
+
+    async def _run_response(self, previous: Optional[asyncio.Task], raw: str):
+        await self._supersede(previous)
+        await self.handler(raw)
+
+    @staticmethod
+    async def _supersede(previous: Optional[asyncio.Task]):
+        """Cancel an in-flight response task and wait for it to unwind."""
+        if previous is None or previous.done():
+            return
+        started = time.perf_counter()
+        previous.cancel()
+        await asyncio.gather(previous, return_exceptions=True)
+        metrics.incr("voice.superseded_responses")
+        metrics.observe("voice.turnover_ms", (time.perf_counter() - started) * 1000)
+
+    def _enqueue(self, raw: str):
+        if len(self._queue) >= self.max_queued:
+            self._queue.popleft()
+            metrics.incr("voice.supervisor.dropped")
+        self._queue.append(raw)
+        metrics.observe("voice.supervisor.queue_depth", len(self._queue))
+        self._wakeup.set()
+        if self._worker is None:
+            self._worker = self._track(asyncio.create_task(self._drain()))
+
+    async def _drain(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._queue:
+                try:
+                    await self.handler(self._queue.popleft())
+                except Exception as e:
+                    # Keep the lane alive; the handler logs its own failures
+                    print(f"Background frame failed: {e}", flush=True)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _track(self, task: asyncio.Task) -> asyncio.Task:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def close(self):
+        """Cancel every task this call started and wait for them to finish."""
+        self._queue.clear()
+        tasks = list(self._tasks)
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
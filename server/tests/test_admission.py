@@ -0,0 +1,145 @@
+"""
+Tests for admission.py - the process-wide LLM admission scheduler.
+"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionRejected, AdmissionScheduler, parse_class_values
+from metrics import metrics
+
+
+def scheduler(limit=1, timeouts_ms=None, **class_limits):
+    limits = {"voice": limit, "text": limit, "summary": limit}
+    limits.update(class_limits)
+    return AdmissionScheduler(
+        limit=limit,
+        class_limits=limits,
+        timeouts_ms=timeouts_ms or {"voice": 1000, "text": 1000, "summary": 1000},
+    )
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestParseClassValues:
+    """Tests for parse_class_values."""
+
+    def test_overrides_named_classes(self):
+        """Test that named classes override defaults and unknown names are ignored."""
+        parsed = parse_class_values("voice=8, text=2,bogus=1", {"voice": 1, "text": 1, "summary": 1})
+        assert parsed == {"voice": 8.0, "text": 2.0, "summary": 1}
+
+    def test_unset(self):
+        """Test that an unset variable keeps the defaults."""
+        assert parse_class_values(None, {"voice": 3}) == {"voice": 3}
+
+
+class TestAdmissionScheduler:
+    """Tests for AdmissionScheduler."""
+
+    async def test_admits_within_limits(self):
+        """Test that requests under the limits are admitted at once."""
+        gate = scheduler(limit=2)
+        async with gate.slot("text"):
+            async with gate.slot("voice"):
+                assert gate.in_flight == 2
+        assert gate.in_flight == 0
+
+    async def test_voice_admitted_before_earlier_text(self):
+        """Test that a freed slot goes to a waiting voice turn ahead of older text waiters."""
+        gate = scheduler(limit=1)
+        order = []
+
+        async def run(kind):
+            async with gate.slot(kind):
+                order.append(kind)
+
+        await gate.acquire("summary")
+        tasks = [asyncio.create_task(run(kind)) for kind in ("text", "summary", "voice")]
+        await settle()
+        assert gate.snapshot()["classes"]["text"]["queued"] == 1
+
+        gate.release("summary")
+        await asyncio.gather(*tasks)
+
+        assert order == ["voice", "text", "summary"]
+
+    async def test_class_limit_leaves_room_for_voice(self):
+        """Test that text can't exceed its class limit even with free total capacity."""
+        gate = scheduler(limit=3, text=1, timeouts_ms={"voice": 1000, "text": 20, "summary": 1000})
+        await gate.acquire("text")
+
+        with pytest.raises(AdmissionRejected):
+            await gate.acquire("text")
+        await gate.acquire("voice")
+
+        assert gate.snapshot()["classes"]["voice"]["in_flight"] == 1
+
+    async def test_queue_timeout_rejects(self):
+        """Test that a waiter past its class timeout is rejected and leaves the queue."""
+        gate = scheduler(limit=1, timeouts_ms={"voice": 1000, "text": 1000, "summary": 20})
+        before = metrics.counters["admission.summary.rejected"]
+        await gate.acquire("voice")
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await gate.acquire("summary")
+
+        assert rejected.value.kind == "summary"
+        assert gate.queued("summary") == 0
+        assert metrics.counters["admission.summary.rejected"] == before + 1
+        gate.release("voice")
+        assert gate.in_flight == 0
+
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a caller cancelled while queued doesn't hold a slot later."""
+        gate = scheduler(limit=1)
+        await gate.acquire("voice")
+        waiter = asyncio.create_task(gate.acquire("text"))
+        await settle()
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        gate.release("voice")
+
+        assert gate.in_flight == 0
+        assert gate.queued("text") == 0
+
+    async def test_try_acquire_takes_only_a_free_slot(self):
+        """Test that try_acquire never queues and leaves slots to waiting requests."""
+        gate = scheduler(limit=1)
+        assert gate.try_acquire("voice")
+        assert not gate.try_acquire("voice")
+
+        waiter = asyncio.create_task(gate.acquire("text"))
+        await settle()
+        gate.release("voice")
+        await waiter
+        gate.release("text")
+
+        assert gate.try_acquire("voice")
+        gate.release("voice")
+        assert gate.in_flight == 0
+
+    async def test_try_acquire_yields_to_queued_requests(self):
+        """Test that try_acquire refuses a slot while any request is queued."""
+        gate = scheduler(limit=2, text=1)
+        await gate.acquire("text")
+        waiter = asyncio.create_task(gate.acquire("text"))
+        await settle()
+
+        assert not gate.try_acquire("voice")
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert gate.try_acquire("voice")
+
+    async def test_records_wait_time(self):
+        """Test that admitted requests record their queue wait."""
+        gate = scheduler(limit=1)
+        before = metrics.summary("admission.voice.wait_ms")["count"]
+        async with gate.slot("voice"):
+            pass
+        assert metrics.summary("admission.voice.wait_ms")["count"] == before + 1
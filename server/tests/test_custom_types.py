@@ -1,5 +1,5 @@
 """
-Tests for Pydantic models in custom_types.py.
+Tests for the inbound Pydantic models and outbound event dataclasses in custom_types.py.
 """
 
 import pytest
@@ -232,3 +232,22 @@ class TestConfigResponse:
         )
         assert response.response_type == "config"
         assert response.config["auto_reconnect"] is True
+
+
+class TestOutboundEvents:
+    """Tests for the dataclass outbound events."""
+
+    def test_events_are_slotted(self):
+        """Test that events carry no per-instance __dict__."""
+        response = ResponseResponse(response_id=1, content="Hi", content_complete=False)
+        assert not hasattr(response, "__dict__")
+
+    def test_fields_are_keyword_only(self):
+        """Test that events can't be built positionally."""
+        with pytest.raises(TypeError):
+            ResponseResponse("response", 1, "Hi", False)
+
+    def test_model_dump_keeps_field_order(self):
+        """Test that model_dump lists fields in declaration order."""
+        chunk = TextChatStreamChunk(type="status", content="Searching projects...")
+        assert list(chunk.model_dump()) == ["type", "content", "metadata"]
@@ -0,0 +1,129 @@
+"""
+Tests for filler.py - filler speech while slow tools run.
+"""
+
+import asyncio
+
+import pytest
+
+from filler import FILLER_LINES, IDLE, ToolLatencyMask, with_idle
+from metrics import metrics
+
+
+class TestToolLatencyMask:
+    """Tests for ToolLatencyMask."""
+
+    def test_fast_tools_are_ignored(self):
+        """Test that non-slow tools never get a filler."""
+        mask = ToolLatencyMask(after_ms=0.001)
+        mask.invoked("c1", "display_resume_page")
+
+        assert mask.timeout() is None
+        assert mask.due() is None
+
+    def test_filler_due_after_threshold(self):
+        """Test that a slow tool outlasting the threshold gets one filler."""
+        mask = ToolLatencyMask(after_ms=0.001)
+        mask.invoked("c1", "search_projects")
+        asyncio.run(asyncio.sleep(0.005))
+
+        line = mask.due()
+
+        assert line in FILLER_LINES
+        assert mask.due() is None  # only once per call
+        assert mask.timeout() is None
+
+    def test_not_due_before_threshold(self):
+        """Test that a slow tool within the threshold is exempt."""
+        before = metrics.counters["voice.filler_exempt"]
+        mask = ToolLatencyMask(after_ms=10_000)
+        mask.invoked("c1", "get_project_details")
+
+        assert mask.due() is None
+        assert mask.timeout() > 0
+
+        mask.completed("c1")
+        assert mask.timeout() is None
+        assert metrics.counters["voice.filler_exempt"] == before + 1
+
+    def test_model_lead_in_suppresses_filler(self):
+        """Test that no filler follows the model's own lead-in."""
+        mask = ToolLatencyMask(after_ms=0.001)
+        mask.spoke()
+        mask.invoked("c1", "search_projects")
+
+        assert mask.timeout() is None
+
+    def test_disabled(self):
+        """Test that a zero threshold disables fillers."""
+        mask = ToolLatencyMask(after_ms=0)
+        mask.invoked("c1", "search_projects")
+
+        assert mask.timeout() is None
+
+    def test_lines_do_not_repeat_back_to_back(self):
+        """Test that consecutive fillers use different lines."""
+        mask = ToolLatencyMask(after_ms=0.001)
+        lines = []
+        for i in range(10):
+            mask.invoked(f"c{i}", "search_projects")
+            asyncio.run(asyncio.sleep(0.002))
+            lines.append(mask.due())
+            mask.completed(f"c{i}")
+
+        assert all(a != b for a, b in zip(lines, lines[1:]))
+
+
+@pytest.mark.asyncio
+class TestWithIdle:
+    """Tests for with_idle."""
+
+    async def test_passes_events_through(self):
+        """Test that events pass straight through with nothing pending."""
+
+        async def events():
+            yield 1
+            yield 2
+
+        assert [e async for e in with_idle(events(), ToolLatencyMask(after_ms=0))] == [1, 2]
+
+    async def test_yields_idle_while_tool_is_slow(self):
+        """Test that IDLE is yielded when a filler comes due mid-wait."""
+        mask = ToolLatencyMask(after_ms=10)
+
+        async def events():
+            mask.invoked("c1", "search_projects")
+            yield "tool_called"
+            await asyncio.sleep(0.05)
+            yield "tool_output"
+
+        seen = []
+        async for event in with_idle(events(), mask):
+            if event is IDLE:
+                seen.append(mask.due() is not None)
+            else:
+                seen.append(event)
+
+        assert seen == ["tool_called", True, "tool_output"]
+
+    async def test_close_cancels_pending_step(self):
+        """Test that closing mid-wait cancels the in-flight step."""
+        mask = ToolLatencyMask(after_ms=10)
+        cancelled = []
+
+        async def events():
+            mask.invoked("c1", "search_projects")
+            yield "tool_called"
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+            yield "never"
+
+        stream = with_idle(events(), mask)
+        assert await stream.__anext__() == "tool_called"
+        assert await stream.__anext__() is IDLE
+        await stream.aclose()
+
+        assert cancelled == [True]
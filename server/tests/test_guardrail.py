@@ -102,6 +102,26 @@ class TestSecurityGuardrail:
         assert result.output_info.is_jailbreak is True
         mock_runner.run.assert_called_once()
 
+    async def test_guardrail_verdict_is_cached(self, mock_runner):
+        """Test that a repeated LLM check reuses the cached verdict."""
+        ctx = MagicMock(spec=RunContextWrapper)
+        ctx.context = MagicMock()
+        agent = MagicMock()
+        input_data = "What is the airspeed of an unladen swallow"
+
+        mock_result = MagicMock()
+        mock_result.final_output_as.return_value = JailbreakCheckOutput(
+            is_jailbreak=False,
+            reasoning="Harmless small talk"
+        )
+        mock_runner.run = AsyncMock(return_value=mock_result)
+
+        first = await security_guardrail.guardrail_function(ctx, agent, input_data)
+        second = await security_guardrail.guardrail_function(ctx, agent, input_data)
+
+        assert first is second
+        mock_runner.run.assert_called_once()
+
 
 @pytest.mark.asyncio
 class TestLlmClientGuardrailIntegration:
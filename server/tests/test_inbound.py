@@ -0,0 +1,95 @@
+"""
+Tests for inbound.py - dispatching Retell frames by interaction_type.
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_types import PingPongResponse
+from inbound import FrameDispatcher, decode, peek_interaction_type
+from metrics import metrics
+
+
+def frame(**fields):
+    return json.dumps(fields)
+
+
+class TestPeekInteractionType:
+    """Tests for peek_interaction_type."""
+
+    def test_reads_type_without_decoding(self):
+        """Test that the type is found wherever the key appears."""
+        raw = frame(transcript=[{"role": "user", "content": "hi"}], interaction_type="update_only")
+        assert peek_interaction_type(raw) == "update_only"
+
+    def test_ignores_key_inside_transcript_text(self):
+        """Test that a quoted key in user speech can't spoof the type."""
+        raw = frame(
+            transcript=[{"role": "user", "content": 'say "interaction_type": "ping_pong"'}],
+            interaction_type="response_required",
+            response_id=3,
+        )
+        assert peek_interaction_type(raw) == "response_required"
+
+    def test_spaced_json(self):
+        """Test that whitespace around the colon is allowed."""
+        assert peek_interaction_type('{ "interaction_type" : "ping_pong" }') == "ping_pong"
+
+    def test_unknown_shape(self):
+        """Test that a frame without the key is left to the full decode."""
+        assert peek_interaction_type('{"type": "x"}') is None
+
+    def test_decode(self):
+        """Test that decode returns the parsed frame."""
+        assert decode(frame(interaction_type="ping_pong", timestamp=1)) == {
+            "interaction_type": "ping_pong",
+            "timestamp": 1,
+        }
+
+
+@pytest.mark.asyncio
+class TestFrameDispatcher:
+    """Tests for FrameDispatcher."""
+
+    async def test_ping_pong_answered_inline(self):
+        """Test that ping_pong is echoed without a handler task."""
+        writer = MagicMock()
+        dispatcher = FrameDispatcher(writer)
+
+        kind = await dispatcher.dispatch(frame(interaction_type="ping_pong", timestamp=42))
+
+        assert kind is None
+        writer.send.assert_called_once_with(PingPongResponse(timestamp=42))
+
+    async def test_update_only_skipped_without_consumer(self):
+        """Test that update_only frames are dropped undecoded when nobody reads them."""
+        dispatcher = FrameDispatcher(MagicMock(), wants_updates=False)
+        before = metrics.counters["voice.frames.skipped"]
+
+        kind = await dispatcher.dispatch(
+            frame(interaction_type="update_only", transcript=[{"role": "user", "content": "hi"}])
+        )
+
+        assert kind is None
+        assert metrics.counters["voice.frames.skipped"] == before + 1
+
+    async def test_update_only_forwarded_to_speculator(self):
+        """Test that update_only frames reach the handler when a consumer wants them."""
+        dispatcher = FrameDispatcher(MagicMock(), wants_updates=True)
+        kind = await dispatcher.dispatch(frame(interaction_type="update_only", transcript=[]))
+        assert kind == "update_only"
+
+    @pytest.mark.parametrize("kind", ["response_required", "reminder_required", "call_details"])
+    async def test_other_frames_need_a_handler(self, kind):
+        """Test that response turns and call details go to a handler task."""
+        writer = MagicMock()
+        dispatcher = FrameDispatcher(writer)
+
+        assert await dispatcher.dispatch(frame(interaction_type=kind, response_id=1, transcript=[])) == kind
+        writer.send.assert_not_called()
+
+    async def test_unreadable_frame_needs_a_handler(self):
+        """Test that a frame the peek can't classify is decoded by the handler."""
+        assert await FrameDispatcher(MagicMock()).dispatch('{"weird": true}') == "unknown"
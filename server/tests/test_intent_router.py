@@ -0,0 +1,105 @@
+"""
+Tests for intent_router.py - local navigation fast path.
+"""
+
+import json
+import pytest
+
+from intent_router import navigation_metadata, route
+
+
+class TestRoute:
+    """Tests for route()."""
+
+    @pytest.mark.parametrize(
+        "text,tool",
+        [
+            ("show me your education", "display_education_page"),
+            ("Go to the resume.", "display_resume_page"),
+            ("open the hackathon map", "display_hackathons_page"),
+            ("take me home", "display_homepage"),
+            ("Open up the landing page", "display_landing_page"),
+            ("show me how it works", "display_architecture_page"),
+            ("Okay, can you pull up your CV?", "display_resume_page"),
+        ],
+    )
+    def test_matches_navigation_commands(self, text, tool):
+        """Test that plain navigation commands are routed locally."""
+        match = route(text)
+
+        assert match is not None
+        assert match.tool == tool
+        assert match.confidence == 1.0
+
+    @pytest.mark.parametrize(
+        "text,tool",
+        [
+            ("can you show me your resumay", "display_resume_page"),
+            ("show me your edgucation", "display_education_page"),
+            ("show me the hack a thon map", "display_hackathons_page"),
+        ],
+    )
+    def test_tolerates_transcription_errors(self, text, tool):
+        """Test fuzzy matching of misheard page names."""
+        match = route(text)
+
+        assert match is not None
+        assert match.tool == tool
+        assert match.confidence < 1.0
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "tell me about your education",
+            "What projects have you built?",
+            "show me your education and your projects",
+            "open the interviewgpt project",
+            "show me something cool",
+            "show me the school you went to in high school and college",
+            "show me",
+            "",
+        ],
+    )
+    def test_defers_to_agent(self, text):
+        """Test that questions, compound and unclear requests are left to the agent."""
+        assert route(text) is None
+
+    def test_match_carries_acknowledgement_and_result(self):
+        """Test that a match has a spoken acknowledgement and the tool's result text."""
+        match = route("show me your resume")
+
+        assert match.acknowledgement
+        assert match.tool_result == "Successfully displayed the resume page"
+        assert json.loads(match.arguments) == {}
+        assert match.page == "resume"
+
+
+class TestNavigationMetadata:
+    """Tests for navigation_metadata()."""
+
+    def test_page_tools(self):
+        """Test metadata for the page tools."""
+        assert navigation_metadata("display_hackathons_page", "") == {
+            "type": "navigation",
+            "page": "hackathon",
+        }
+        assert navigation_metadata("display_homepage", "")["page"] == "personal"
+
+    def test_project_tool(self):
+        """Test that display_project carries the project ID."""
+        assert navigation_metadata("display_project", '{"id": "dispatch-ai"}') == {
+            "type": "navigation",
+            "page": "project",
+            "project_id": "dispatch-ai",
+        }
+
+    def test_project_tool_bad_arguments(self):
+        """Test that unparseable arguments still navigate to the project page."""
+        assert navigation_metadata("display_project", "{not json") == {
+            "type": "navigation",
+            "page": "project",
+        }
+
+    def test_non_navigation_tool(self):
+        """Test that search tools produce no navigation."""
+        assert navigation_metadata("search_projects", "{}") is None
@@ -0,0 +1,184 @@
+"""
+Tests for latency_policy.py - per-turn model and budget selection.
+"""
+
+import pytest
+
+from latency_policy import (
+    COMPLEX,
+    SIMPLE,
+    STANDARD,
+    LatencyPolicy,
+    TtftTracker,
+    classify_complexity,
+)
+
+
+class TestClassifyComplexity:
+    """Tests for classify_complexity."""
+
+    @pytest.mark.parametrize("text", ["hi", "thanks!", "okay cool", ""])
+    def test_simple(self, text):
+        """Test greetings and short acknowledgements."""
+        assert classify_complexity(text) == SIMPLE
+
+    @pytest.mark.parametrize(
+        "text", ["what AI projects have you built", "tell me about your internship at RingCentral"]
+    )
+    def test_standard(self, text):
+        """Test ordinary questions."""
+        assert classify_complexity(text) == STANDARD
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "compare Dispatch AI and AdaptEd",
+            "walk me through how this works",
+            "what did you build? and where did you study?",
+        ],
+    )
+    def test_complex(self, text):
+        """Test comparisons, explanations and multi-part questions."""
+        assert classify_complexity(text) == COMPLEX
+
+
+class TestTtftTracker:
+    """Tests for TtftTracker."""
+
+    def test_first_sample_seeds_average(self):
+        """Test that the first observation is taken as-is."""
+        tracker = TtftTracker(alpha=0.5)
+        tracker.observe("voice", "m", 400)
+
+        assert tracker.get("voice", "m") == 400
+
+    def test_moves_toward_new_samples(self):
+        """Test the exponential weighting."""
+        tracker = TtftTracker(alpha=0.5)
+        tracker.observe("voice", "m", 400)
+        tracker.observe("voice", "m", 800)
+
+        assert tracker.get("voice", "m") == 600
+        assert tracker.get("voice", "other") is None
+
+    def test_modes_are_tracked_separately(self):
+        """Test that slow text turns don't move the voice estimate."""
+        tracker = TtftTracker()
+        tracker.observe("voice", "m", 400)
+        tracker.observe("text", "m", 5000)
+
+        assert tracker.get("voice", "m") == 400
+
+    def test_sample_after_a_gap_replaces_average(self):
+        """Test that a stale estimate is replaced rather than blended."""
+        now = [0.0]
+        tracker = TtftTracker(alpha=0.5, probe_interval_s=10, clock=lambda: now[0])
+        tracker.observe("voice", "m", 2000)
+        now[0] = 30
+
+        tracker.observe("voice", "m", 400)
+
+        assert tracker.get("voice", "m") == 400
+
+    def test_claim_probe_once_per_interval(self):
+        """Test that a model without recent samples is probed once per interval."""
+        now = [0.0]
+        tracker = TtftTracker(probe_interval_s=10, clock=lambda: now[0])
+        assert not tracker.claim_probe("voice", "m")  # never observed
+        tracker.observe("voice", "m", 2000)
+
+        now[0] = 5
+        assert not tracker.claim_probe("voice", "m")
+        now[0] = 11
+        assert tracker.claim_probe("voice", "m")
+        assert not tracker.claim_probe("voice", "m")
+        now[0] = 22
+        assert tracker.claim_probe("voice", "m")
+
+
+class TestLatencyPolicy:
+    """Tests for LatencyPolicy.decide."""
+
+    def test_disabled_returns_static_settings(self):
+        """Test that the disabled policy keeps the fixed per-mode settings."""
+        voice = LatencyPolicy("voice", enabled=False, model="m")
+        text = LatencyPolicy("text", enabled=False, model="m")
+
+        assert voice.decide("compare everything").reasoning_effort == "none"
+        assert text.decide("hi").reasoning_effort == "low"
+
+    def test_complex_turn_gets_more_budget(self):
+        """Test that harder text questions get more effort and tool time."""
+        policy = LatencyPolicy("text", enabled=True, model="m", tracker=TtftTracker())
+
+        simple = policy.decide("hi")
+        complex_ = policy.decide("compare your two best projects")
+
+        assert simple.complexity == SIMPLE
+        assert complex_.reasoning_effort == "medium"
+        assert complex_.tool_timeout > simple.tool_timeout
+
+    def test_voice_never_adds_reasoning(self):
+        """Test that voice keeps the static effort, so its TTFT can't get worse."""
+        policy = LatencyPolicy("voice", enabled=True, model="m", tracker=TtftTracker())
+
+        assert policy.decide("compare your two best projects").reasoning_effort == "none"
+
+    def test_steps_down_under_ttft_pressure(self):
+        """Test that slow recent TTFT lowers effort and tool timeouts."""
+        tracker = TtftTracker()
+        policy = LatencyPolicy("text", enabled=True, slo_ms=1000, model="m", tracker=tracker)
+        relaxed = policy.decide("compare your two best projects")
+
+        tracker.observe("text", "m", 900)
+        pressured = policy.decide("compare your two best projects")
+
+        assert pressured.reason == "ttft_pressure"
+        assert pressured.reasoning_effort == "low"
+        assert pressured.tool_timeout < relaxed.tool_timeout
+        assert pressured.model == "m"
+
+    def test_other_mode_pressure_is_ignored(self):
+        """Test that slow text turns don't step voice down."""
+        tracker = TtftTracker()
+        policy = LatencyPolicy("voice", enabled=True, slo_ms=1000, model="m", tracker=tracker)
+        tracker.observe("text", "m", 5000)
+
+        assert policy.decide("what AI projects have you built").reason == "within_budget"
+
+    def test_switches_to_fast_model_when_overloaded(self):
+        """Test that TTFT far over the SLO switches to the fast model."""
+        tracker = TtftTracker()
+        policy = LatencyPolicy(
+            "voice", enabled=True, slo_ms=1000, model="m", fast_model="fast", tracker=tracker
+        )
+        tracker.observe("voice", "m", 1500)
+
+        decision = policy.decide("what AI projects have you built")
+
+        assert decision.model == "fast"
+        assert decision.reason == "ttft_overload"
+
+    def test_probes_primary_while_on_fast_model(self):
+        """Test that an overloaded primary still gets a probe turn per interval and can recover."""
+        now = [0.0]
+        tracker = TtftTracker(probe_interval_s=10, clock=lambda: now[0])
+        policy = LatencyPolicy(
+            "voice", enabled=True, slo_ms=1000, model="m", fast_model="fast", tracker=tracker
+        )
+        tracker.observe("voice", "m", 2000)
+        assert policy.decide("what AI projects have you built").model == "fast"
+
+        now[0] = 15
+        probe = policy.decide("what AI projects have you built")
+        assert (probe.model, probe.reason) == ("m", "probe")
+        assert policy.decide("what AI projects have you built").model == "fast"
+
+        tracker.observe("voice", "m", 450)
+        assert policy.decide("what AI projects have you built").reason == "within_budget"
+
+    def test_reads_slo_from_env(self, monkeypatch):
+        """Test the per-mode SLO environment variables."""
+        monkeypatch.setenv("LLM_TEXT_SLO_MS", "1234")
+
+        assert LatencyPolicy("text", enabled=True).slo_ms == 1234
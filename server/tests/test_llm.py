@@ -250,6 +250,36 @@ class TestLlmClientPreparePrompt:
         # Empty transcript returns empty list (system prompt is in agent.instructions)
         assert len(result) == 0
 
+    @patch("llm.Agent")
+    def test_prepare_prompt_reuses_transcript_across_turns(self, mock_agent):
+        """Test that consecutive turns reuse converted history without leaking instructions."""
+        client = LlmClient(call_id="test", mode="voice")
+        first = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[
+                Utterance(role="agent", content="Hello!"),
+                Utterance(role="user", content="Tell me about Bill"),
+            ],
+        )
+        client.prepare_prompt(first)
+
+        second = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=2,
+            transcript=first.transcript + [
+                Utterance(role="agent", content="Sure."),
+                Utterance(role="user", content="And his projects?"),
+            ],
+        )
+        result = client.prepare_prompt(second)
+
+        assert client.transcript.reused == 2
+        assert result[1]["content"] == "Tell me about Bill"
+        assert result[3] == {"role": "user", "content": "And his projects?"}
+        assert result[-1]["role"] == "developer"
+        assert client.transcript.messages[3]["content"] == "And his projects?"
+
 
 class TestLlmClientPrepareFunctions:
     """Tests for prepare_functions method."""
@@ -270,7 +300,662 @@ class TestLlmClientPrepareFunctions:
             "display_project",
             "search_projects",
             "get_project_details",
+            "get_projects_details",
         }
         tool_names = {getattr(t, "name", getattr(t, "__name__", str(t))) for t in tools}
         assert tool_names == expected_tool_names
         assert len(tools) == len(expected_tool_names)
+
+
+def _fake_stream(text, response_id: str):
+    """Build a fake RunResultStreaming that streams `text` (a string or list of deltas)."""
+    from agents import RawResponsesStreamEvent
+    from agents.usage import Usage
+
+    deltas = [text] if isinstance(text, str) else text
+
+    async def events():
+        for delta in deltas:
+            yield RawResponsesStreamEvent(
+                data=MagicMock(type="response.output_text.delta", delta=delta)
+            )
+
+    result = MagicMock()
+    result.stream_events.return_value = events()
+    result.last_response_id = response_id
+    result.context_wrapper.usage = Usage(requests=1, input_tokens=100, output_tokens=10)
+    return result
+
+
+@pytest.mark.asyncio
+class TestLlmClientResponseChaining:
+    """Tests for previous_response_id chaining."""
+
+    @patch("llm.Agent")
+    async def test_chaining_disabled_by_default(self, mock_agent):
+        """Test that chaining is off unless enabled."""
+        with patch.dict("os.environ", {"LLM_CHAIN_RESPONSES": "0"}):
+            client = LlmClient(call_id="test", mode="voice")
+        assert client.chain_responses is False
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_second_turn_sends_only_new_input(self, mock_agent, mock_runner):
+        """Test that a matching transcript chains onto the last response."""
+        client = LlmClient(call_id="test", mode="voice", chain_responses=True)
+        mock_runner.run_streamed.side_effect = [
+            _fake_stream("Bill builds AI things.", "resp_1"),
+            _fake_stream("Lots of hackathons.", "resp_2"),
+        ]
+        transcript = [
+            Utterance(role="agent", content="Hello!"),
+            Utterance(role="user", content="Tell me about Bill"),
+        ]
+        first = ResponseRequiredRequest(
+            interaction_type="response_required", response_id=1, transcript=transcript
+        )
+        [e async for e in client.draft_response(first)]
+
+        second = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=2,
+            transcript=transcript + [
+                Utterance(role="agent", content="Bill builds AI things."),
+                Utterance(role="user", content="What else?"),
+            ],
+        )
+        [e async for e in client.draft_response(second)]
+
+        first_call, second_call = mock_runner.run_streamed.call_args_list
+        assert first_call.kwargs["previous_response_id"] is None
+        assert len(first_call.args[1]) == 3
+        assert second_call.kwargs["previous_response_id"] == "resp_1"
+        assert len(second_call.args[1]) == 2
+        assert second_call.args[1][0] == {"role": "user", "content": "What else?"}
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_unclaimed_speculative_run_leaves_chain_and_metrics(self, mock_agent, mock_runner):
+        """Test that a speculative run neither advances the chain nor counts as a turn until claimed."""
+        from metrics import metrics
+        from speculation import DeferredEffects
+
+        client = LlmClient(call_id="test", mode="voice", chain_responses=True)
+        mock_runner.run_streamed.return_value = _fake_stream("Bill builds AI things.", "resp_1")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=-1,
+            transcript=[Utterance(role="user", content="Tell me about Bill")],
+        )
+        before = metrics.counters["llm.turns.full"]
+        effects = DeferredEffects()
+
+        [e async for e in client.draft_response(request, effects=effects)]
+
+        assert client._chain is None
+        assert metrics.counters["llm.turns.full"] == before
+        effects.claim()
+        assert client._chain.response_id == "resp_1"
+        assert metrics.counters["llm.turns.full"] == before + 1
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_interrupted_reply_falls_back_to_full_resend(self, mock_agent, mock_runner):
+        """Test that a truncated agent turn forces a full resend."""
+        client = LlmClient(call_id="test", mode="voice", chain_responses=True)
+        mock_runner.run_streamed.side_effect = [
+            _fake_stream("Bill builds AI things all the time.", "resp_1"),
+            _fake_stream("Sure.", "resp_2"),
+        ]
+        transcript = [Utterance(role="user", content="Tell me about Bill")]
+        first = ResponseRequiredRequest(
+            interaction_type="response_required", response_id=1, transcript=transcript
+        )
+        [e async for e in client.draft_response(first)]
+
+        second = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=2,
+            transcript=transcript + [
+                Utterance(role="agent", content="Bill builds"),
+                Utterance(role="user", content="Wait, stop."),
+            ],
+        )
+        [e async for e in client.draft_response(second)]
+
+        second_call = mock_runner.run_streamed.call_args_list[1]
+        assert second_call.kwargs["previous_response_id"] is None
+        assert len(second_call.args[1]) == 4
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_text_mode_chains(self, mock_agent, mock_runner):
+        """Test that the text path chains on matching history."""
+        client = LlmClient(call_id="text-test", mode="text", chain_responses=True)
+        mock_runner.run_streamed.side_effect = [
+            _fake_stream("**Hi**", "resp_1"),
+            _fake_stream("More.", "resp_2"),
+        ]
+        messages = [{"role": "user", "content": "Who are you?"}]
+        [c async for c in client.draft_text_response(messages)]
+        messages = messages + [
+            {"role": "assistant", "content": "**Hi**"},
+            {"role": "user", "content": "Tell me more"},
+        ]
+        [c async for c in client.draft_text_response(messages)]
+
+        second_call = mock_runner.run_streamed.call_args_list[1]
+        assert second_call.kwargs["previous_response_id"] == "resp_1"
+        assert second_call.args[1][0] == {"role": "user", "content": "Tell me more"}
+        assert second_call.args[1][-1]["role"] == "developer"
+
+
+@pytest.mark.asyncio
+class TestLlmClientCancellation:
+    """Tests for tearing down abandoned runs."""
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_closing_stream_cancels_run(self, mock_agent, mock_runner):
+        """Test that closing the response stream early cancels the agent run."""
+        from metrics import metrics
+
+        client = LlmClient(call_id="test", mode="voice")
+        result = _fake_stream("Partial answer", "resp_1")
+        mock_runner.run_streamed.return_value = result
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Tell me about Bill")],
+        )
+        before = metrics.counters["llm.cancelled_runs"]
+
+        stream = client.draft_response(request)
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        assert first.content == "Partial answer"
+        result.cancel.assert_called_once()
+        assert metrics.counters["llm.cancelled_runs"] == before + 1
+
+
+@pytest.mark.asyncio
+class TestLlmClientAdmission:
+    """Tests for taking an admission slot only around model runs."""
+
+    @patch("llm.Runner")
+    async def test_model_run_holds_a_slot(self, mock_runner):
+        """Test that a model run takes a slot of the client's mode and gives it back."""
+        from admission import AdmissionScheduler
+
+        gate = AdmissionScheduler(limit=1)
+        client = LlmClient(call_id="test", mode="voice", admission=gate)
+        mock_runner.run_streamed.return_value = _fake_stream("Bill builds AI things.", "resp_1")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Tell me about Bill")],
+        )
+
+        stream = client.draft_response(request)
+        await stream.__anext__()
+        assert gate.snapshot()["classes"]["voice"]["in_flight"] == 1
+        await stream.aclose()
+
+        assert gate.in_flight == 0
+
+    @patch("llm.Runner")
+    async def test_caller_held_slot_is_not_taken_twice(self, mock_runner):
+        """Test that an admitted caller (a speculative draft) runs without another slot."""
+        from admission import AdmissionScheduler
+
+        gate = AdmissionScheduler(limit=1)
+        assert gate.try_acquire("voice")
+        client = LlmClient(call_id="test", mode="voice", admission=gate)
+        mock_runner.run_streamed.return_value = _fake_stream("Sure.", "resp_1")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Tell me about Bill")],
+        )
+
+        events = [e async for e in client.draft_response(request, admitted=True)]
+
+        assert events[0].content == "Sure."
+        assert gate.in_flight == 1
+
+
+@pytest.mark.asyncio
+class TestLlmClientIntentRouting:
+    """Tests for the local navigation fast path."""
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_voice_navigation_skips_agent(self, mock_agent, mock_runner):
+        """Test that a navigation command is answered without an agent run."""
+        client = LlmClient(call_id="test", mode="voice")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=3,
+            transcript=[Utterance(role="user", content="Show me your education")],
+        )
+
+        events = [e async for e in client.draft_response(request)]
+
+        mock_runner.run_streamed.assert_not_called()
+        assert [e.response_type for e in events] == [
+            "tool_call_invocation",
+            "metadata",
+            "tool_call_result",
+            "response",
+        ]
+        assert events[0].name == "display_education_page"
+        assert events[1].metadata == {"type": "navigation", "page": "education"}
+        assert events[0].tool_call_id == events[2].tool_call_id
+        assert events[3].response_id == 3
+        assert events[3].content_complete is True
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_text_navigation_skips_agent(self, mock_agent, mock_runner):
+        """Test the text path fast path."""
+        client = LlmClient(call_id="text-test", mode="text")
+
+        chunks = [c async for c in client.draft_text_response(
+            [{"role": "user", "content": "open the hackathon map"}]
+        )]
+
+        mock_runner.run_streamed.assert_not_called()
+        assert [c.type for c in chunks] == ["metadata", "content", "done"]
+        assert chunks[0].metadata == {"type": "navigation", "page": "hackathon"}
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_router_can_be_disabled(self, mock_agent, mock_runner):
+        """Test that LLM_INTENT_ROUTER=0 always runs the agent."""
+        with patch.dict("os.environ", {"LLM_INTENT_ROUTER": "0"}):
+            client = LlmClient(call_id="test", mode="voice")
+        mock_runner.run_streamed.return_value = _fake_stream("Here you go.", "resp_1")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Show me your education")],
+        )
+
+        [e async for e in client.draft_response(request)]
+
+        mock_runner.run_streamed.assert_called_once()
+
+
+@pytest.mark.asyncio
+class TestLlmClientVoiceMarkdown:
+    """Tests for stripping markdown from streamed voice deltas."""
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_markdown_split_across_deltas_is_stripped(self, mock_agent, mock_runner):
+        """Test that markers split across deltas never reach the voice stream."""
+        client = LlmClient(call_id="test", mode="voice")
+        mock_runner.run_streamed.return_value = _fake_stream(
+            ["I built *", "*SpotLight*", "* with [Fast", "API](https://fa", "stapi.tiangolo.com) *"],
+            "resp_1",
+        )
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="What did you build?")],
+        )
+
+        events = [e async for e in client.draft_response(request)]
+        spoken = "".join(e.content for e in events)
+
+        assert spoken == "I built SpotLight with FastAPI *"
+        assert events[-1].content_complete is True
+
+
+@pytest.mark.asyncio
+class TestLlmClientToolFiller:
+    """Tests for filler speech during slow tool calls."""
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_slow_tool_gets_filler(self, mock_agent, mock_runner):
+        """Test that a slow search is masked with a filler line in the reply."""
+        import asyncio
+        from agents import RunItemStreamEvent
+
+        from filler import FILLER_LINES
+
+        tool_call = MagicMock(call_id="call_1", arguments="{}")
+        tool_call.name = "search_projects"
+
+        async def events():
+            yield RunItemStreamEvent(name="tool_called", item=MagicMock(raw_item=tool_call))
+            await asyncio.sleep(0.05)
+            yield RunItemStreamEvent(
+                name="tool_output",
+                item=MagicMock(raw_item={"call_id": "call_1"}, output="Found 3 projects"),
+            )
+
+        result = _fake_stream([], "resp_1")
+        result.stream_events.return_value = events()
+        mock_runner.run_streamed.return_value = result
+        client = LlmClient(call_id="test", mode="voice")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="What AI projects have you built?")],
+        )
+
+        with patch.dict("os.environ", {"VOICE_FILLER_AFTER_MS": "10"}):
+            events_out = [e async for e in client.draft_response(request)]
+
+        assert [e.response_type for e in events_out[:3]] == [
+            "tool_call_invocation",
+            "response",
+            "tool_call_result",
+        ]
+        assert events_out[1].content in FILLER_LINES
+        assert events_out[2].tool_call_id == "call_1"
+
+
+@pytest.mark.asyncio
+class TestLlmClientTtftTracking:
+    """Tests for the TTFT samples that feed the latency policy."""
+
+    @patch("llm.ttft_tracker")
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_ttft_excludes_tool_time(self, mock_agent, mock_runner, mock_tracker):
+        """Test that TTFT stops at the first model output, not the first text after a tool."""
+        import asyncio
+        from agents import RawResponsesStreamEvent
+
+        async def events():
+            yield RawResponsesStreamEvent(data=MagicMock(type="response.output_item.added"))
+            await asyncio.sleep(0.2)  # the tool runs
+            yield RawResponsesStreamEvent(
+                data=MagicMock(type="response.output_text.delta", delta="Found it.")
+            )
+
+        result = _fake_stream([], "resp_1")
+        result.stream_events.return_value = events()
+        mock_runner.run_streamed.return_value = result
+        client = LlmClient(call_id="test", mode="voice")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="What AI projects have you built?")],
+        )
+
+        [e async for e in client.draft_response(request)]
+
+        mode, _model, ttft_ms = mock_tracker.observe.call_args.args
+        assert mode == "voice"
+        assert ttft_ms < 150
+
+
+@pytest.mark.asyncio
+class TestLlmClientTtftWatchdog:
+    """Tests for the TTFT watchdog on voice turns."""
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_late_primary_is_replaced_by_fallback(self, mock_agent, mock_runner):
+        """Test that a fallback run answers when the primary misses the deadline."""
+        import asyncio
+        from agents import RawResponsesStreamEvent
+
+        slow = _fake_stream([], "resp_slow")
+
+        async def slow_events():
+            await asyncio.sleep(0.5)
+            yield RawResponsesStreamEvent(
+                data=MagicMock(type="response.output_text.delta", delta="Too late")
+            )
+
+        slow.stream_events.return_value = slow_events()
+        mock_runner.run_streamed.side_effect = [slow, _fake_stream("Quick answer.", "resp_fast")]
+        with patch.dict("os.environ", {"LLM_TTFT_DEADLINE_MS": "20"}):
+            client = LlmClient(call_id="test", mode="voice", chain_responses=True)
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Tell me about Bill")],
+        )
+
+        events = [e async for e in client.draft_response(request)]
+
+        assert "".join(e.content for e in events) == "Quick answer."
+        assert mock_runner.run_streamed.call_count == 2
+        assert client._chain is None
+        slow.cancel.assert_called()
+
+
+@pytest.mark.asyncio
+class TestGetProjectsDetailsTool:
+    """Tests for the batched get_projects_details tool."""
+
+    async def test_formats_projects_in_requested_order(self, mock_pinecone):
+        """Test that one fetch serves all IDs and unknown IDs are reported."""
+        import json
+        from agents.tool_context import ToolContext
+
+        from llm import get_projects_details
+
+        args = json.dumps({"project_ids": ["missing", "test-project"], "message": ""})
+        ctx = ToolContext(
+            context=None,
+            tool_name="get_projects_details",
+            tool_call_id="call_1",
+            tool_arguments=args,
+        )
+
+        output = await get_projects_details.on_invoke_tool(ctx, args)
+
+        mock_pinecone.fetch.assert_called_once()
+        missing, found = output.split("\n\n---\n\n")
+        assert missing == "Could not find project with ID: missing"
+        assert found.startswith("Project ID: test-project\nProject: Test Project")
+
+
+
+@pytest.mark.asyncio
+class TestSearchProjectsTool:
+    """Tests for the search_projects tool output."""
+
+    async def test_lists_short_voice_summary(self, mock_pinecone, mock_openai_embeddings):
+        """Test that results carry the short summary, not the full one."""
+        import json
+        from agents.tool_context import ToolContext
+
+        from llm import search_projects
+
+        mock_pinecone.query.return_value.matches[0].metadata = {
+            "plain_name": "Test Project",
+            "plain_summary": "A long summary. With a second sentence.",
+            "plain_details": "Details",
+            "voice_summary": "A long summary.",
+        }
+        args = json.dumps({"query": "test", "message": ""})
+        ctx = ToolContext(
+            context=None,
+            tool_name="search_projects",
+            tool_call_id="call_1",
+            tool_arguments=args,
+        )
+
+        output = await search_projects.on_invoke_tool(ctx, args)
+
+        assert "Name: Test Project" in output
+        assert output.endswith("Summary: A long summary.")
+        assert "second sentence" not in output
+
+
+@pytest.mark.asyncio
+class TestLlmClientQuickReplies:
+    """Tests for answering reminder and greeting turns from templates."""
+
+    @patch("llm.Runner")
+    async def test_reminder_is_answered_locally(self, mock_runner):
+        """Test that a reminder turn gets one complete frame and no agent run."""
+        from metrics import metrics
+
+        client = LlmClient(call_id="test", mode="voice")
+        before = metrics.counters["llm.runs_avoided"]
+        request = ResponseRequiredRequest(
+            interaction_type="reminder_required",
+            response_id=4,
+            transcript=[
+                Utterance(role="agent", content="Hey, I'm Bill."),
+                Utterance(role="user", content="Show me your resume"),
+                Utterance(role="agent", content="Here's my resume."),
+            ],
+        )
+        client.page = "resume"
+
+        events = [e async for e in client.draft_response(request)]
+
+        mock_runner.run_streamed.assert_not_called()
+        assert len(events) == 1
+        assert events[0].response_id == 4
+        assert events[0].content_complete is True
+        assert events[0].content
+        assert metrics.counters["llm.runs_avoided"] == before + 1
+
+    @patch("llm.Runner")
+    async def test_opening_greeting_in_text_mode(self, mock_runner):
+        """Test that a bare first greeting is answered without the agent."""
+        client = LlmClient(call_id="text-test", mode="text")
+
+        chunks = [c async for c in client.draft_text_response([{"role": "user", "content": "Hi there!"}])]
+
+        mock_runner.run_streamed.assert_not_called()
+        assert [c.type for c in chunks] == ["content", "done"]
+
+    @patch("llm.Runner")
+    @patch("llm.Agent")
+    async def test_later_greeting_runs_the_agent(self, mock_agent, mock_runner):
+        """Test that a greeting after the first user turn goes to the agent."""
+        client = LlmClient(call_id="text-test", mode="text")
+        mock_runner.run_streamed.return_value = _fake_stream("Hey again.", "resp_1")
+        messages = [
+            {"role": "user", "content": "Who are you?"},
+            {"role": "assistant", "content": "I'm Bill."},
+            {"role": "user", "content": "hello"},
+        ]
+
+        [c async for c in client.draft_text_response(messages)]
+
+        mock_runner.run_streamed.assert_called_once()
+
+    async def test_navigation_sets_page(self):
+        """Test that routed navigation is remembered for template context."""
+        client = LlmClient(call_id="test", mode="voice")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="show me your education")],
+        )
+
+        [e async for e in client.draft_response(request)]
+
+        assert client.page == "education"
+
+    async def test_speculative_navigation_waits_for_claim(self):
+        """Test that a speculative draft's navigation only sets the page once claimed."""
+        from speculation import DeferredEffects
+
+        client = LlmClient(call_id="test", mode="voice")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="show me your education")],
+        )
+        effects = DeferredEffects()
+
+        events = [e async for e in client.draft_response(request, effects=effects)]
+
+        assert any(getattr(e, "metadata", None) for e in events)
+        assert client.page is None
+        effects.claim()
+        assert client.page == "education"
+
+
+@pytest.mark.asyncio
+class TestLlmClientPromptSections:
+    """Tests for sending the sectioned system prompt."""
+
+    @patch("llm.Runner")
+    async def test_sectioned_instructions_per_turn(self, mock_runner):
+        """Test that the agent run gets the core plus the turn's topic sections."""
+        from prompts import education_section, interests_section
+
+        client = LlmClient(call_id="test", mode="voice")
+        client.prompt_sections.enabled = True
+        client.prompt_sections.layout = "sectioned"
+        mock_runner.run_streamed.return_value = _fake_stream("I went to USC.", "resp_1")
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Where did you study?")],
+        )
+
+        [e async for e in client.draft_response(request)]
+
+        agent = mock_runner.run_streamed.call_args.args[0]
+        assert education_section in agent.instructions
+        assert interests_section not in agent.instructions
+        assert client.agent.instructions != agent.instructions
+
+
+@pytest.mark.asyncio
+class TestLlmClientPromptCaching:
+    """Tests for the cache-friendly request layout and usage telemetry."""
+
+    @patch("llm.Runner")
+    async def test_turn_note_follows_untouched_history(self, mock_runner):
+        """Test that the text run sends the history as-is with a trailing note."""
+        from prompts import text_turn_note
+
+        client = LlmClient(call_id="text-test", mode="text")
+        mock_runner.run_streamed.return_value = _fake_stream("Lots.", "resp_1")
+        messages = [{"role": "user", "content": "What projects have you built?"}]
+
+        [c async for c in client.draft_text_response(messages)]
+
+        sent = mock_runner.run_streamed.call_args.args[1]
+        assert sent[:-1] == messages
+        assert sent[-1] == {"role": "developer", "content": text_turn_note}
+
+    async def test_agent_sends_a_stable_cache_key(self):
+        """Test that every client in a mode shares one prompt_cache_key."""
+        first = LlmClient(call_id="a", mode="voice")
+        second = LlmClient(call_id="b", mode="voice")
+        key = first.agent.model_settings.extra_args["prompt_cache_key"]
+        assert key == second.agent.model_settings.extra_args["prompt_cache_key"]
+        assert key == first.prompt_sections.cache_key
+
+    @patch("llm.Runner")
+    async def test_usage_records_cached_tokens(self, mock_runner):
+        """Test that cached and uncached input tokens are recorded per run."""
+        from agents.usage import InputTokensDetails
+        from metrics import metrics
+
+        client = LlmClient(call_id="test", mode="voice")
+        result = _fake_stream("Sure.", "resp_1")
+        result.context_wrapper.usage.input_tokens_details = InputTokensDetails.model_construct(
+            cached_tokens=80
+        )
+        mock_runner.run_streamed.return_value = result
+        request = ResponseRequiredRequest(
+            interaction_type="response_required",
+            response_id=1,
+            transcript=[Utterance(role="user", content="Tell me about Bill")],
+        )
+
+        [e async for e in client.draft_response(request)]
+
+        assert metrics.samples["llm.usage.agent.voice.cached_tokens"][-1] == 80
+        assert metrics.samples["llm.usage.agent.voice.uncached_tokens"][-1] == 20
+        assert metrics.samples["llm.usage.agent.voice.cached_ratio"][-1] == 0.8
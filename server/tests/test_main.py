@@ -2,11 +2,23 @@
 Tests for main.py - FastAPI endpoints and handlers.
 """
 
+import asyncio
 import json
+import os
+import time
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 
 
+@pytest.fixture(autouse=True)
+def fresh_rate_limiter():
+    """Give each test empty rate limit buckets."""
+    import main
+    from rate_limit import LocalBackend, RateLimiter
+    with patch("main.rate_limiter", RateLimiter(LocalBackend(), main.rate_limiter.limits)) as limiter:
+        yield limiter
+
+
 class TestPingEndpoint:
     """Tests for the /ping health check endpoint."""
 
@@ -18,9 +30,177 @@ class TestPingEndpoint:
         assert response.json() == {"message": "pong"}
 
 
+class TestRateLimiting:
+    """Tests for per-client rate limits on /chat and /summary."""
+
+    def test_chat_over_limit_gets_429(self, app_client, fresh_rate_limiter):
+        """Test that a client past its burst gets 429 with Retry-After."""
+        from rate_limit import BucketLimit
+        fresh_rate_limiter.limits = {"chat": BucketLimit(per_minute=6, burst=1)}
+        fresh_rate_limiter.trusted_proxies = 1
+        body = {"messages": [{"role": "user", "content": "Hi"}]}
+        with patch("main.LlmClient") as mock_llm:
+            async def mock_generator(messages):
+                from custom_types import TextChatStreamChunk
+                yield TextChatStreamChunk(type="done")
+
+            mock_llm.return_value.draft_text_response = mock_generator
+            assert app_client.post("/chat", json=body).status_code == 200
+            limited = app_client.post("/chat", json=body)
+            other_client = app_client.post(
+                "/chat", json=body, headers={"X-Forwarded-For": "198.51.100.4"}
+            )
+
+        assert limited.status_code == 429
+        assert limited.headers["retry-after"] == "10"
+        assert other_client.status_code == 200
+
+    def test_untrusted_forwarded_header_is_ignored(self, app_client, fresh_rate_limiter):
+        """Test that without a trusted proxy a spoofed X-Forwarded-For doesn't get a new bucket."""
+        from rate_limit import BucketLimit
+        fresh_rate_limiter.limits = {"chat": BucketLimit(per_minute=6, burst=1)}
+        body = {"messages": [{"role": "user", "content": "Hi"}]}
+        with patch("main.LlmClient") as mock_llm:
+            async def mock_generator(messages):
+                from custom_types import TextChatStreamChunk
+                yield TextChatStreamChunk(type="done")
+
+            mock_llm.return_value.draft_text_response = mock_generator
+            assert app_client.post("/chat", json=body).status_code == 200
+            spoofed = app_client.post(
+                "/chat", json=body, headers={"X-Forwarded-For": "198.51.100.4"}
+            )
+
+        assert spoofed.status_code == 429
+
+
+class TestMetricsEndpoint:
+    """Tests for the /metrics endpoint."""
+
+    def test_reports_admission_and_metrics(self, app_client):
+        """Test that /metrics returns admission queues plus counters and samples."""
+        body = app_client.get("/metrics").json()
+
+        assert set(body) == {"admission", "counters", "samples"}
+        assert set(body["admission"]["classes"]) == {"voice", "text", "summary"}
+
+
+class TestAdmission:
+    """Tests for requests rejected by the admission scheduler."""
+
+    @pytest.fixture
+    def full(self):
+        """A scheduler with no free slots and instant timeouts."""
+        from admission import AdmissionScheduler
+        gate = AdmissionScheduler(
+            limit=1,
+            class_limits={"voice": 1, "text": 1, "summary": 1},
+            timeouts_ms={"voice": 0, "text": 0, "summary": 0},
+        )
+        gate.in_flight = 1
+        with patch("main.admission", gate):
+            yield gate
+
+    def test_chat_gets_busy_chunk(self, app_client, full):
+        """Test that a rejected /chat model run streams an error chunk instead of a reply."""
+        with patch("llm.Runner") as mock_runner:
+            response = app_client.post(
+                "/chat", json={"messages": [{"role": "user", "content": "Tell me about Bill"}]}
+            )
+
+        chunk = json.loads(response.text.strip().removeprefix("data: "))
+        assert chunk["type"] == "error"
+        assert "busy" in chunk["content"]
+        mock_runner.run_streamed.assert_not_called()
+
+    def test_chat_quick_reply_needs_no_slot(self, app_client, full):
+        """Test that a turn answered locally doesn't wait for admission."""
+        with patch("llm.Runner") as mock_runner:
+            response = app_client.post("/chat", json={"messages": [{"role": "user", "content": "hi"}]})
+
+        chunks = [json.loads(line.removeprefix("data: ")) for line in response.text.split("\n\n") if line]
+        assert [c["type"] for c in chunks] == ["content", "done"]
+        assert full.in_flight == 1
+        mock_runner.run_streamed.assert_not_called()
+
+    def test_voice_turn_gets_spoken_fallback(self, app_client, full):
+        """Test that a rejected voice turn speaks a short line and completes the response."""
+        from admission import BUSY_VOICE_LINE
+        with patch("llm.Runner"):
+            with app_client.websocket_connect(f"{WS_PATH}/call-busy") as ws:
+                ws.receive_json()  # config
+                ws.send_json(response_frame(3))
+                message = ws.receive_json()
+
+        assert message["response_id"] == 3
+        assert message["content"] == BUSY_VOICE_LINE
+        assert message["content_complete"] is True
+
+    def test_voice_routed_intent_needs_no_slot(self, app_client, full):
+        """Test that a navigation command is answered even with no free slot."""
+        with patch("llm.Runner") as mock_runner:
+            with app_client.websocket_connect(f"{WS_PATH}/call-route") as ws:
+                ws.receive_json()  # config
+                ws.send_json(response_frame(4, "show me your education"))
+                message = ws.receive_json()
+
+        assert message["response_type"] == "tool_call_invocation"
+        mock_runner.run_streamed.assert_not_called()
+
+    def test_summary_gets_503(self, app_client, full):
+        """Test that a rejected /summary answers 503 with Retry-After."""
+        response = app_client.post("/summary", json={"transcript": []})
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "5"
+
+
 class TestWebhookEndpoint:
     """Tests for the /webhook endpoint."""
 
+    @pytest.fixture(autouse=True)
+    def ingestor(self):
+        """Capture queued events instead of running the background worker."""
+        ingestor = MagicMock()
+        ingestor.submit.return_value = True
+        with patch("main.webhook_ingestor", ingestor):
+            yield ingestor
+
+    def test_webhook_verifies_raw_body(self, app_client, mock_retell, ingestor):
+        """Test that the signature is checked over the body bytes as sent."""
+        body = '{"event": "call_ended", "data": {"call_id": "c1"}}'
+
+        response = app_client.post(
+            "/webhook",
+            content=body,
+            headers={"X-Retell-Signature": "sig", "Content-Type": "application/json"},
+        )
+
+        assert response.status_code == 200
+        assert mock_retell.verify.call_args.args[0] == body
+        event = ingestor.submit.call_args.args[0]
+        assert (event.event, event.call_id) == ("call_ended", "c1")
+
+    def test_webhook_full_queue_gets_503(self, app_client, mock_retell, ingestor):
+        """Test that a full ingestion queue asks Retell to retry."""
+        ingestor.submit.return_value = False
+
+        response = app_client.post(
+            "/webhook",
+            json={"event": "call_started", "data": {"call_id": "c1"}},
+            headers={"X-Retell-Signature": "sig"},
+        )
+
+        assert response.status_code == 503
+
+    def test_call_ended_discards_parked_state(self):
+        """Test that the background handler frees a finished call's parked state."""
+        from main import handle_call_event
+        from webhooks import WebhookEvent
+        with patch("main.call_registry") as registry:
+            handle_call_event(WebhookEvent.parse(b'{"event": "call_ended", "data": {"call_id": "c9"}}'))
+        registry.discard.assert_called_once_with("c9")
+
     def test_webhook_valid_signature_call_started(self, app_client, mock_retell):
         """Test webhook with valid signature and call_started event."""
         payload = {
@@ -67,7 +247,7 @@ class TestWebhookEndpoint:
         
         assert response.status_code == 200
 
-    def test_webhook_invalid_signature(self, app_client, mock_retell):
+    def test_webhook_invalid_signature(self, app_client, mock_retell, ingestor):
         """Test webhook rejects invalid signature."""
         mock_retell.verify.return_value = False
         
@@ -84,6 +264,7 @@ class TestWebhookEndpoint:
         
         assert response.status_code == 401
         assert response.json() == {"message": "Unauthorized"}
+        ingestor.submit.assert_not_called()
 
     def test_webhook_unknown_event(self, app_client, mock_retell):
         """Test webhook handles unknown event type."""
@@ -155,6 +336,88 @@ class TestChatEndpoint:
             assert response.status_code == 200
 
 
+class FakeTextClient:
+    """Stand-in for LlmClient on the chat session path; records what it was sent."""
+
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        self.seen = []
+        FakeTextClient.instances.append(self)
+
+    async def draft_text_response(self, messages):
+        from custom_types import TextChatStreamChunk
+        self.seen.append(list(messages))
+        if messages[-1]["content"] == "fail":
+            yield TextChatStreamChunk(type="error", content="An error occurred. Please try again.")
+            return
+        yield TextChatStreamChunk(type="content", content="Reply ")
+        yield TextChatStreamChunk(type="content", content=str(len(messages)))
+        yield TextChatStreamChunk(type="done")
+
+
+class TestChatSessions:
+    """Tests for the /chat/sessions endpoints."""
+
+    @pytest.fixture(autouse=True)
+    def fresh_store(self):
+        from sessions import MemorySessionStore
+        FakeTextClient.instances = []
+        with patch("main.chat_sessions", MemorySessionStore()) as store, \
+                patch("main.LlmClient", FakeTextClient):
+            yield store
+
+    def test_only_new_message_is_sent(self, app_client, fresh_store):
+        """Test that the server replays the stored history with each new message."""
+        session_id = app_client.post("/chat/sessions").json()["session_id"]
+
+        first = app_client.post(f"/chat/sessions/{session_id}/messages", json={"content": "Hi"})
+        second = app_client.post(
+            f"/chat/sessions/{session_id}/messages", json={"content": "Projects?"}
+        )
+
+        assert first.status_code == second.status_code == 200
+        assert second.headers["content-type"].startswith("text/event-stream")
+        # One client per session, so response chaining carries over
+        assert len(FakeTextClient.instances) == 1
+        assert FakeTextClient.instances[0].seen[1] == [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Reply 1"},
+            {"role": "user", "content": "Projects?"},
+        ]
+
+    def test_failed_turn_leaves_history(self, app_client, fresh_store):
+        """Test that a turn ending in an error isn't added to the session."""
+        session_id = app_client.post("/chat/sessions").json()["session_id"]
+
+        app_client.post(f"/chat/sessions/{session_id}/messages", json={"content": "fail"})
+
+        session = asyncio.run(fresh_store.get(session_id))
+        assert session.messages == []
+
+    def test_unknown_session(self, app_client):
+        """Test that an unknown session id gets a 404."""
+        response = app_client.post("/chat/sessions/nope/messages", json={"content": "Hi"})
+        assert response.status_code == 404
+
+    def test_session_creation_is_rate_limited(self, app_client, fresh_store, fresh_rate_limiter):
+        """Test that one client can't create sessions without limit."""
+        from rate_limit import BucketLimit
+        fresh_rate_limiter.limits = {"session": BucketLimit(per_minute=6, burst=2)}
+
+        statuses = [app_client.post("/chat/sessions").status_code for _ in range(3)]
+
+        assert statuses == [200, 200, 429]
+        assert len(fresh_store) == 2
+
+    def test_delete_session(self, app_client):
+        """Test that a deleted session can't be used again."""
+        session_id = app_client.post("/chat/sessions").json()["session_id"]
+
+        assert app_client.delete(f"/chat/sessions/{session_id}").json() == {"deleted": True}
+        assert app_client.delete(f"/chat/sessions/{session_id}").status_code == 404
+
+
 class TestValidateEnvironmentVariables:
     """Tests for validate_environment_variables function."""
 
@@ -212,3 +475,112 @@ class TestCORSConfiguration:
         )
         
         assert response.status_code in [200, 204]
+
+
+WS_PATH = f"/{os.environ.get('OBFUSCATED_WS_PATH', 'ws-default')}"
+
+
+class FakeVoiceClient:
+    """Stand-in for LlmClient on the websocket path."""
+
+    cancelled = []
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        from transcript_state import TranscriptState
+        self.transcript = TranscriptState()
+        FakeVoiceClient.instances.append(self)
+
+    def draft_begin_message(self):
+        from custom_types import ResponseResponse
+        return ResponseResponse(response_id=0, content="Hi", content_complete=True)
+
+    async def draft_response(self, request):
+        from custom_types import ResponseResponse
+        try:
+            if request.response_id == 1:
+                yield ResponseResponse(response_id=1, content="Thinking", content_complete=False)
+                await asyncio.sleep(30)
+            yield ResponseResponse(
+                response_id=request.response_id, content="", content_complete=True
+            )
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled.append(request.response_id)
+            raise
+
+
+def response_frame(response_id, content="Tell me about Bill"):
+    return {
+        "interaction_type": "response_required",
+        "response_id": response_id,
+        "transcript": [{"role": "user", "content": content}],
+    }
+
+
+class TestWebsocketHandler:
+    """Tests for the Retell websocket handler."""
+
+    def test_sends_config_then_pong(self, app_client):
+        """Test that the handler sends config and answers ping_pong."""
+        with patch("main.LlmClient", FakeVoiceClient):
+            with app_client.websocket_connect(f"{WS_PATH}/call-1") as ws:
+                assert ws.receive_json()["response_type"] == "config"
+                ws.send_json({"interaction_type": "ping_pong", "timestamp": 42})
+                assert ws.receive_json() == {"response_type": "ping_pong", "timestamp": 42}
+
+    def test_update_only_does_not_block_pong(self, app_client):
+        """Test that dropped update_only frames leave the connection answering pings."""
+        with patch("main.LlmClient", FakeVoiceClient):
+            with app_client.websocket_connect(f"{WS_PATH}/call-1") as ws:
+                ws.receive_json()  # config
+                ws.send_json(
+                    {"interaction_type": "update_only", "transcript": [{"role": "user", "content": "Tell"}]}
+                )
+                ws.send_json({"interaction_type": "ping_pong", "timestamp": 7})
+                assert ws.receive_json() == {"response_type": "ping_pong", "timestamp": 7}
+
+    def test_newer_response_cancels_in_flight_run(self, app_client):
+        """Test that a newer response_required cancels the running response task."""
+        FakeVoiceClient.cancelled = []
+        with patch("main.LlmClient", FakeVoiceClient):
+            with app_client.websocket_connect(f"{WS_PATH}/call-1") as ws:
+                ws.receive_json()  # config
+                ws.send_json(response_frame(1))
+                assert ws.receive_json()["content"] == "Thinking"
+
+                ws.send_json(response_frame(2, "Actually, his projects"))
+                message = ws.receive_json()
+
+                assert message["response_id"] == 2
+                assert message["content_complete"] is True
+
+        assert FakeVoiceClient.cancelled == [1]
+
+    def test_reconnect_reuses_parked_call_state(self, app_client):
+        """Test that a reconnect on the same call_id gets the parked LlmClient back."""
+        from reconnect import ReconnectRegistry
+        FakeVoiceClient.instances = []
+        with patch("main.LlmClient", FakeVoiceClient), \
+                patch("main.call_registry", ReconnectRegistry(grace_s=30)) as registry:
+            with app_client.websocket_connect(f"{WS_PATH}/call-7") as ws:
+                ws.receive_json()  # config
+                ws.send_json({"interaction_type": "call_details", "call": {}})
+                assert ws.receive_json()["content"] == "Hi"
+                # The test client cancels the app right after its own close,
+                # so disconnect first and let the handler park the call
+                ws.close(1000)
+                for _ in range(200):
+                    if "call-7" in registry:
+                        break
+                    time.sleep(0.01)
+            assert "call-7" in registry
+
+            with app_client.websocket_connect(f"{WS_PATH}/call-7") as ws:
+                ws.receive_json()  # config
+                ws.send_json({"interaction_type": "call_details", "call": {}})
+                # Already greeted on the first connection
+                assert ws.receive_json()["content"] == ""
+                # Claimed back; closing this connection may park it again
+                assert "call-7" not in registry
+
+        assert len(FakeVoiceClient.instances) == 1
@@ -0,0 +1,70 @@
+"""
+Tests for markdown_stream.py - incremental markdown stripping.
+"""
+
+import pytest
+
+from markdown_stream import MarkdownSanitizer, clean_markdown
+
+
+def stream(text, size=1):
+    """Feed text through a sanitizer in fixed-size deltas."""
+    sanitizer = MarkdownSanitizer()
+    parts = [sanitizer.feed(text[i : i + size]) for i in range(0, len(text), size)]
+    parts.append(sanitizer.flush())
+    return "".join(parts)
+
+
+class TestMarkdownSanitizer:
+    """Tests for MarkdownSanitizer."""
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "**Bold** and *italic* with `code` and [link](http://example.com)",
+            "# Title\n- one\n- two\n10. ten\n## Sub\nplain __text__ here",
+            "snake_case and 2 * 3 = 6 and 3.5 million",
+        ],
+    )
+    @pytest.mark.parametrize("size", [1, 2, 3, 7])
+    def test_streamed_output_matches_whole_text(self, text, size):
+        """Test that delta boundaries never change the result."""
+        assert stream(text, size) == clean_markdown(text)
+
+    def test_plain_text_is_not_held_back(self):
+        """Test that plain text is emitted as soon as it arrives."""
+        sanitizer = MarkdownSanitizer()
+        assert sanitizer.feed("Hello there") == "Hello there"
+
+    def test_holds_only_marker_prefix(self):
+        """Test that a trailing marker run is held until it resolves."""
+        sanitizer = MarkdownSanitizer()
+        assert sanitizer.feed("I love **") == "I love "
+        assert sanitizer.feed("hackathons**") == "hackathons"
+        assert sanitizer.feed("!") == "!"
+
+    def test_link_target_is_skipped_across_deltas(self):
+        """Test that a URL split over several deltas is dropped."""
+        assert stream("See [docs](https://example.com/a/b) now", 4) == "See docs now"
+
+    def test_bracket_without_link_target(self):
+        """Test that brackets not followed by a URL just lose their brackets."""
+        assert clean_markdown("Ranked [1] overall") == "Ranked 1 overall"
+
+    def test_block_markers_only_at_line_start(self):
+        """Test that '-' and '#' mid-line are left alone."""
+        assert clean_markdown("A well-known #1 pick") == "A well-known #1 pick"
+
+    def test_non_marker_line_starts_are_kept(self):
+        """Test line starts that look like markers but aren't."""
+        assert clean_markdown("2024 was great") == "2024 was great"
+        assert clean_markdown("-5 degrees") == "-5 degrees"
+        assert clean_markdown("#hashtag") == "#hashtag"
+
+    def test_flush_resets_state(self):
+        """Test that a sanitizer can be reused after flush."""
+        sanitizer = MarkdownSanitizer()
+        sanitizer.feed("[unterminated")
+        sanitizer.flush()
+        assert sanitizer.feed("- item") == "item"
+
@@ -0,0 +1,56 @@
+"""
+Tests for metrics.py - process-wide counters and samples.
+"""
+
+from metrics import Metrics, percentile
+
+
+class TestPercentile:
+    """Tests for the percentile helper."""
+
+    def test_empty(self):
+        """Test that an empty list gives zero."""
+        assert percentile([], 50) == 0.0
+
+    def test_nearest_rank(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 100) == 100
+
+
+class TestMetrics:
+    """Tests for the Metrics registry."""
+
+    def test_counters(self):
+        """Test incrementing counters."""
+        m = Metrics()
+        m.incr("turns")
+        m.incr("turns", 2)
+        assert m.snapshot()["counters"] == {"turns": 3}
+
+    def test_samples_summary(self):
+        """Test that observations are summarised."""
+        m = Metrics()
+        for value in (10, 20, 30):
+            m.observe("ttft_ms", value)
+        summary = m.snapshot()["samples"]["ttft_ms"]
+        assert summary["count"] == 3
+        assert summary["p50"] == 20
+        assert summary["max"] == 30
+
+    def test_sample_window_is_bounded(self):
+        """Test that only the most recent samples are kept."""
+        m = Metrics(window=3)
+        for value in range(10):
+            m.observe("x", value)
+        assert list(m.samples["x"]) == [7, 8, 9]
+
+    def test_reset(self):
+        """Test that reset clears everything."""
+        m = Metrics()
+        m.incr("a")
+        m.observe("b", 1)
+        m.reset()
+        assert m.snapshot() == {"counters": {}, "samples": {}}
@@ -222,3 +222,98 @@ class TestFindSimilarProjects:
         results = await find_similar_projects("test-project")
         
         assert results == []
+
+
+class TestGetProjectsByIds:
+    """Tests for get_projects_by_ids function."""
+
+    @pytest.mark.asyncio
+    async def test_single_fetch_for_all_ids(self, mock_pinecone):
+        """Test that several IDs are resolved with one fetch call."""
+        from project_search import get_projects_by_ids
+
+        other = MagicMock()
+        other.metadata = {"name": "Other", "summary": "S", "details": "D"}
+        mock_pinecone.fetch.return_value.vectors["other-project"] = other
+
+        result = await get_projects_by_ids(["test-project", "other-project", "test-project"])
+
+        mock_pinecone.fetch.assert_called_once_with(ids=["test-project", "other-project"])
+        assert result["test-project"]["name"] == "Test Project"
+        assert result["other-project"]["name"] == "Other"
+
+    @pytest.mark.asyncio
+    async def test_missing_ids_map_to_none(self, mock_pinecone):
+        """Test that IDs not in the index come back as None."""
+        from project_search import get_projects_by_ids
+
+        result = await get_projects_by_ids(["test-project", "missing"])
+
+        assert result["missing"] is None
+        assert result["test-project"] is not None
+
+    @pytest.mark.asyncio
+    async def test_empty_ids_skip_fetch(self, mock_pinecone):
+        """Test that no fetch is made for an empty ID list."""
+        from project_search import get_projects_by_ids
+
+        assert await get_projects_by_ids([]) == {}
+        mock_pinecone.fetch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_handles_exception(self, mock_pinecone):
+        """Test that a failed fetch reports every ID as not found."""
+        from project_search import get_projects_by_ids
+
+        mock_pinecone.fetch.side_effect = Exception("Fetch error")
+
+        assert await get_projects_by_ids(["a", "b"]) == {"a": None, "b": None}
+
+
+class TestPlainFields:
+    """Tests for serving the plain-text fields stored at ingestion."""
+
+    @pytest.mark.asyncio
+    async def test_uses_stored_plain_fields(self, mock_pinecone):
+        """Test that plain_* and voice_summary are returned as stored."""
+        from project_search import get_project_by_id
+
+        mock_pinecone.fetch.return_value.vectors["test-project"].metadata = {
+            "name": "**Test**",
+            "summary": "A *test* project",
+            "details": "# Details",
+            "plain_name": "Test",
+            "plain_summary": "A test project",
+            "plain_details": "Details",
+            "voice_summary": "A test.",
+        }
+
+        with patch("project_search.clean_markdown") as mock_clean:
+            result = await get_project_by_id("test-project")
+
+        mock_clean.assert_not_called()
+        assert result["name"] == "Test"
+        assert result["summary"] == "A test project"
+        assert result["details"] == "Details"
+        assert result["voice_summary"] == "A test."
+
+    @pytest.mark.asyncio
+    async def test_cleans_vectors_without_plain_fields(self, mock_pinecone):
+        """Test that older vectors are cleaned at read time and counted."""
+        from metrics import metrics
+        from project_search import get_project_by_id
+
+        mock_pinecone.fetch.return_value.vectors["test-project"].metadata = {
+            "name": "**Test**",
+            "summary": "A *test* project",
+            "details": "# Details",
+        }
+        before = metrics.counters["projects.unprocessed"]
+
+        result = await get_project_by_id("test-project")
+
+        assert result["name"] == "Test"
+        assert result["summary"] == "A test project"
+        assert result["voice_summary"] == "A test project"
+        assert result["details"] == "Details"
+        assert metrics.counters["projects.unprocessed"] == before + 3
@@ -0,0 +1,110 @@
+"""
+Tests for prompt_sections.py - core plus on-demand topic sections.
+"""
+
+from prompt_sections import CORE, TOPICS, PromptSections, select_topics
+from prompts import (
+    architecture_section,
+    base_prompt,
+    education_section,
+    interests_section,
+    navigation_section,
+    project_discussion_section,
+    project_tools_section,
+    voice_prompt_suffix,
+    voice_system_prompt,
+)
+
+
+class TestPromptLayout:
+    def test_base_prompt_is_all_sections(self):
+        for sections in TOPICS.values():
+            for section in sections:
+                assert section in base_prompt
+        assert navigation_section + project_tools_section in base_prompt
+
+    def test_all_topics_are_no_longer_than_monolithic(self):
+        every_topic = CORE + "".join(section for sections in TOPICS.values() for section in sections)
+        assert len(every_topic) <= len(base_prompt)
+
+    def test_tool_rules_are_core(self):
+        assert navigation_section in CORE
+        assert project_tools_section in CORE
+        assert project_discussion_section not in CORE
+        assert "#### display_architecture_page()" in architecture_section
+
+    def test_no_topic_is_in_core(self):
+        for sections in TOPICS.values():
+            assert sections[-1] not in CORE
+
+
+class TestSelectTopics:
+    def test_small_talk_needs_no_topics(self):
+        assert select_topics("hi, how are you?") == frozenset()
+
+    def test_education(self):
+        assert "education" in select_topics("Where did you study?")
+
+    def test_projects(self):
+        assert select_topics("What AI projects have you built?") == frozenset({"projects"})
+        assert "projects" in select_topics("anything", page="project")
+
+    def test_page_implies_topics(self):
+        assert "career" in select_topics("what was the hardest part", page="hackathon")
+
+
+class TestPromptSections:
+    def test_disabled_sends_monolithic_prompt(self):
+        sections = PromptSections("voice", enabled=False)
+        assert sections.instructions(["Where did you study?"]) == voice_system_prompt
+
+    def test_core_only_for_small_talk(self):
+        sections = PromptSections("voice", enabled=True)
+        prompt = sections.instructions(["hey"])
+        assert prompt == CORE + voice_prompt_suffix
+        assert education_section not in prompt
+
+    def test_topics_follow_the_suffix_under_headings(self):
+        sections = PromptSections("voice", enabled=True)
+        prompt = sections.instructions(["Where did you study?"])
+
+        assert prompt.startswith(CORE + voice_prompt_suffix)
+        # The section's numbered items stay under its own heading, not the suffix's
+        tail = prompt[len(CORE + voice_prompt_suffix):]
+        assert tail.lstrip().startswith("#### **Background & Education**")
+
+    def test_topics_are_sticky_and_appended(self):
+        history = ["Where did you study?", "Cool. What do you do for fun?", "How does this site work?", "ok"]
+        sections = PromptSections("voice", enabled=True)
+        first = sections.instructions(history[:1])
+        second = sections.instructions(history[:2])
+        third = sections.instructions(history[:3])
+        fourth = sections.instructions(history)
+
+        assert education_section in first and interests_section not in first
+        assert second.startswith(first) and interests_section in second
+        assert third.startswith(second) and architecture_section in third
+        assert fourth == third
+        assert sections.topics == ["education", "interests", "architecture"]
+
+    def test_replaying_history_gives_the_same_prompt(self):
+        history = ["Where did you study?", "What do you do for fun?"]
+        incremental = PromptSections("text", enabled=True)
+        incremental.instructions(history[:1])
+        fresh = PromptSections("text", enabled=True)
+
+        assert incremental.instructions(history) == fresh.instructions(history)
+
+    def test_shorter_history_starts_over(self):
+        sections = PromptSections("voice", enabled=True)
+        sections.instructions(["Where did you study?", "What do you do for fun?"])
+        assert sections.instructions(["hi"]) == CORE + voice_prompt_suffix
+
+    def test_cache_key_is_stable_per_mode_and_layout(self):
+        assert PromptSections("voice", enabled=False).cache_key == PromptSections("voice", enabled=False).cache_key
+        keys = {
+            PromptSections(mode, enabled=enabled).cache_key
+            for mode in ("voice", "text")
+            for enabled in (False, True)
+        }
+        assert len(keys) == 4
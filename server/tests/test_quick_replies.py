@@ -0,0 +1,74 @@
+"""
+Tests for quick_replies.py - templated replies for reminder and greeting turns.
+"""
+
+import json
+
+import pytest
+
+from quick_replies import GREETING, REMINDER, QuickReplies, is_greeting
+
+
+class TestIsGreeting:
+    @pytest.mark.parametrize("text", ["hi", "Hello!", "hey there", "Hi Bill, how are you?", "good morning"])
+    def test_bare_greetings(self, text):
+        assert is_greeting(text)
+
+    @pytest.mark.parametrize("text", ["hi, what projects have you built?", "hello world app", "", "tell me more"])
+    def test_greetings_with_a_question(self, text):
+        assert not is_greeting(text)
+
+
+class TestClassify:
+    def test_reminder(self):
+        replies = QuickReplies("voice", modes=["voice"])
+        assert replies.classify([("agent", "Hey, I'm Bill.")], reminder=True) == REMINDER
+
+    def test_first_user_greeting(self):
+        replies = QuickReplies("voice", modes=["voice"])
+        assert replies.classify([("agent", "Hey, I'm Bill."), ("user", "hello")]) == GREETING
+
+    def test_second_user_turn_is_not_a_greeting(self):
+        replies = QuickReplies("text", modes=["text"])
+        messages = [("user", "hi"), ("assistant", "Hey!"), ("user", "hi")]
+        assert replies.classify(messages) is None
+
+    def test_disabled_for_mode(self):
+        replies = QuickReplies("text", modes=["voice"])
+        assert replies.classify([("user", "hi")], reminder=True) is None
+
+    def test_env_selects_modes(self, monkeypatch):
+        monkeypatch.setenv("LLM_QUICK_REPLIES", "voice")
+        assert QuickReplies("voice").enabled
+        assert not QuickReplies("text").enabled
+
+
+class TestRender:
+    def test_page_slot_is_filled(self):
+        replies = QuickReplies("voice", modes=["voice"], templates={REMINDER: ("About {page}?",)})
+        assert replies.render(REMINDER, page="resume") == "About my resume?"
+
+    def test_variants_with_unfilled_slots_are_skipped(self):
+        templates = {REMINDER: ("About {page}?", "Still there?")}
+        replies = QuickReplies("voice", modes=["voice"], templates=templates)
+        assert replies.render(REMINDER) == "Still there?"
+
+    def test_no_usable_variant(self):
+        replies = QuickReplies("voice", modes=["voice"], templates={REMINDER: ("About {page}?",)})
+        assert replies.render(REMINDER) is None
+
+    def test_does_not_repeat_last_variant(self):
+        templates = {GREETING: ("One.", "Two.")}
+        replies = QuickReplies("voice", modes=["voice"], templates=templates)
+        picks = [replies.render(GREETING) for _ in range(4)]
+        assert all(a != b for a, b in zip(picks, picks[1:]))
+
+    def test_templates_from_file(self, tmp_path, monkeypatch):
+        path = tmp_path / "replies.json"
+        path.write_text(json.dumps({"greeting": ["Howdy."]}))
+        monkeypatch.setenv("LLM_QUICK_REPLIES_FILE", str(path))
+
+        replies = QuickReplies("voice", modes=["voice"])
+
+        assert replies.render(GREETING) == "Howdy."
+        assert replies.render(REMINDER)
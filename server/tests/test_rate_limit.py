@@ -0,0 +1,164 @@
+"""
+Tests for rate_limit.py - per-client token buckets.
+"""
+
+from metrics import metrics
+from rate_limit import BucketLimit, LocalBackend, RateLimiter, RedisBackend, client_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingBackend:
+    async def take(self, key, limit, cost=1.0):
+        raise ConnectionError("redis down")
+
+
+class ScriptedRedis:
+    """Records eval() calls and answers like the Lua script would."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = []
+
+    async def eval(self, script, numkeys, *args):
+        self.calls.append((numkeys, args))
+        return self.reply
+
+
+# 60 per minute = one token per second
+PER_SECOND = BucketLimit(per_minute=60, burst=3)
+
+
+class TestLocalBackend:
+    """Tests for LocalBackend."""
+
+    async def test_burst_then_refill(self):
+        """Test that a bucket allows its burst, then refills at the rate."""
+        clock = FakeClock()
+        backend = LocalBackend(clock=clock)
+
+        results = [await backend.take("k", PER_SECOND) for _ in range(4)]
+        assert [allowed for allowed, _ in results] == [True, True, True, False]
+        assert results[-1][1] == 1.0
+
+        clock.now = 1.0
+        assert (await backend.take("k", PER_SECOND))[0]
+        assert not (await backend.take("k", PER_SECOND))[0]
+
+    async def test_keys_are_independent(self):
+        """Test that one client's empty bucket doesn't limit another."""
+        backend = LocalBackend(clock=FakeClock())
+        for _ in range(3):
+            await backend.take("a", PER_SECOND)
+        assert not (await backend.take("a", PER_SECOND))[0]
+        assert (await backend.take("b", PER_SECOND))[0]
+
+    async def test_refilled_buckets_are_evicted(self):
+        """Test that buckets idle long enough to be full again are dropped."""
+        clock = FakeClock()
+        backend = LocalBackend(clock=clock)
+        before = metrics.counters["ratelimit.evicted.idle"]
+        await backend.take("idle", PER_SECOND)
+
+        clock.now = 5.0
+        await backend.take("active", PER_SECOND)
+
+        assert len(backend) == 1
+        assert metrics.counters["ratelimit.evicted.idle"] == before + 1
+
+    async def test_key_cap(self):
+        """Test that past max_keys the least recently used bucket is dropped."""
+        backend = LocalBackend(max_keys=2, clock=FakeClock())
+        before = metrics.counters["ratelimit.evicted.capacity"]
+        for key in ("a", "b", "c"):
+            await backend.take(key, PER_SECOND)
+
+        assert len(backend) == 2
+        assert metrics.counters["ratelimit.evicted.capacity"] == before + 1
+
+
+class TestRedisBackend:
+    """Tests for RedisBackend's use of the client."""
+
+    async def test_runs_script_per_key(self):
+        """Test that take() evaluates the script on the prefixed key and parses the reply."""
+        redis = ScriptedRedis([0, "2.5"])
+
+        allowed, retry_after = await RedisBackend(redis).take("chat:1.2.3.4", PER_SECOND)
+
+        assert (allowed, retry_after) == (False, 2.5)
+        assert redis.calls == [(1, ("ratelimit:chat:1.2.3.4", 1.0, 3, 1.0))]
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter."""
+
+    async def test_separate_buckets_per_endpoint(self):
+        """Test that using up /summary leaves /chat alone for the same client."""
+        limiter = RateLimiter(
+            LocalBackend(clock=FakeClock()),
+            {"chat": PER_SECOND, "summary": BucketLimit(per_minute=60, burst=1)},
+        )
+        assert (await limiter.check("summary", "ip")).allowed
+        decision = await limiter.check("summary", "ip")
+        assert not decision.allowed
+        assert decision.retry_after_s == 1.0
+        assert (await limiter.check("chat", "ip")).allowed
+
+    async def test_disabled_and_unknown_endpoints(self):
+        """Test that a zero rate or an unlisted endpoint is never limited."""
+        limiter = RateLimiter(LocalBackend(), {"chat": BucketLimit(per_minute=0, burst=5)})
+        for _ in range(10):
+            assert (await limiter.check("chat", "ip")).allowed
+        assert (await limiter.check("other", "ip")).allowed
+
+    async def test_fails_open(self):
+        """Test that a backend error allows the request and is counted."""
+        limiter = RateLimiter(FailingBackend(), {"chat": PER_SECOND})
+        before = metrics.counters["ratelimit.backend_errors"]
+        assert (await limiter.check("chat", "ip")).allowed
+        assert metrics.counters["ratelimit.backend_errors"] == before + 1
+
+
+class TestClientKey:
+    """Tests for client_key."""
+
+    def test_forwarded_header_ignored_without_trusted_proxies(self):
+        """Test that X-Forwarded-For can't pick the key unless a proxy is trusted."""
+        headers = {"x-forwarded-for": "6.6.6.6, 203.0.113.7"}
+        assert client_key(headers, "10.0.0.1") == "10.0.0.1"
+
+    def test_last_forwarded_hop(self):
+        """Test that with one trusted proxy a client-supplied prefix is ignored."""
+        headers = {"x-forwarded-for": "6.6.6.6, 203.0.113.7"}
+        assert client_key(headers, "10.0.0.1", trusted_proxies=1) == "203.0.113.7"
+
+    def test_hop_per_trusted_proxy(self):
+        """Test that each trusted proxy moves the client one hop back."""
+        headers = {"x-forwarded-for": "6.6.6.6, 203.0.113.7, 10.1.0.1"}
+        assert client_key(headers, "10.0.0.1", trusted_proxies=2) == "203.0.113.7"
+
+    def test_clients_behind_a_shared_proxy_peer(self):
+        """Test that clients behind one proxy peer (Cloud Run) get their own keys only when it is trusted."""
+        proxy = "169.254.1.1"
+        first = {"x-forwarded-for": "203.0.113.7"}
+        second = {"x-forwarded-for": "198.51.100.4"}
+
+        assert client_key(first, proxy, trusted_proxies=1) != client_key(second, proxy, trusted_proxies=1)
+        assert client_key(first, proxy) == client_key(second, proxy) == proxy
+
+    def test_fewer_hops_than_proxies(self):
+        """Test that a header shorter than the proxy chain falls back to the peer."""
+        headers = {"x-forwarded-for": "203.0.113.7"}
+        assert client_key(headers, "10.0.0.1", trusted_proxies=2) == "10.0.0.1"
+
+    def test_peer_address(self):
+        """Test that the peer address is used without the header."""
+        assert client_key({}, "10.0.0.1") == "10.0.0.1"
+        assert client_key({}, None) == "unknown"
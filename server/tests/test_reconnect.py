@@ -0,0 +1,100 @@
+"""
+Tests for reconnect.py - parking call state across Retell auto-reconnects.
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from metrics import metrics
+from reconnect import ReconnectRegistry, transcript_size
+
+
+def client(*contents):
+    llm_client = MagicMock()
+    llm_client.transcript.messages = [{"role": "user", "content": c} for c in contents]
+    return llm_client
+
+
+class TestReconnectRegistry:
+    """Tests for ReconnectRegistry."""
+
+    async def test_reclaim_returns_parked_state(self):
+        """Test that a reconnect gets back the exact client and speculator."""
+        registry = ReconnectRegistry(grace_s=30)
+        llm_client, speculator = client("hi"), MagicMock()
+        before = metrics.counters["voice.reconnect.reattached"]
+
+        registry.park("call-1", llm_client, speculator)
+        parked = registry.reclaim("call-1")
+
+        assert parked.llm_client is llm_client
+        assert parked.speculator is speculator
+        assert registry.reclaim("call-1") is None
+        speculator.discard.assert_not_called()
+        assert metrics.counters["voice.reconnect.reattached"] == before + 1
+
+    async def test_expires_after_grace_period(self):
+        """Test that a call not reclaimed in time is dropped and its speculation cancelled."""
+        registry = ReconnectRegistry(grace_s=0.01)
+        speculator = MagicMock()
+        before = metrics.counters["voice.reconnect.evicted.expired"]
+
+        registry.park("call-1", client("hi"), speculator)
+        await asyncio.sleep(0.05)
+
+        assert "call-1" not in registry
+        assert registry.parked_bytes == 0
+        speculator.discard.assert_called_once()
+        assert metrics.counters["voice.reconnect.evicted.expired"] == before + 1
+
+    async def test_evicts_oldest_past_call_cap(self):
+        """Test that the longest-parked call goes once too many are parked."""
+        registry = ReconnectRegistry(max_parked=2)
+        before = metrics.counters["voice.reconnect.evicted.capacity"]
+
+        for call_id in ("a", "b", "c"):
+            registry.park(call_id, client("hi"))
+
+        assert "a" not in registry and "b" in registry and "c" in registry
+        assert metrics.counters["voice.reconnect.evicted.capacity"] == before + 1
+
+    async def test_evicts_past_memory_cap(self):
+        """Test that the transcript byte budget evicts calls, oldest first."""
+        registry = ReconnectRegistry(max_bytes=10)
+
+        registry.park("a", client("x" * 6))
+        registry.park("b", client("y" * 6))
+
+        assert len(registry) == 1 and "b" in registry
+        assert registry.parked_bytes == 6
+
+        registry.park("huge", client("z" * 20))
+        assert len(registry) == 0
+
+    async def test_discard_and_repark(self):
+        """Test that discard frees a call and parking again replaces the old entry."""
+        registry = ReconnectRegistry()
+        first, second = MagicMock(), MagicMock()
+
+        registry.park("call-1", client("hi"), first)
+        registry.park("call-1", client("hello"), second)
+        first.discard.assert_called_once()
+        assert registry.parked_bytes == 5
+
+        registry.discard("call-1")
+        second.discard.assert_called_once()
+        assert len(registry) == 0
+
+    async def test_disabled(self):
+        """Test that a zero grace period parks nothing."""
+        registry = ReconnectRegistry(grace_s=0)
+        speculator = MagicMock()
+
+        registry.park("call-1", client("hi"), speculator)
+
+        assert registry.reclaim("call-1") is None
+        speculator.discard.assert_called_once()
+
+    def test_transcript_size(self):
+        """Test that the footprint counts transcript characters."""
+        assert transcript_size(client("ab", "cde")) == 5
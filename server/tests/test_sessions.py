@@ -0,0 +1,195 @@
+"""
+Tests for sessions.py - server-side chat session stores.
+"""
+
+import asyncio
+
+import pytest
+
+from metrics import metrics
+from sessions import ChatSession, MemorySessionStore, RedisSessionStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """The slice of the redis.asyncio client RedisSessionStore uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.expiry = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        self.expiry[key] = ex if ex is not None else px
+        return True
+
+    async def delete(self, key):
+        return 1 if self.data.pop(key, None) is not None else 0
+
+    async def eval(self, script, numkeys, key, token):
+        # Only the lock release script is used: compare and delete
+        self.evals = getattr(self, "evals", 0) + 1
+        if self.data.get(key) == token:
+            return await self.delete(key)
+        return 0
+
+
+class TestChatSession:
+    """Tests for ChatSession."""
+
+    def test_extend_keeps_newest_messages(self):
+        """Test that history is trimmed from the oldest end."""
+        session = ChatSession("s1")
+        for i in range(3):
+            session.extend(
+                [{"role": "user", "content": f"q{i}"}, {"role": "assistant", "content": f"a{i}"}],
+                max_messages=4,
+            )
+        assert [m["content"] for m in session.messages] == ["q1", "a1", "q2", "a2"]
+
+
+class TestMemorySessionStore:
+    """Tests for MemorySessionStore."""
+
+    async def test_create_and_get(self):
+        """Test that a created session can be fetched by id."""
+        store = MemorySessionStore()
+        session = await store.create()
+        assert await store.get(session.session_id) is session
+        assert await store.get("missing") is None
+
+    async def test_evicts_least_recently_used(self):
+        """Test that the cap evicts the session used longest ago."""
+        store = MemorySessionStore(max_sessions=2)
+        before = metrics.counters["chat.sessions.evicted.lru"]
+        first = await store.create()
+        second = await store.create()
+        await store.get(first.session_id)  # first is now the most recent
+
+        await store.create()
+
+        assert len(store) == 2
+        assert await store.get(second.session_id) is None
+        assert await store.get(first.session_id) is first
+        assert metrics.counters["chat.sessions.evicted.lru"] == before + 1
+
+    async def test_expires_idle_sessions(self):
+        """Test that a session idle past the TTL is gone, and use refreshes it."""
+        clock = FakeClock()
+        store = MemorySessionStore(ttl_s=60, clock=clock)
+        before = metrics.counters["chat.sessions.evicted.ttl"]
+        kept = await store.create()
+        idle = await store.create()
+
+        clock.now = 50
+        await store.get(kept.session_id)
+        clock.now = 100
+
+        assert await store.get(idle.session_id) is None
+        assert await store.get(kept.session_id) is kept
+        assert metrics.counters["chat.sessions.evicted.ttl"] == before + 1
+
+    async def test_delete(self):
+        """Test that delete reports whether the session existed."""
+        store = MemorySessionStore()
+        session = await store.create()
+        assert await store.delete(session.session_id)
+        assert not await store.delete(session.session_id)
+
+
+class TestRedisSessionStore:
+    """Tests for RedisSessionStore against a Redis-compatible client."""
+
+    async def test_round_trip(self):
+        """Test that history survives a save and a get on another worker."""
+        redis = FakeRedis()
+        store = RedisSessionStore(redis, ttl_s=90)
+        session = await store.create()
+        session.extend([{"role": "user", "content": "Hi"}], max_messages=10)
+        await store.save(session)
+
+        loaded = await RedisSessionStore(redis, ttl_s=90).get(session.session_id)
+
+        assert loaded.messages == [{"role": "user", "content": "Hi"}]
+        assert loaded.client is None
+        assert redis.expiry[f"chat-session:{session.session_id}"] == 90
+
+    async def test_worker_keeps_its_session_object(self):
+        """Test that a worker hands out the same session (lock, client) on every get."""
+        redis = FakeRedis()
+        store = RedisSessionStore(redis)
+        session = await store.create()
+        session.client = object()
+
+        # Another worker adds to the history
+        other = RedisSessionStore(redis)
+        remote = await other.get(session.session_id)
+        remote.extend([{"role": "user", "content": "Hi"}], max_messages=10)
+        await other.save(remote)
+
+        loaded = await store.get(session.session_id)
+        assert loaded is session
+        assert loaded.messages == [{"role": "user", "content": "Hi"}]
+
+    async def test_local_cache_is_bounded(self):
+        """Test that past max_local the least recently used session object is dropped."""
+        store = RedisSessionStore(FakeRedis(), max_local=2)
+        first = await store.create()
+        await store.create()
+        await store.create()
+
+        reloaded = await store.get(first.session_id)
+        assert reloaded is not first
+        assert len(store._local) == 2
+
+    async def test_concurrent_turns_keep_both_exchanges(self):
+        """Test that turns on one session, on two workers, take turns and both land in the history."""
+        redis = FakeRedis()
+        workers = [RedisSessionStore(redis), RedisSessionStore(redis)]
+        session_id = (await workers[0].create()).session_id
+
+        async def post(store, text):
+            session = await store.get(session_id)
+            async with store.turn(session):
+                await asyncio.sleep(0.01)
+                session.extend([{"role": "user", "content": text}], max_messages=10)
+                await store.save(session)
+
+        await asyncio.gather(post(workers[0], "a"), post(workers[1], "b"), post(workers[0], "c"))
+
+        loaded = await RedisSessionStore(redis).get(session_id)
+        assert sorted(m["content"] for m in loaded.messages) == ["a", "b", "c"]
+        assert f"chat-session:{session_id}:lock" not in redis.data
+
+    async def test_turn_leaves_a_lock_it_no_longer_owns(self):
+        """Test that a turn whose lock expired into another holder's hands doesn't release it."""
+        redis = FakeRedis()
+        store = RedisSessionStore(redis)
+        session = await store.create()
+        lock_key = f"chat-session:{session.session_id}:lock"
+
+        async with store.turn(session):
+            redis.data[lock_key] = "someone-else"
+
+        assert redis.data[lock_key] == "someone-else"
+        # Released with the compare-and-delete script, not a GET then DELETE
+        assert redis.evals == 1
+
+    async def test_missing_and_delete(self):
+        """Test that unknown ids miss and delete removes the key."""
+        store = RedisSessionStore(FakeRedis())
+        session = await store.create()
+        assert await store.delete(session.session_id)
+        assert await store.get(session.session_id) is None
@@ -1,11 +1,16 @@
 """
-Tests for socket_manager.py ConnectionManager.
+Tests for socket_manager.py ConnectionManager and ConnectionWriter.
 """
 
+import asyncio
+import json
+
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from unittest.mock import AsyncMock
 
-from socket_manager import ConnectionManager
+from custom_types import ResponseResponse, ToolCallInvocationResponse
+from metrics import metrics
+from socket_manager import ConnectionManager, ConnectionWriter
 
 
 class TestConnectionManager:
@@ -100,3 +105,142 @@ class TestConnectionManager:
         
         assert len(manager.active_connections) == 1
         assert manager.active_connections["client_1"] == ws2
+
+
+def delta(response_id, content):
+    return ResponseResponse(response_id=response_id, content=content, content_complete=False)
+
+
+class GatedSocket:
+    """Websocket whose send_text blocks until the test opens the gate."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.close = AsyncMock()
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+
+async def settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestConnectionWriter:
+    """Tests for ConnectionWriter."""
+
+    async def test_writes_in_order(self):
+        """Test that queued events are written in order by the writer task."""
+        ws = AsyncMock()
+        writer = ConnectionWriter(ws)
+
+        assert writer.send({"response_type": "config"})
+        assert writer.send(ResponseResponse(response_id=1, content="Hi", content_complete=True))
+        await writer.flush()
+
+        sent = [json.loads(call.args[0]) for call in ws.send_text.await_args_list]
+        assert [m["response_type"] for m in sent] == ["config", "response"]
+        assert metrics.summary("voice.send.write_ms")["count"] >= 2
+        await writer.aclose()
+
+    async def test_send_does_not_wait_for_socket(self):
+        """Test that send returns while the socket is stalled."""
+        ws = GatedSocket()
+        writer = ConnectionWriter(ws)
+
+        for i in range(5):
+            assert writer.send(delta(1, str(i)))
+        assert ws.sent == []
+        await writer.aclose()
+
+    async def test_pending_deltas_are_coalesced(self):
+        """Test that deltas queued behind a slow write go out as one frame."""
+        ws = GatedSocket()
+        writer = ConnectionWriter(ws)
+        before = metrics.counters["voice.send.coalesced"]
+
+        writer.send(delta(1, "Bill "))
+        await settle()  # the writer is now blocked on the first frame
+        for word in ("builds ", "voice ", "agents."):
+            writer.send(delta(1, word))
+        writer.send(ResponseResponse(response_id=1, content="", content_complete=True))
+        ws.gate.set()
+        await writer.flush()
+
+        assert [m["content"] for m in ws.sent] == ["Bill ", "builds voice agents.", ""]
+        assert ws.sent[-1]["content_complete"] is True
+        assert metrics.counters["voice.send.coalesced"] == before + 2
+        await writer.aclose()
+
+    async def test_superseded_deltas_are_dropped(self):
+        """Test that deltas of an older response_id are not written once a newer one is queued."""
+        ws = GatedSocket()
+        writer = ConnectionWriter(ws)
+        before = metrics.counters["voice.send.stale"]
+
+        writer.send(delta(1, "a"))
+        await settle()
+        writer.send(delta(1, "b"))
+        writer.send(delta(2, "c"))
+        ws.gate.set()
+        await writer.flush()
+
+        assert [(m["response_id"], m["content"]) for m in ws.sent] == [(1, "a"), (2, "c")]
+        assert metrics.counters["voice.send.stale"] == before + 1
+        await writer.aclose()
+
+    async def test_high_water_mark_compacts_before_closing(self):
+        """Test that a queue back under the mark after compaction keeps every current event."""
+        ws = GatedSocket()
+        writer = ConnectionWriter(ws, max_pending=2)
+        tool_call = ToolCallInvocationResponse(
+            tool_call_id="t1", name="search", arguments="{}"
+        )
+
+        writer.send(delta(1, "a"))
+        await settle()
+        writer.send(delta(1, "b"))
+        writer.send(tool_call)
+        writer.send(delta(2, "c"))
+
+        assert not writer.closed
+        assert writer.pending == 2
+        ws.gate.set()
+        await writer.flush()
+        assert [m.get("tool_call_id", m.get("content")) for m in ws.sent] == ["a", "t1", "c"]
+        ws.close.assert_not_awaited()
+        await writer.aclose()
+
+    async def test_high_water_mark_closes_slow_consumer(self):
+        """Test that a queue still over the mark closes the socket with 1011 and refuses new events."""
+        ws = GatedSocket()
+        writer = ConnectionWriter(ws, max_pending=2)
+        before = metrics.counters["voice.send.slow_consumer_closes"]
+
+        writer.send(delta(1, "a"))
+        await settle()
+        writer.send(delta(1, "b"))
+        writer.send({"response_type": "config"})
+        assert not writer.send(delta(1, "c"))
+        await writer.aclose()
+
+        assert writer.closed
+        ws.close.assert_awaited_once_with(1011, "Slow consumer")
+        assert metrics.counters["voice.send.slow_consumer_closes"] == before + 1
+        assert not writer.send(delta(1, "d"))
+
+    async def test_send_failure_stops_writer(self):
+        """Test that a failed write shuts the writer down."""
+        ws = AsyncMock()
+        ws.send_text.side_effect = RuntimeError("closed")
+        writer = ConnectionWriter(ws)
+
+        writer.send({"response_type": "config"})
+        await writer.flush()
+
+        assert writer.closed
+        assert not writer.send({"response_type": "config"})
+        await writer.aclose()
@@ -0,0 +1,223 @@
+"""
+Tests for speculation.py - speculative drafting on update_only frames.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+
+from admission import AdmissionScheduler
+from custom_types import ResponseRequiredRequest, ResponseResponse, Utterance
+from metrics import metrics
+from speculation import Speculator, looks_stable
+from transcript_state import TranscriptState
+
+
+class FakeClient:
+    """Minimal LlmClient stand-in recording speculative work."""
+
+    def __init__(self):
+        self.transcript = TranscriptState()
+        self.precheck_guardrail = AsyncMock(return_value=False)
+        self.drafted = []
+        self.page = None
+
+    async def draft_response(self, request, effects=None, admitted=False):
+        self.drafted.append(request)
+        # Like a navigation tool call: updates call state through the effects
+        effects.add(lambda: setattr(self, "page", "education"))
+        yield ResponseResponse(
+            response_id=request.response_id, content="Sure thing.", content_complete=False
+        )
+        yield ResponseResponse(
+            response_id=request.response_id, content="", content_complete=True
+        )
+
+
+def user_said(client, text):
+    client.transcript.sync(
+        [{"role": "agent", "content": "Hey, I'm Bill."}, {"role": "user", "content": text}]
+    )
+
+
+def response_required(text, response_id=7):
+    return ResponseRequiredRequest(
+        interaction_type="response_required",
+        response_id=response_id,
+        transcript=[
+            Utterance(role="agent", content="Hey, I'm Bill."),
+            Utterance(role="user", content=text),
+        ],
+    )
+
+
+class TestLooksStable:
+    """Tests for the utterance stability heuristic."""
+
+    def test_end_punctuation(self):
+        """Test that sentence punctuation counts as stable."""
+        assert looks_stable(None, "Tell me about your projects?")
+
+    def test_agent_turn_hint(self):
+        """Test that Retell's turntaking hint counts as stable."""
+        assert looks_stable(None, "tell me about your projects", "agent_turn")
+
+    def test_unchanged_across_updates(self):
+        """Test that an unchanged utterance counts as stable."""
+        assert looks_stable("tell me about", "Tell me about")
+
+    def test_growing_utterance_not_stable(self):
+        """Test that a still-growing utterance is not stable."""
+        assert not looks_stable("tell me", "tell me about")
+
+    def test_empty_not_stable(self):
+        """Test that empty text is never stable."""
+        assert not looks_stable("", "  ", "agent_turn")
+
+
+@pytest.mark.asyncio
+class TestSpeculator:
+    """Tests for the Speculator."""
+
+    async def test_prefetch_hit_runs_guardrail_only(self):
+        """Test that prefetch mode prechecks the guardrail and defers to the normal run."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=False)
+        user_said(client, "What did you build at LA Hacks?")
+        speculator.observe()
+        await asyncio.sleep(0)
+
+        stream = speculator.take(response_required("What did you build at LA Hacks?"))
+
+        assert stream is None
+        client.precheck_guardrail.assert_awaited_once()
+        assert client.drafted == []
+
+    async def test_generate_hit_replays_with_real_response_id(self):
+        """Test that a matching generated draft is replayed with the real response_id."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "What did you build at LA Hacks?")
+        speculator.observe()
+
+        stream = speculator.take(response_required("what did you build at LA hacks?", 7))
+        events = [e async for e in stream]
+
+        assert [e.content for e in events] == ["Sure thing.", ""]
+        assert all(e.response_id == 7 for e in events)
+
+    async def test_generate_holds_a_voice_slot_until_done(self):
+        """Test that a generated draft takes a voice slot and gives it back when it finishes."""
+        client = FakeClient()
+        gate = AdmissionScheduler(limit=1)
+        speculator = Speculator(client, generate=True, admission=gate)
+        user_said(client, "What did you build at LA Hacks?")
+        speculator.observe()
+
+        assert gate.in_flight == 1
+        stream = speculator.take(response_required("What did you build at LA Hacks?"))
+        [e async for e in stream]
+        await asyncio.sleep(0)
+        assert gate.in_flight == 0
+
+    async def test_cancelled_draft_releases_its_slot(self):
+        """Test that a draft cancelled before it ran still gives its slot back."""
+        client = FakeClient()
+        gate = AdmissionScheduler(limit=1)
+        speculator = Speculator(client, generate=True, admission=gate)
+        user_said(client, "What did you build?")
+        speculator.observe()
+
+        draft = speculator._draft
+        speculator.discard()
+        await asyncio.gather(draft.task, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert gate.in_flight == 0
+        assert client.drafted == []
+
+    async def test_no_free_slot_skips_speculation(self):
+        """Test that a generated draft is skipped, not queued, when no voice slot is free."""
+        client = FakeClient()
+        gate = AdmissionScheduler(limit=1)
+        await gate.acquire("voice")
+        speculator = Speculator(client, generate=True, admission=gate)
+        before = metrics.counters["speculation.skipped_busy"]
+        user_said(client, "What did you build at LA Hacks?")
+        speculator.observe()
+
+        assert speculator._draft is None
+        assert metrics.counters["speculation.skipped_busy"] == before + 1
+        assert speculator.take(response_required("What did you build at LA Hacks?")) is None
+        gate.release("voice")
+
+    async def test_claimed_draft_applies_its_effects(self):
+        """Test that a draft's call-state updates apply once take() claims it."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "Where did you study?")
+        speculator.observe()
+        await asyncio.sleep(0)
+        assert client.page is None
+
+        stream = speculator.take(response_required("Where did you study?"))
+        [e async for e in stream]
+
+        assert client.page == "education"
+
+    async def test_discarded_draft_leaves_no_trace(self):
+        """Test that a draft that isn't used never updates the call state."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "Where did you study?")
+        speculator.observe()
+        draft = speculator._draft
+        await asyncio.gather(draft.task, return_exceptions=True)
+
+        assert speculator.take(response_required("Where did you go to school?")) is None
+        assert client.page is None
+
+    async def test_mismatch_discards_draft(self):
+        """Test that a different final transcript cancels the draft."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "What did you build?")
+        speculator.observe()
+        draft = speculator._draft
+
+        stream = speculator.take(response_required("What did you build at LA Hacks?"))
+        await asyncio.sleep(0)
+
+        assert stream is None
+        assert draft.task.cancelled() or draft.task.done()
+
+    async def test_unstable_utterance_does_not_speculate(self):
+        """Test that nothing starts while the user is still talking."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "what did you")
+        speculator.observe()
+
+        assert speculator._draft is None
+
+    async def test_user_keeps_talking_discards_draft(self):
+        """Test that new words after a stable guess discard the draft."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "What did you build.")
+        speculator.observe()
+        user_said(client, "What did you build. And with whom")
+        speculator.observe()
+
+        assert speculator._draft is None
+
+    async def test_reminder_never_matches(self):
+        """Test that reminder turns don't consume a draft."""
+        client = FakeClient()
+        speculator = Speculator(client, generate=True)
+        user_said(client, "Hello there.")
+        speculator.observe()
+        request = response_required("Hello there.")
+        request.interaction_type = "reminder_required"
+
+        assert speculator.take(request) is None
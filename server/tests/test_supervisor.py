@@ -0,0 +1,129 @@
+"""
+Tests for supervisor.py - per-call lanes for inbound frame work.
+"""
+
+import asyncio
+
+import pytest
+
+from metrics import metrics
+from supervisor import CallSupervisor
+
+
+class Recorder:
+    """Handler that records frames and can hold response frames open."""
+
+    def __init__(self, hold=()):
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+        self.hold = set(hold)
+
+    async def __call__(self, raw):
+        self.started.append(raw)
+        try:
+            if raw in self.hold:
+                await asyncio.sleep(30)
+            await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled.append(raw)
+            raise
+        self.finished.append(raw)
+
+
+async def settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+class TestCallSupervisor:
+    """Tests for CallSupervisor."""
+
+    async def test_latest_response_wins(self):
+        """Test that a new response turn cancels the running one before starting."""
+        handler = Recorder(hold={"r1"})
+        supervisor = CallSupervisor(handler)
+        before = metrics.counters["voice.superseded_responses"]
+
+        await supervisor.submit("response_required", "r1")
+        await settle()
+        await supervisor.submit("reminder_required", "r2")
+        await settle()
+
+        assert handler.cancelled == ["r1"]
+        assert handler.finished == ["r2"]
+        assert metrics.counters["voice.superseded_responses"] == before + 1
+        await supervisor.close()
+
+    async def test_only_one_response_runs(self):
+        """Test that a burst of response frames leaves a single active task."""
+        handler = Recorder(hold={"r1", "r2", "r3"})
+        supervisor = CallSupervisor(handler)
+
+        for raw in ("r1", "r2", "r3"):
+            await supervisor.submit("response_required", raw)
+        await settle()
+
+        running = [t for t in supervisor._tasks if not t.done()]
+        assert running == [supervisor.active]
+        # r2 was superseded while still waiting for r1 to unwind
+        assert handler.started == ["r1", "r3"]
+        await supervisor.close()
+
+    async def test_fast_lane_runs_inline(self):
+        """Test that call_details is handled before submit returns."""
+        handler = Recorder()
+        supervisor = CallSupervisor(handler)
+
+        await supervisor.submit("call_details", "details")
+
+        assert handler.finished == ["details"]
+        assert not supervisor._tasks
+
+    async def test_background_queue_is_bounded(self):
+        """Test that the oldest queued frame is dropped once the cap is hit."""
+        handler = Recorder()
+        supervisor = CallSupervisor(handler, max_queued=2)
+        before = metrics.counters["voice.supervisor.dropped"]
+
+        for raw in ("u1", "u2", "u3"):
+            await supervisor.submit("update_only", raw)
+        assert supervisor.queued == 2
+        await settle()
+
+        assert handler.finished == ["u2", "u3"]
+        assert metrics.counters["voice.supervisor.dropped"] == before + 1
+        assert metrics.summary("voice.supervisor.queue_depth")["max"] >= 2
+        await supervisor.close()
+
+    async def test_background_lane_survives_errors(self):
+        """Test that a failing frame doesn't stop the worker."""
+        seen = []
+
+        async def handler(raw):
+            seen.append(raw)
+            if raw == "bad":
+                raise ValueError("boom")
+
+        supervisor = CallSupervisor(handler)
+        await supervisor.submit("update_only", "bad")
+        await settle()
+        await supervisor.submit("update_only", "good")
+        await settle()
+
+        assert seen == ["bad", "good"]
+        await supervisor.close()
+
+    async def test_close_cancels_everything(self):
+        """Test that close cancels the response task and the worker."""
+        handler = Recorder(hold={"r1"})
+        supervisor = CallSupervisor(handler)
+        await supervisor.submit("response_required", "r1")
+        await supervisor.submit("update_only", "u1")
+        await settle()
+
+        await supervisor.close()
+
+        assert handler.cancelled == ["r1"]
+        assert all(task.done() for task in supervisor._tasks)
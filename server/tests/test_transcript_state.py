@@ -0,0 +1,164 @@
+"""
+Tests for transcript_state.py - incremental transcript tracking.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from custom_types import Utterance
+from transcript_state import RECHECK_WINDOW, TranscriptState
+
+
+def raw(role, content):
+    return {"role": role, "content": content}
+
+
+class TestTranscriptStateSync:
+    """Tests for TranscriptState.sync."""
+
+    def test_empty_transcript(self):
+        """Test syncing an empty transcript."""
+        state = TranscriptState()
+        state.sync([])
+
+        assert state.utterances == []
+        assert state.messages == []
+        assert len(state) == 0
+
+    def test_converts_roles(self):
+        """Test that agent becomes assistant and user stays user."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!"), raw("user", "Hi")])
+
+        assert state.messages == [
+            {"role": "assistant", "content": "Hello!"},
+            {"role": "user", "content": "Hi"},
+        ]
+        assert all(isinstance(u, Utterance) for u in state.utterances)
+
+    def test_appends_only_new_utterances(self):
+        """Test that a grown transcript reuses the known prefix."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!"), raw("user", "Hi")])
+        first = state.utterances[0]
+
+        state.sync([raw("agent", "Hello!"), raw("user", "Hi"), raw("agent", "Hey")])
+
+        assert state.reused == 2
+        assert state.appended == 1
+        assert state.utterances[0] is first
+        assert state.messages[-1] == {"role": "assistant", "content": "Hey"}
+
+    def test_growing_last_utterance_is_replaced(self):
+        """Test that an update_only style growing utterance is re-converted."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!"), raw("user", "Tell me")])
+        state.sync([raw("agent", "Hello!"), raw("user", "Tell me about projects")])
+
+        assert state.reused == 1
+        assert state.appended == 1
+        assert state.messages[-1]["content"] == "Tell me about projects"
+        assert len(state) == 2
+
+    def test_edited_history_is_truncated(self):
+        """Test that an edited earlier utterance drops everything after it."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!"), raw("user", "Hi"), raw("agent", "Long answer")])
+        state.sync([raw("agent", "Hello!"), raw("user", "Hi"), raw("agent", "Long")])
+
+        assert state.reused == 2
+        assert state.messages[-1]["content"] == "Long"
+
+    def test_edit_before_unchanged_tail_is_replaced(self):
+        """Test that an edited utterance is replaced even when later ones still match."""
+        state = TranscriptState()
+        state.sync([
+            raw("agent", "Hello!"),
+            raw("user", "What did you build?"),
+            raw("agent", "Great, I built Dispatch AI."),
+            raw("user", "Cool"),
+        ])
+        state.sync([
+            raw("agent", "Hello!"),
+            raw("user", "What did you build?"),
+            raw("agent", "Great, I"),
+            raw("user", "Cool"),
+        ])
+
+        assert state.reused == 2
+        assert [m["content"] for m in state.messages] == [
+            "Hello!",
+            "What did you build?",
+            "Great, I",
+            "Cool",
+        ]
+
+    def test_settled_history_is_not_compared(self):
+        """Test that utterances older than the recheck window are trusted by count."""
+        turns = [raw("user" if i % 2 else "agent", f"line {i}") for i in range(RECHECK_WINDOW + 3)]
+        state = TranscriptState()
+        state.sync(turns)
+        edited = [raw("agent", "rewritten")] + turns[1:] + [raw("user", "new")]
+        state.sync(edited)
+
+        assert state.reused == len(turns)
+        assert state.appended == 1
+        assert state.messages[0]["content"] == "line 0"
+
+    def test_shorter_transcript(self):
+        """Test syncing a transcript shorter than what was seen."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!"), raw("user", "Hi"), raw("agent", "Hey")])
+        state.sync([raw("agent", "Hello!")])
+
+        assert len(state) == 1
+        assert state.reused == 1
+
+    def test_accepts_utterance_models(self):
+        """Test syncing with already-validated Utterance objects."""
+        state = TranscriptState()
+        utterances = [Utterance(role="agent", content="Hello!")]
+        state.sync(utterances)
+
+        assert state.utterances[0] is utterances[0]
+
+    def test_sync_with_own_list_is_noop(self):
+        """Test that syncing the state's own utterance list does nothing."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!")])
+        state.sync(state.utterances)
+
+        assert state.reused == 1
+        assert state.appended == 0
+
+    def test_invalid_new_utterance_raises(self):
+        """Test that new utterances are still validated."""
+        state = TranscriptState()
+
+        with pytest.raises(ValidationError):
+            state.sync([raw("robot", "beep")])
+
+    def test_matches_full_rebuild_over_long_call(self):
+        """Test that incremental results equal a full rebuild after many turns."""
+        state = TranscriptState()
+        transcript = []
+        for turn in range(50):
+            transcript.append(raw("user", f"question {turn}"))
+            state.sync(transcript)
+            transcript.append(raw("agent", f"answer {turn}"))
+            state.sync(transcript)
+
+        expected = [
+            {"role": "user" if u["role"] == "user" else "assistant", "content": u["content"]}
+            for u in transcript
+        ]
+        assert state.messages == expected
+
+    def test_reset(self):
+        """Test that reset clears all state."""
+        state = TranscriptState()
+        state.sync([raw("agent", "Hello!")])
+        state.reset()
+
+        assert len(state) == 0
+        assert state.messages == []
@@ -0,0 +1,145 @@
+"""
+Tests for voice_frames.py - coalescing voice deltas into websocket frames.
+"""
+
+import asyncio
+
+import pytest
+
+from custom_types import MetadataResponse, ResponseResponse
+from voice_frames import FlushPolicy, TurnFrameStats, coalesce_frames, flush_point
+
+
+def delta(content, response_id=1):
+    return ResponseResponse(response_id=response_id, content=content, content_complete=False)
+
+
+def done(response_id=1):
+    return ResponseResponse(response_id=response_id, content="", content_complete=True)
+
+
+async def from_list(events, pause=0.0):
+    for event in events:
+        if pause:
+            await asyncio.sleep(pause)
+        yield event
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+class TestFlushPoint:
+    """Tests for flush_point."""
+
+    def test_holds_partial_sentence(self):
+        """Test that text without a boundary is held."""
+        assert flush_point("I built a", FlushPolicy()) == 0
+
+    def test_flushes_through_last_sentence(self):
+        """Test that complete sentences are released and the rest kept."""
+        buffer = "Sure thing. I built it. Then"
+        assert buffer[: flush_point(buffer, FlushPolicy())] == "Sure thing. I built it. "
+
+    def test_short_clause_is_held(self):
+        """Test that a short clause waits for more text."""
+        assert flush_point("Sure, I", FlushPolicy()) == 0
+
+    def test_long_clause_is_flushed(self):
+        """Test that a clause boundary flushes once the buffer is long enough."""
+        buffer = "At the Berkeley AI hackathon, we"
+        assert buffer[: flush_point(buffer, FlushPolicy())] == "At the Berkeley AI hackathon, "
+
+    def test_max_chars_flushes_everything(self):
+        """Test that a full buffer is flushed regardless of boundaries."""
+        assert flush_point("x" * 10, FlushPolicy(max_chars=10)) == 10
+
+
+@pytest.mark.asyncio
+class TestCoalesceFrames:
+    """Tests for coalesce_frames."""
+
+    async def test_merges_deltas_into_sentences(self):
+        """Test that token deltas become sentence frames."""
+        events = [delta("Hi"), delta(" there."), delta(" I build"), delta(" things."), done()]
+
+        frames = await collect(coalesce_frames(from_list(events), FlushPolicy()))
+
+        assert [f.content for f in frames] == ["Hi there.", " I build things.", ""]
+        assert frames[-1].content_complete is True
+
+    async def test_hold_timeout_flushes(self):
+        """Test that a slow stream still gets text out after max_hold_ms."""
+        policy = FlushPolicy(max_hold_ms=10)
+
+        frames = await collect(
+            coalesce_frames(from_list([delta("Let me"), delta(" check"), done()], pause=0.05), policy)
+        )
+
+        assert [f.content for f in frames] == ["Let me", " check", ""]
+
+    async def test_other_events_flush_and_pass_through(self):
+        """Test that non-delta events flush the buffer first and keep order."""
+        metadata = MetadataResponse(metadata={"type": "navigation", "page": "resume"})
+        events = [delta("Here's my"), metadata, delta(" resume"), done()]
+
+        frames = await collect(coalesce_frames(from_list(events), FlushPolicy()))
+
+        assert frames[0].content == "Here's my"
+        assert frames[1] is metadata
+        assert frames[2].content == " resume"
+
+    async def test_disabled_policy_passes_through(self):
+        """Test that max_chars=0 disables coalescing."""
+        events = [delta("a"), delta("b"), done()]
+
+        frames = await collect(coalesce_frames(from_list(events), FlushPolicy(max_chars=0)))
+
+        assert frames == events
+
+    async def test_closing_cancels_upstream(self):
+        """Test that closing the coalesced stream tears down the upstream generator."""
+        cancelled = []
+
+        async def slow():
+            try:
+                yield delta("Thinking.")
+                await asyncio.sleep(30)
+                yield done()
+            except (asyncio.CancelledError, GeneratorExit):
+                cancelled.append(True)
+                raise
+
+        stream = coalesce_frames(slow(), FlushPolicy())
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        assert first.content == "Thinking."
+        assert cancelled == [True]
+
+    async def test_upstream_error_propagates(self):
+        """Test that an exception in the upstream reaches the consumer."""
+
+        async def broken():
+            yield delta("Hi")
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await collect(coalesce_frames(broken(), FlushPolicy()))
+
+
+class TestTurnFrameStats:
+    """Tests for TurnFrameStats."""
+
+    def test_counts_frames_and_bytes(self):
+        """Test frame and byte counting, with first-frame latency on content."""
+        stats = TurnFrameStats()
+        stats.record(MetadataResponse(metadata={}))
+        assert stats.first_frame_ms is None
+
+        stats.record(delta("héllo"))
+        stats.record(done())
+
+        assert stats.frames == 3
+        assert stats.bytes == len("héllo".encode("utf-8"))
+        assert stats.first_frame_ms is not None
@@ -0,0 +1,120 @@
+"""
+Tests for watchdog.py - racing a fallback run when the first token is late.
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from agents import RawResponsesStreamEvent
+
+from metrics import metrics
+from watchdog import TtftWatchdog, is_start
+
+
+def text_event(delta):
+    return RawResponsesStreamEvent(data=MagicMock(type="response.output_text.delta", delta=delta))
+
+
+def created_event():
+    return RawResponsesStreamEvent(data=MagicMock(type="response.created"))
+
+
+def fake_run(deltas, delay=0.0):
+    """A fake RunResultStreaming whose first text arrives after `delay` seconds."""
+    result = MagicMock()
+
+    async def events():
+        yield created_event()
+        await asyncio.sleep(delay)
+        for delta in deltas:
+            yield text_event(delta)
+
+    result.stream_events.return_value = events()
+    return result
+
+
+async def texts(stream):
+    return [e.data.delta async for e in stream if is_start(e)]
+
+
+class TestIsStart:
+    """Tests for is_start."""
+
+    def test_text_delta_is_start(self):
+        assert is_start(text_event("Hi"))
+
+    def test_lifecycle_events_are_not(self):
+        assert not is_start(created_event())
+        assert not is_start(text_event(""))
+
+
+@pytest.mark.asyncio
+class TestTtftWatchdog:
+    """Tests for TtftWatchdog."""
+
+    async def test_fast_primary_never_triggers(self):
+        """Test that a primary starting before the deadline runs alone."""
+        launch = MagicMock()
+        watchdog = TtftWatchdog(fake_run(["Hello", " there"]), launch, deadline_ms=200)
+
+        assert await texts(watchdog.events()) == ["Hello", " there"]
+        launch.assert_not_called()
+        assert watchdog.triggered is False
+
+    async def test_slow_primary_loses_to_fallback(self):
+        """Test that a late primary is replaced by the fallback and cancelled."""
+        before = metrics.counters["llm.watchdog.fallback_won"]
+        primary = fake_run(["slow"], delay=0.2)
+        fallback = fake_run(["fast"])
+        watchdog = TtftWatchdog(primary, lambda: fallback, deadline_ms=20)
+
+        assert await texts(watchdog.events()) == ["fast"]
+        assert watchdog.fallback_won is True
+        assert watchdog.result is fallback
+        assert metrics.counters["llm.watchdog.fallback_won"] == before + 1
+        # Cancelled as soon as the fallback won, not kept running to be measured
+        primary.cancel.assert_called()
+        floor = metrics.summary("llm.watchdog.primary_ttft_floor_ms")
+        assert floor["count"] >= 1 and floor["max"] >= 20
+
+    async def test_primary_can_still_win_after_trigger(self):
+        """Test that the primary wins if it starts before the fallback does."""
+        primary = fake_run(["primary"], delay=0.05)
+        fallback = fake_run(["fallback"], delay=0.5)
+        watchdog = TtftWatchdog(primary, lambda: fallback, deadline_ms=20)
+
+        assert await texts(watchdog.events()) == ["primary"]
+        assert watchdog.triggered is True
+        assert watchdog.fallback_won is False
+        fallback.cancel.assert_called_once()
+
+    async def test_primary_error_without_fallback_propagates(self):
+        """Test that an early primary error surfaces like an unwatched run."""
+        result = MagicMock()
+
+        async def broken():
+            raise RuntimeError("upstream down")
+            yield  # pragma: no cover
+
+        result.stream_events.return_value = broken()
+        watchdog = TtftWatchdog(result, MagicMock(), deadline_ms=500)
+
+        with pytest.raises(RuntimeError):
+            await texts(watchdog.events())
+
+    async def test_fallback_covers_failed_primary(self):
+        """Test that a primary failing after the trigger falls back cleanly."""
+        result = MagicMock()
+
+        async def broken():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("upstream down")
+            yield  # pragma: no cover
+
+        result.stream_events.return_value = broken()
+        fallback = fake_run(["rescued"], delay=0.1)
+        watchdog = TtftWatchdog(result, lambda: fallback, deadline_ms=10)
+
+        assert await texts(watchdog.events()) == ["rescued"]
+        assert watchdog.result is fallback
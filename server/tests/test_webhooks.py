@@ -0,0 +1,127 @@
+"""
+Tests for webhooks.py - background ingestion of Retell webhook events.
+"""
+
+import json
+
+from metrics import metrics
+from webhooks import WebhookEvent, WebhookIngestor
+
+
+def event(name, call_id="c1", **extra):
+    body = {"event": name, "data": {"call_id": call_id, **extra}}
+    return WebhookEvent.parse(json.dumps(body, separators=(",", ":")).encode())
+
+
+def read_log(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestWebhookEvent:
+    """Tests for WebhookEvent."""
+
+    def test_parse(self):
+        """Test that the event name and call id are read from the body."""
+        parsed = event("call_started", "abc")
+        assert (parsed.event, parsed.call_id) == ("call_started", "abc")
+
+    def test_log_line_embeds_raw_body(self):
+        """Test that the log line carries the body bytes unchanged."""
+        parsed = WebhookEvent.parse(b'{"event":"call_ended","data":{"call_id":"c1","n":1.50}}')
+        line = parsed.log_line()
+        assert line.endswith(b',"payload":{"event":"call_ended","data":{"call_id":"c1","n":1.50}}}\n')
+        assert json.loads(line)["payload"]["data"]["n"] == 1.5
+
+    def test_log_line_is_single_line(self):
+        """Test that a pretty-printed body is re-encoded onto one line."""
+        parsed = WebhookEvent.parse(json.dumps({"event": "call_ended", "data": {}}, indent=2).encode())
+        line = parsed.log_line()
+        assert line.count(b"\n") == 1
+        assert json.loads(line)["payload"] == {"event": "call_ended", "data": {}}
+
+
+class TestWebhookIngestor:
+    """Tests for WebhookIngestor."""
+
+    async def test_writes_lifecycle_events_in_batches(self, tmp_path):
+        """Test that queued call events are handled and appended to the log in one batch."""
+        log = tmp_path / "events.jsonl"
+        seen = []
+        ingestor = WebhookIngestor(log_path=str(log), on_event=lambda e: seen.append(e.event))
+        before = metrics.summary("webhook.batch_size")["count"]
+
+        for name in ("call_started", "call_ended", "unknown_event", "call_analyzed"):
+            assert ingestor.submit(event(name))
+        await ingestor.close()
+
+        assert seen == ["call_started", "call_ended", "unknown_event", "call_analyzed"]
+        assert [r["payload"]["event"] for r in read_log(log)] == [
+            "call_started",
+            "call_ended",
+            "call_analyzed",
+        ]
+        assert metrics.summary("webhook.batch_size")["count"] == before + 1
+
+    async def test_log_is_append_only(self, tmp_path):
+        """Test that a new ingestor appends to an existing log."""
+        log = tmp_path / "events.jsonl"
+        for call_id in ("first", "second"):
+            ingestor = WebhookIngestor(log_path=str(log))
+            ingestor.submit(event("call_ended", call_id))
+            await ingestor.close()
+
+        assert [r["payload"]["data"]["call_id"] for r in read_log(log)] == ["first", "second"]
+
+    async def test_full_queue_rejects(self, tmp_path):
+        """Test that submit refuses events past the queue bound."""
+        ingestor = WebhookIngestor(log_path=str(tmp_path / "events.jsonl"), max_queue=2)
+        before = metrics.counters["webhook.dropped"]
+
+        results = [ingestor.submit(event("call_started", str(i))) for i in range(3)]
+
+        assert results == [True, True, False]
+        assert metrics.counters["webhook.dropped"] == before + 1
+        await ingestor.close()
+
+    async def test_handler_errors_dont_stop_worker(self, tmp_path):
+        """Test that a failing on_event hook still lets the event be logged."""
+        log = tmp_path / "events.jsonl"
+
+        def boom(_event):
+            raise RuntimeError("boom")
+
+        ingestor = WebhookIngestor(log_path=str(log), on_event=boom)
+        ingestor.submit(event("call_ended"))
+        await ingestor.drain()
+        ingestor.submit(event("call_analyzed"))
+        await ingestor.close()
+
+        assert len(read_log(log)) == 2
+
+    async def test_log_rotates_past_its_size_cap(self, tmp_path):
+        """Test that a full log moves to <path>.1 and a new one is started."""
+        log = tmp_path / "events.jsonl"
+        line_size = len(event("call_ended", "c0").log_line())
+        for call_id in ("c0", "c1", "c2"):
+            ingestor = WebhookIngestor(log_path=str(log), max_log_bytes=line_size * 2)
+            ingestor.submit(event("call_ended", call_id))
+            await ingestor.close()
+
+        assert [r["payload"]["data"]["call_id"] for r in read_log(tmp_path / "events.jsonl.1")] == ["c0", "c1"]
+        assert [r["payload"]["data"]["call_id"] for r in read_log(log)] == ["c2"]
+
+    def test_log_is_off_by_default(self, monkeypatch):
+        """Test that the event log is only written when WEBHOOK_EVENT_LOG is set."""
+        monkeypatch.delenv("WEBHOOK_EVENT_LOG", raising=False)
+        assert WebhookIngestor.from_env().log_path is None
+        assert WebhookIngestor().log_path is None
+
+    async def test_logging_disabled(self, tmp_path):
+        """Test that an empty log path only runs the handler."""
+        seen = []
+        ingestor = WebhookIngestor(log_path="", on_event=lambda e: seen.append(e.call_id))
+        ingestor.submit(event("call_ended", "c7"))
+        await ingestor.close()
+
+        assert seen == ["c7"]
+        assert list(tmp_path.iterdir()) == []
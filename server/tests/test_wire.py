@@ -0,0 +1,142 @@
+"""
+Tests for wire.py - encoding outbound websocket events and /chat chunks.
+"""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+import wire
+from custom_types import (
+    ConfigResponse,
+    MetadataResponse,
+    ResponseResponse,
+    TextChatStreamChunk,
+    ToolCallInvocationResponse,
+)
+
+
+@pytest.fixture(params=["active", "stdlib"])
+def backend(request, monkeypatch):
+    """Run a test with the installed backend (orjson) and with the stdlib fallback."""
+    if request.param == "stdlib":
+        monkeypatch.setattr(wire, "_string", wire._stdlib_string)
+        monkeypatch.setattr(wire, "_dumps", wire._stdlib_dumps)
+    return request.param
+
+
+def starlette_json(data):
+    """What websocket.send_json(event.__dict__) used to put on the wire."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+class TestEncodeEvent:
+    """Tests for encode_event."""
+
+    @pytest.mark.parametrize(
+        "event",
+        [
+            ResponseResponse(response_id=3, content="Hi there. ", content_complete=False),
+            ResponseResponse(response_id=3, content="", content_complete=True),
+            ResponseResponse(response_id=9, content="Bye!", content_complete=True, end_call=True),
+            ResponseResponse(response_id=1, content='He said "hi"\n\t\\ café 🎉', content_complete=False),
+            ResponseResponse(response_id=1, content="x", content_complete=False, end_call=None),
+            ResponseResponse(
+                response_id=1, content="Transferring", content_complete=True, transfer_number="+1555"
+            ),
+        ],
+    )
+    def test_response_matches_old_encoding(self, event, backend):
+        """Test that response frames decode to exactly what send_json sent."""
+        encoded = wire.encode_event(event).decode("utf-8")
+        assert json.loads(encoded) == event.model_dump()
+        assert list(json.loads(encoded)) == list(event.model_dump())
+
+    def test_template_bytes(self, backend):
+        """Test the compact template output for a content delta."""
+        event = ResponseResponse(response_id=12, content="Hello", content_complete=False)
+        assert wire.encode_event(event) == (
+            b'{"response_type":"response","response_id":12,"content":"Hello",'
+            b'"content_complete":false,"end_call":false,"transfer_number":null}'
+        )
+
+    @pytest.mark.parametrize(
+        "event",
+        [
+            ConfigResponse(config={"auto_reconnect": True, "call_details": True}),
+            MetadataResponse(metadata={"type": "navigation", "page": "project", "project_id": "p1"}),
+            ToolCallInvocationResponse(tool_call_id="t1", name="display_project", arguments="{}"),
+            {"response_type": "ping_pong", "timestamp": 42},
+        ],
+    )
+    def test_other_events_match_old_encoding(self, event, backend):
+        """Test that the generic path keeps content and field order."""
+        data = event.model_dump() if not isinstance(event, dict) else event
+        encoded = wire.encode_event(event)
+        assert json.loads(encoded) == json.loads(starlette_json(data))
+        assert list(json.loads(encoded)) == list(data)
+
+    def test_non_string_keys_fall_back(self):
+        """Test that metadata orjson rejects still encodes like before."""
+        event = MetadataResponse(metadata={"scores": {1: 0.9}})
+        assert wire.encode_event(event).decode("utf-8") == starlette_json(event.model_dump())
+
+
+class TestIsDelta:
+    """Tests for is_delta."""
+
+    def test_streamed_chunk(self):
+        """Test that a plain content chunk is a delta."""
+        assert wire.is_delta(ResponseResponse(response_id=1, content="Hi", content_complete=False))
+
+    def test_control_events_are_not_deltas(self):
+        """Test that completion, end_call, transfers and other events are not deltas."""
+        assert not wire.is_delta(ResponseResponse(response_id=1, content="", content_complete=True))
+        assert not wire.is_delta(
+            ResponseResponse(response_id=1, content="Bye", content_complete=False, end_call=True)
+        )
+        assert not wire.is_delta(
+            ResponseResponse(response_id=1, content="", content_complete=False, transfer_number="+1")
+        )
+        assert not wire.is_delta(ConfigResponse())
+
+
+class TestSseLine:
+    """Tests for sse_line."""
+
+    @pytest.mark.parametrize(
+        "chunk",
+        [
+            TextChatStreamChunk(type="content", content="**Hi** `code`\n- a"),
+            TextChatStreamChunk(type="done"),
+            TextChatStreamChunk(type="status", content="Searching projects..."),
+            TextChatStreamChunk(type="metadata", metadata={"type": "navigation", "page": "resume"}),
+        ],
+    )
+    def test_matches_model_dump(self, chunk, backend):
+        """Test that each line carries the same JSON as json.dumps(chunk.model_dump())."""
+        line = wire.sse_line(chunk)
+        assert line.startswith(b"data: ") and line.endswith(b"\n\n")
+        assert json.loads(line[6:]) == chunk.model_dump()
+
+    def test_error_dict(self):
+        """Test that a plain dict is framed too."""
+        line = wire.sse_line({"type": "error", "content": "boom"})
+        assert json.loads(line[6:]) == {"type": "error", "content": "boom"}
+
+
+@pytest.mark.asyncio
+class TestSendEvent:
+    """Tests for send_event."""
+
+    async def test_sends_text_frame(self):
+        """Test that events go out with send_text, not send_json."""
+        websocket = AsyncMock()
+        event = ResponseResponse(response_id=1, content="Hi", content_complete=False)
+
+        await wire.send_event(websocket, event)
+
+        websocket.send_text.assert_awaited_once()
+        websocket.send_json.assert_not_called()
+        assert json.loads(websocket.send_text.await_args.args[0]) == event.model_dump()
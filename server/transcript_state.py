@@ -0,0 +1,113 @@
+"""
+Incremental per-call transcript tracking.
+
+TranscriptState validates and converts only the utterances of Retell's full
+transcript that it hasn't seen. The known transcript is trusted by count up
+to its last RECHECK_WINDOW utterances (the live one and any speech
+recognition may still revise); only those are compared, so an edit further
+back is not picked up.
+"""
+
+from operator import itemgetter
+from typing import Any, Dict, List, Sequence, Tuple
+
+from custom_types import Utterance
+
+# (role, content) - tuple equality checks the role, then the content length,
+# before comparing any characters.
+Fingerprint = Tuple[str, str]
+
+
+def _fingerprint(item: Any) -> Fingerprint:
+    """Fingerprint a raw utterance dict or an Utterance without validating it."""
+    if isinstance(item, Utterance):
+        return (item.role, item.content)
+    return (item.get("role", ""), item.get("content", ""))
+
+
+_dict_fingerprint = itemgetter("role", "content")
+
+# Trailing known utterances compared on every sync; earlier ones are settled
+RECHECK_WINDOW = 4
+
+
+def utterance_to_message(utterance: Utterance) -> Dict[str, str]:
+    """Convert a Retell utterance into an OpenAI-style chat message."""
+    if utterance.role == "agent":
+        return {"role": "assistant", "content": utterance.content}
+    return {"role": "user", "content": utterance.content}
+
+
+class TranscriptState:
+    """Validated utterances and converted messages for a single call."""
+
+    def __init__(self):
+        self.utterances: List[Utterance] = []
+        self.messages: List[Dict[str, str]] = []
+        self._fingerprints: List[Fingerprint] = []
+        # Stats from the most recent sync(), handy for logging and benchmarks
+        self.reused = 0
+        self.appended = 0
+
+    def __len__(self) -> int:
+        return len(self.utterances)
+
+    def _matching_prefix(self, transcript: Sequence[Any]) -> int:
+        """Return how many leading utterances of `transcript` are already known.
+
+        Utterances before the last RECHECK_WINDOW known ones are taken as
+        unchanged. Within the window, fingerprints are compared forward and
+        the first mismatch ends the prefix, so a revision there drops
+        everything after it, even if later utterances still match.
+        """
+        common = min(len(self._fingerprints), len(transcript))
+        start = max(0, common - RECHECK_WINDOW)
+        known = self._fingerprints[start:common]
+        try:
+            # Raw dicts from the frame: build the keys in C
+            keys = list(map(_dict_fingerprint, transcript[start:common]))
+        except (TypeError, KeyError):
+            keys = [_fingerprint(item) for item in transcript[start:common]]
+        if keys == known:
+            return common
+        for i, (key, fingerprint) in enumerate(zip(keys, known)):
+            if key != fingerprint:
+                return start + i
+        return common
+
+    def sync(self, transcript: Sequence[Any]) -> "TranscriptState":
+        """Bring the state in line with a full transcript from Retell.
+
+        Accepts raw utterance dicts (straight from the websocket frame) or
+        Utterance models. Only utterances past the recognised prefix are
+        validated and converted; anything the new transcript no longer
+        agrees with is dropped first.
+        """
+        if transcript is self.utterances:
+            self.reused, self.appended = len(self.utterances), 0
+            return self
+
+        keep = self._matching_prefix(transcript)
+        if keep < len(self.utterances):
+            del self.utterances[keep:]
+            del self.messages[keep:]
+            del self._fingerprints[keep:]
+
+        for item in transcript[keep:]:
+            utterance = (
+                item if isinstance(item, Utterance) else Utterance.model_validate(item)
+            )
+            self.utterances.append(utterance)
+            self.messages.append(utterance_to_message(utterance))
+            self._fingerprints.append(_fingerprint(utterance))
+
+        self.reused = keep
+        self.appended = len(transcript) - keep
+        return self
+
+    def reset(self):
+        self.utterances.clear()
+        self.messages.clear()
+        self._fingerprints.clear()
+        self.reused = 0
+        self.appended = 0
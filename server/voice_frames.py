@@ -0,0 +1,172 @@
+"""
+Coalescing of streamed voice deltas into fewer websocket frames.
+
+The model streams one or two tokens per delta; sending each as its own
+ResponseResponse costs a JSON encode and a socket write per token and hands
+TTS choppy fragments. coalesce_frames() sits between draft_response() and
+websocket.send_json() and buffers content deltas until one of:
+
+- the buffer ends a sentence (or a clause, once it's long enough),
+- the buffer reaches FlushPolicy.max_chars,
+- the oldest buffered text has been held for FlushPolicy.max_hold_ms.
+
+Any other event (tool calls, metadata, the final content_complete frame)
+flushes the buffer first and is passed through unchanged.
+"""
+
+import asyncio
+import os
+import re
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Optional
+
+from custom_types import ResponseResponse
+from metrics import metrics
+from wire import is_delta
+
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*(?:\s+|$)")
+CLAUSE_END = re.compile(r"[,;:]+[\"')\]]*\s+")
+
+_END = object()
+
+
+@dataclass
+class FlushPolicy:
+    max_chars: int = 120
+    max_hold_ms: float = 120.0
+    # Shorter clauses ("Sure, ") are held so they join the rest of the sentence
+    min_clause_chars: int = 24
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_chars > 0
+
+    @classmethod
+    def from_env(cls) -> "FlushPolicy":
+        return cls(
+            max_chars=int(os.getenv("VOICE_FLUSH_MAX_CHARS", str(cls.max_chars))),
+            max_hold_ms=float(os.getenv("VOICE_FLUSH_MAX_HOLD_MS", str(cls.max_hold_ms))),
+        )
+
+
+def flush_point(buffer: str, policy: FlushPolicy) -> int:
+    """How many leading characters of the buffer to send now (0 = keep holding)."""
+    if len(buffer) >= policy.max_chars:
+        return len(buffer)
+    cut = 0
+    for match in SENTENCE_END.finditer(buffer):
+        cut = match.end()
+    if cut or len(buffer) < policy.min_clause_chars:
+        return cut
+    for match in CLAUSE_END.finditer(buffer):
+        cut = match.end()
+    return cut
+
+
+def _frame(template: ResponseResponse, content: str) -> ResponseResponse:
+    return ResponseResponse(
+        response_id=template.response_id,
+        content=content,
+        content_complete=False,
+        end_call=False,
+    )
+
+
+async def coalesce_frames(
+    events: AsyncIterator[Any], policy: FlushPolicy
+) -> AsyncIterator[Any]:
+    """Re-chunk the content deltas of a response stream per `policy`."""
+    if not policy.enabled:
+        async with aclosing(events):
+            async for event in events:
+                yield event
+        return
+
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def pump():
+        # Drive the upstream from a single task so its context (tracing
+        # spans, contextvars) stays put while we wait with timeouts.
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    queue.put_nowait(event)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_END)
+
+    producer = asyncio.create_task(pump())
+    buffer = ""
+    template: Optional[ResponseResponse] = None
+    held_since = 0.0
+    hold = policy.max_hold_ms / 1000
+    try:
+        while True:
+            if buffer:
+                timeout = held_since + hold - time.perf_counter()
+                try:
+                    event = await asyncio.wait_for(queue.get(), max(timeout, 0))
+                except asyncio.TimeoutError:
+                    metrics.incr("voice.flush.hold")
+                    yield _frame(template, buffer)
+                    buffer = ""
+                    continue
+            else:
+                event = await queue.get()
+
+            if event is _END:
+                break
+            if isinstance(event, Exception):
+                raise event
+
+            if is_delta(event):
+                if not buffer:
+                    template, held_since = event, time.perf_counter()
+                buffer += event.content
+                cut = flush_point(buffer, policy)
+                if cut:
+                    full = len(buffer) >= policy.max_chars
+                    metrics.incr("voice.flush.size" if full else "voice.flush.boundary")
+                    yield _frame(template, buffer[:cut])
+                    buffer = buffer[cut:]
+                    held_since = time.perf_counter()
+                continue
+
+            if buffer:
+                yield _frame(template, buffer)
+                buffer = ""
+            yield event
+
+        if buffer:
+            yield _frame(template, buffer)
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+
+class TurnFrameStats:
+    """Frames, content bytes and first-frame latency for one response turn."""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        self.frames = 0
+        self.bytes = 0
+        self.first_frame_ms: Optional[float] = None
+
+    def record(self, event: Any):
+        self.frames += 1
+        content = getattr(event, "content", None)
+        if content:
+            self.bytes += len(content.encode("utf-8"))
+            if self.first_frame_ms is None:
+                self.first_frame_ms = (time.perf_counter() - self.started) * 1000
+
+    def finish(self):
+        metrics.observe("voice.frames_per_turn", self.frames)
+        metrics.observe("voice.bytes_per_turn", self.bytes)
+        if self.first_frame_ms is not None:
+            metrics.observe("voice.first_frame_ms", self.first_frame_ms)
@@ -0,0 +1,151 @@
+"""
+Time-to-first-token watchdog for voice turns.
+
+An occasional slow upstream response leaves the caller in dead air.
+TtftWatchdog wraps the primary run's event stream: if it hasn't started
+(first text delta or tool call) by the deadline, a fallback run is launched
+in parallel and whichever starts first is streamed. The losing run is
+cancelled as soon as the race is decided. A losing primary is not kept
+around to measure its real TTFT, which would double model spend under the
+very overload the watchdog exists for; the time it had taken so far is
+recorded as a lower bound instead.
+"""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from agents import RawResponsesStreamEvent, RunItemStreamEvent
+
+from metrics import metrics
+
+def is_start(event: Any) -> bool:
+    """Whether an event means the run has started answering."""
+    if isinstance(event, RawResponsesStreamEvent):
+        data = event.data
+        return getattr(data, "type", "") == "response.output_text.delta" and bool(
+            getattr(data, "delta", "")
+        )
+    if isinstance(event, RunItemStreamEvent):
+        return event.name == "tool_called"
+    return False
+
+
+class _Lane:
+    """One run being raced: its event iterator, buffered events and state."""
+
+    def __init__(self, name: str, result: Any):
+        self.name = name
+        self.result = result
+        self.launched = time.perf_counter()
+        self.iterator = result.stream_events().__aiter__()
+        self.buffered: List[Any] = []
+        self.step: Optional[asyncio.Future] = None
+        self.finished = False
+        self.error: Optional[BaseException] = None
+
+    def next_step(self) -> asyncio.Future:
+        if self.step is None:
+            self.step = asyncio.ensure_future(self.iterator.__anext__())
+        return self.step
+
+    def stop(self):
+        if self.step is not None and not self.step.done():
+            self.step.cancel()
+        self.result.cancel()
+
+
+class TtftWatchdog:
+    def __init__(
+        self,
+        primary: Any,
+        launch_fallback: Callable[[], Any],
+        deadline_ms: float,
+    ):
+        self.result = primary
+        self._launch_fallback = launch_fallback
+        self.deadline = deadline_ms / 1000
+        self.triggered = False
+        self.fallback_won = False
+        self._lanes: List[_Lane] = []
+
+    async def events(self) -> AsyncIterator[Any]:
+        primary = _Lane("primary", self.result)
+        self._lanes = [primary]
+        winner: Optional[_Lane] = None
+        try:
+            while winner is None:
+                active = {lane.next_step(): lane for lane in self._lanes if not lane.finished}
+                if not active:
+                    break
+                timeout = None
+                if not self.triggered:
+                    timeout = max(0.0, primary.launched + self.deadline - time.perf_counter())
+                done, _ = await asyncio.wait(
+                    active, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    self._trigger()
+                    continue
+                for step in done:
+                    lane = active[step]
+                    lane.step = None
+                    try:
+                        event = step.result()
+                    except StopAsyncIteration:
+                        # Finished without a start event (e.g. an empty reply)
+                        lane.finished = True
+                        winner = winner or lane
+                        continue
+                    except Exception as e:
+                        lane.finished, lane.error = True, e
+                        continue
+                    lane.buffered.append(event)
+                    if winner is None and is_start(event):
+                        winner = lane
+
+            if winner is None:
+                # Every lane failed: surface the primary's error like an unwatched run
+                raise primary.error or self._lanes[-1].error
+
+            self._settle(winner)
+            buffered, winner.buffered = winner.buffered, []
+            for event in buffered:
+                yield event
+            if not winner.finished:
+                async for event in winner.iterator:
+                    yield event
+        finally:
+            for lane in self._lanes:
+                if lane.step is not None and not lane.step.done():
+                    lane.step.cancel()
+
+    def _trigger(self):
+        self.triggered = True
+        metrics.incr("llm.watchdog.triggered")
+        self._lanes.append(_Lane("fallback", self._launch_fallback()))
+
+    def _settle(self, winner: _Lane):
+        self.result = winner.result
+        if not self.triggered:
+            return
+        won_at = time.perf_counter()
+        primary = self._lanes[0]
+        if winner is primary:
+            metrics.incr("llm.watchdog.primary_won")
+            for lane in self._lanes[1:]:
+                lane.stop()
+            return
+
+        self.fallback_won = True
+        metrics.incr("llm.watchdog.fallback_won")
+        metrics.observe("llm.watchdog.fallback_ttft_ms", (won_at - winner.launched) * 1000)
+        if not primary.finished:
+            # Its real TTFT is at least this; not worth paying for the rest
+            metrics.observe("llm.watchdog.primary_ttft_floor_ms", (won_at - primary.launched) * 1000)
+            primary.stop()
+
+    def cancel(self):
+        """Stop every run this watchdog started (the turn was abandoned)."""
+        for lane in self._lanes:
+            lane.stop()
@@ -0,0 +1,158 @@
+"""
+Background ingestion of Retell webhook events.
+
+WebhookIngestor queues verified events (WEBHOOK_QUEUE_MAX; a full queue makes
+the endpoint answer 503) and one worker per process handles them in batches:
+it calls the on_event hook per event and appends call lifecycle events to an
+optional JSONL log (WEBHOOK_EVENT_LOG, rotated at WEBHOOK_EVENT_LOG_MAX_BYTES)
+with one write per batch, off the event loop.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from inbound import decode
+from metrics import metrics
+
+LOGGED_EVENTS = frozenset({"call_started", "call_ended", "call_analyzed"})
+
+DEFAULT_LOG_MAX_BYTES = 50_000_000
+DEFAULT_QUEUE_MAX = 1000
+DEFAULT_BATCH_MAX = 100
+
+
+@dataclass(slots=True)
+class WebhookEvent:
+    event: str
+    call_id: Optional[str]
+    payload: Any
+    raw: bytes
+    received_at: float
+
+    @classmethod
+    def parse(cls, raw: bytes) -> "WebhookEvent":
+        payload = decode(raw)
+        return cls(
+            event=payload["event"],
+            call_id=(payload.get("data") or {}).get("call_id"),
+            payload=payload,
+            raw=raw,
+            received_at=time.time(),
+        )
+
+    def log_line(self) -> bytes:
+        raw = self.raw.strip()
+        if b"\n" in raw or b"\r" in raw:
+            # Pretty-printed body; JSONL needs it on one line
+            from wire import dumps
+
+            raw = dumps(self.payload)
+        return b'{"received_at":%.3f,"payload":%s}\n' % (self.received_at, raw)
+
+
+class WebhookIngestor:
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        max_log_bytes: int = DEFAULT_LOG_MAX_BYTES,
+        max_queue: int = DEFAULT_QUEUE_MAX,
+        batch_max: int = DEFAULT_BATCH_MAX,
+        on_event: Optional[Callable[[WebhookEvent], None]] = None,
+    ):
+        self.log_path = log_path or None
+        # 0 or less: never rotate
+        self.max_log_bytes = max_log_bytes
+        self.max_queue = max(1, max_queue)
+        self.batch_max = max(1, batch_max)
+        self.on_event = on_event
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._file = None
+
+    @classmethod
+    def from_env(cls, on_event: Optional[Callable[[WebhookEvent], None]] = None) -> "WebhookIngestor":
+        return cls(
+            log_path=os.getenv("WEBHOOK_EVENT_LOG", ""),
+            max_log_bytes=int(os.getenv("WEBHOOK_EVENT_LOG_MAX_BYTES", str(DEFAULT_LOG_MAX_BYTES))),
+            max_queue=int(os.getenv("WEBHOOK_QUEUE_MAX", str(DEFAULT_QUEUE_MAX))),
+            batch_max=int(os.getenv("WEBHOOK_BATCH_MAX", str(DEFAULT_BATCH_MAX))),
+            on_event=on_event,
+        )
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, event: WebhookEvent) -> bool:
+        """Queue an event for the worker. False if the queue is full."""
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.max_queue)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        metrics.incr(f"webhook.received.{event.event}")
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            metrics.incr("webhook.dropped")
+            return False
+        metrics.observe("webhook.queue_depth", self._queue.qsize())
+        return True
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_max and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._process(batch)
+            except Exception as e:
+                # Keep the worker alive; the batch is lost, later ones aren't
+                print(f"Webhook batch failed: {e}", flush=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _process(self, batch: List[WebhookEvent]):
+        metrics.observe("webhook.batch_size", len(batch))
+        for event in batch:
+            if self.on_event is not None:
+                try:
+                    self.on_event(event)
+                except Exception as e:
+                    print(f"Webhook handler failed for {event.event}: {e}", flush=True)
+        lines = [event.log_line() for event in batch if event.event in LOGGED_EVENTS]
+        if lines and self.log_path:
+            started = time.perf_counter()
+            await asyncio.to_thread(self._append, b"".join(lines))
+            metrics.observe("webhook.write_ms", (time.perf_counter() - started) * 1000)
+            metrics.incr("webhook.logged", len(lines))
+
+    def _append(self, data: bytes):
+        if self._file is None:
+            self._file = open(self.log_path, "ab")
+        size = self._file.tell()
+        if 0 < self.max_log_bytes < size + len(data) and size:
+            self._file.close()
+            os.replace(self.log_path, self.log_path + ".1")
+            self._file = open(self.log_path, "ab")
+        self._file.write(data)
+        self._file.flush()
+
+    async def drain(self):
+        """Wait until every queued event has been processed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Process what is queued, then stop the worker and close the log."""
+        await self.drain()
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,123 @@
+"""
+Encoding of outbound events for the websocket and the /chat stream.
+
+encode_event() and sse_line() build the hot events (content deltas and done
+chunks) from precompiled byte templates, so only the content string is
+encoded per event, and dump anything else from its field dict. Both use
+orjson when it is installed and stdlib json otherwise. send_event() writes a
+text frame, which Retell expects.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any
+
+from custom_types import OutboundEvent, ResponseResponse, TextChatStreamChunk
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    # The same settings as Starlette's send_json
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+_stdlib_encode_string = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _stdlib_string(value: str) -> bytes:
+    return _stdlib_encode_string(value).encode("utf-8")
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    _string = orjson.dumps
+
+    def _dumps(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # e.g. non-str dict keys in tool metadata; encode them like before
+            return _stdlib_dumps(obj)
+
+else:
+    BACKEND = "json"
+    _string = _stdlib_string
+    _dumps = _stdlib_dumps
+
+
+def dumps(obj: Any) -> bytes:
+    """JSON bytes for an event dataclass or a plain JSON-able value."""
+    if isinstance(obj, OutboundEvent):
+        obj = obj.model_dump()
+    return _dumps(obj)
+
+
+def _json_bool(value: bool) -> bytes:
+    return b"true" if value else b"false"
+
+
+# ResponseResponse: head per response_id (constant for a turn), then content, then a tail
+@lru_cache(maxsize=64)
+def _response_head(response_id: int) -> bytes:
+    return b'{"response_type":"response","response_id":%d,"content":' % response_id
+
+
+# (content_complete, end_call) -> the rest of the object, transfer_number unset
+_RESPONSE_TAILS = {
+    (complete, end_call): (
+        b',"content_complete":' + _json_bool(complete)
+        + b',"end_call":' + _json_bool(end_call)
+        + b',"transfer_number":null}'
+    )
+    for complete in (False, True)
+    for end_call in (False, True)
+}
+
+_CHUNK_CONTENT_HEAD = b'data: {"type":"content","content":'
+_CHUNK_CONTENT_TAIL = b',"metadata":null}\n\n'
+_CHUNK_DONE = b'data: {"type":"done","content":null,"metadata":null}\n\n'
+
+
+def is_delta(event: Any) -> bool:
+    """A streamed ResponseResponse chunk: no content_complete, end_call or transfer."""
+    return (
+        type(event) is ResponseResponse
+        and not event.content_complete
+        and not event.end_call
+        and not event.transfer_number
+    )
+
+
+def encode_event(event: Any) -> bytes:
+    """JSON for an outbound Retell event (an event dataclass or a plain dict)."""
+    if (
+        type(event) is ResponseResponse
+        and event.transfer_number is None
+        and event.end_call is not None
+        and type(event.response_id) is int
+    ):
+        return (
+            _response_head(event.response_id)
+            + _string(event.content)
+            + _RESPONSE_TAILS[(bool(event.content_complete), bool(event.end_call))]
+        )
+    return dumps(event)
+
+
+def sse_line(chunk: Any) -> bytes:
+    """One Server-Sent Events line for a TextChatStreamChunk (or an error dict)."""
+    if type(chunk) is TextChatStreamChunk and chunk.metadata is None:
+        if chunk.type == "content" and chunk.content is not None:
+            return _CHUNK_CONTENT_HEAD + _string(chunk.content) + _CHUNK_CONTENT_TAIL
+        if chunk.type == "done" and chunk.content is None:
+            return _CHUNK_DONE
+    return b"data: " + dumps(chunk) + b"\n\n"
+
+
+async def send_event(websocket: Any, event: Any):
+    """Send an outbound event as a text frame."""
+    await websocket.send_text(encode_event(event).decode("utf-8"))